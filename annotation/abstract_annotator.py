@@ -1,20 +1,19 @@
 from abc import ABC, abstractmethod
 import numpy as np
-from typing import List
+from typing import Dict
 
-class AbstractVideoProcessor(ABC):
+class AbstractAnnotator(ABC):
 
     @abstractmethod
-    def process(self, frames: List[np.ndarray], fps: float = 1e-6) -> List[np.ndarray]:
+    def annotate(self, frame: np.ndarray, tracks: Dict) -> np.ndarray:
         """
-        Abstract method for video processing
+        Abstract method for frame annotation
         
         Args:
-            frames (List[np.ndarray]): Frame batch to process.
-            fps (float): Video FPS.
+            frame (np.ndarray): Frame to annotate.
+            tracks (Dict): Tracking data used for the annotation.
         
         Returns:
-            List[np.ndarray]: Processed frames.
+            np.ndarray: Annotated frame.
         """
         pass
-        
\ No newline at end of file
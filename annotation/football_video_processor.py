@@ -8,6 +8,7 @@ from speed_estimation import SpeedEstimator
 from .frame_number_annotator import FrameNumberAnnotator
 from file_writing import TracksJsonWriter
 from tracking import ObjectTracker, KeypointsTracker
+from trackers import JointDetectionScheduler, PossessionStats, PossessionEventDetector
 from club_assignment import ClubAssigner
 from ball_to_player_assignment import BallToPlayerAssigner
 from utils import rgb_bgr_converter
@@ -44,6 +45,7 @@ class FootballVideoProcessor(AbstractAnnotator, AbstractVideoProcessor):
         self.obj_tracker = obj_tracker
         self.obj_annotator = ObjectAnnotator()
         self.kp_tracker = kp_tracker
+        self.detection_scheduler = None  # Created on the first batch and shut down by close()
         self.kp_annotator = KeypointsAnnotator()
         self.club_assigner = club_assigner
         self.ball_to_player_assigner = ball_to_player_assigner
@@ -69,6 +71,12 @@ class FootballVideoProcessor(AbstractAnnotator, AbstractVideoProcessor):
         
         self.frame_num = 0
 
+        # Running possession counts with prefix sums, updated once per frame
+        self.possession_stats = PossessionStats()
+
+        # Possession events (spells, team changes, candidate passes) extracted online
+        self.possession_events = PossessionEventDetector()
+
         self.field_image = field_image
 
     def process(self, frames: List[np.ndarray], fps: float = 1e-6) -> List[np.ndarray]:
@@ -85,9 +93,12 @@ class FootballVideoProcessor(AbstractAnnotator, AbstractVideoProcessor):
         
         self.cur_fps = max(fps, 1e-6)
 
-        # Detect objects and keypoints in all frames
-        batch_obj_detections = self.obj_tracker.detect(frames)
-        batch_kp_detections = self.kp_tracker.detect(frames)
+        # Detect objects and keypoints in all frames, running both models concurrently
+        if self.detection_scheduler is None:
+            self.detection_scheduler = JointDetectionScheduler(
+                self.obj_tracker.detect, self.kp_tracker.detect,
+                obj_backend=getattr(self.obj_tracker, 'model', None), kp_backend=getattr(self.kp_tracker, 'model', None))
+        batch_obj_detections, batch_kp_detections = self.detection_scheduler.detect(frames)
 
         processed_frames = []
 
@@ -107,11 +118,14 @@ class FootballVideoProcessor(AbstractAnnotator, AbstractVideoProcessor):
             all_tracks = self.obj_mapper.map(all_tracks)
 
             # Assign the ball to the closest player and calculate speed
-            all_tracks['object'], _ = self.ball_to_player_assigner.assign(
+            all_tracks['object'], player_with_ball = self.ball_to_player_assigner.assign(
                 all_tracks['object'], self.frame_num, 
                 all_tracks['keypoints'].get(8, None),  # keypoint for player 1
                 all_tracks['keypoints'].get(24, None)  # keypoint for player 2
             )
+            possession_team = self._possession_team(all_tracks['object'], player_with_ball)
+            self.possession_stats.update(possession_team)
+            self.possession_events.update(self.frame_num, player_with_ball, possession_team)
 
             # Estimate the speed of the tracked objects
             all_tracks['object'] = self.speed_estimator.calculate_speed(
@@ -133,6 +147,14 @@ class FootballVideoProcessor(AbstractAnnotator, AbstractVideoProcessor):
         return processed_frames
 
     
+    def close(self) -> None:
+        """
+        Shuts down the detection thread pools. A later call to `process` starts new ones.
+        """
+        if self.detection_scheduler is not None:
+            self.detection_scheduler.close()
+            self.detection_scheduler = None
+
     def annotate(self, frame: np.ndarray, tracks: Dict) -> np.ndarray:
         """
         Annotates the given frame with analised data
@@ -244,10 +266,8 @@ class FootballVideoProcessor(AbstractAnnotator, AbstractVideoProcessor):
         bar_width = overlay_width - bar_x
         bar_height = 15
 
-        # Get possession data from the ball-to-player assigner
-        possession = self.ball_to_player_assigner.get_ball_possessions()[-1]
-        possession_club1 = possession[0]
-        possession_club2 = possession[1]
+        # Get the possession up to the current frame, including the frames without possession
+        possession_club1, possession_club2 = self.possession_stats.shares(include_none=True)
 
         # Calculate sizes for each possession segment in pixels
         club1_width = int(bar_width * possession_club1)
@@ -284,6 +304,25 @@ class FootballVideoProcessor(AbstractAnnotator, AbstractVideoProcessor):
         return frame
     
 
+    def _possession_team(self, obj_tracks: Dict, player_with_ball: Optional[int]) -> int:
+        """
+        Returns the club with the ball in the current frame.
+
+        Args:
+            obj_tracks (Dict): Object tracks of the current frame.
+            player_with_ball (Optional[int]): Track id of the player with the ball, as returned by the ball-to-player assigner.
+
+        Returns:
+            int: 1 or 2 for the club with the ball, 0 if no club has it.
+        """
+        club = obj_tracks.get('player', {}).get(player_with_ball, {}).get('club')
+        if club is not None and club == self.club_assigner.club1.name:
+            return 1
+        if club is not None and club == self.club_assigner.club2.name:
+            return 2
+        return 0
+
+
     def _display_possession_text(self, frame: np.ndarray, club1_width: int, club2_width: int,
                                   neutral_width: int, bar_x: int, bar_y: int, 
                                  possession_club1_text: str, possession_club2_text: str, 
@@ -1,14 +1,13 @@
-from utils import read_video, save_video
+from utils import FrameSource, save_video
 from trackers import Tracker
 from team_assigner import TeamAssigner
 from player_ball_assigner import PlayerBallAssigner
-import numpy as np
 import pickle
 
 class MatchProcessor:
     def __init__(self, video_path, model_path, stub_path, output_video_path):
         """Inicializa o processador de partidas com caminhos de vídeo, modelo e saídas."""
-        self.video_frames = read_video(video_path)
+        self.video_frames = FrameSource(video_path)  # Lê os frames sob demanda, sem carregar o vídeo inteiro
         self.tracker = Tracker(model_path)
         self.team_assigner = TeamAssigner()
         self.player_assigner = PlayerBallAssigner()
@@ -28,32 +27,13 @@ class MatchProcessor:
 
     def assign_teams(self):
         """Atribui o time para cada jogador com base na cor do uniforme."""
-        initial_frame = self.video_frames[0]
-        self.team_assigner.assign_team_color(initial_frame, self.tracks['players'][0])
-        
-        for frame_num, player_track in enumerate(self.tracks['players']):
-            for player_id, track in player_track.items():
-                team = self.team_assigner.get_player_team(
-                    self.video_frames[frame_num], track['bbox'], player_id)
-                track['team'] = team
-                track['team_color'] = self.team_assigner.teams_colors[team]
+        self.team_assigner.assign_teams(self.video_frames, self.tracks['players'])
 
     def assign_ball_possession(self):
         """Atribui a posse de bola ao jogador mais próximo em cada frame."""
-        for frame_num, player_track in enumerate(self.tracks['players']):
-            ball_bbox = self.tracks['ball'][frame_num][1]['bbox']
-            assigned_player = self.player_assigner.assign_ball_to_player(player_track, ball_bbox)
-            
-            # Define posse de bola e controla a sequência de quem está com a bola
-            if assigned_player != -1:
-                player_track[assigned_player]['has_ball'] = True
-                self.team_ball_control.append(player_track[assigned_player]['team'])
-            else:
-                # Mantém o último time com a posse
-                self.team_ball_control.append(
-                    self.team_ball_control[-1] if self.team_ball_control else 0
-                )
-        self.team_ball_control = np.array(self.team_ball_control)
+        # Todos os frames de uma vez; sem jogador próximo, mantém o último time com a posse
+        _, self.team_ball_control = self.player_assigner.assign_ball_to_players(
+            self.tracks['players'], self.tracks['ball'])
 
     def save_tracks(self):
         """Salva as informações de rastreamento atualizadas em um arquivo .pkl."""
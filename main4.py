@@ -1,77 +1,98 @@
 import os
-from utils import read_video, save_video
-from trackers import Tracker
-from team_assigner import TeamAssigner
+from utils import FrameSource, VideoStreamWriter, file_loader, file_saver, files_fingerprint
+from trackers import Tracker, TrackerCheckpoint, PossessionEventDetector
+from team_assigner import TeamAssigner, TeamModelBuilder
 from player_ball_assigner import PlayerBallAssigner
-import numpy as np
 import pickle
 
-def main():
+def main(match_id=None):
     # Inicializa o Tracker
     tracker = Tracker('models/best.pt')
 
     # Caminho para os vídeos segmentados
     video_folder = 'input_videos/parts'
     video_files = sorted(os.listdir(video_folder))  # Obtém a lista de vídeos e ordena
-    
-    all_output_frames = []  # Lista para armazenar todos os frames de saída
-    file_name = None
+
+    # Identidade da partida: nomes, tamanhos e datas de modificação das partes, ou o match_id informado.
+    # O estado da partida e os checkpoints de cada parte ficam separados por partida, então outra
+    # partida com partes de mesmo nome não reaproveita o estado desta
+    match_id = match_id or files_fingerprint([os.path.join(video_folder, f) for f in video_files])
+    state_dir = f'checkpoints/{match_id}'
+
+    # O time de cada jogador é mantido entre as partes, assim como os IDs do rastreamento
+    team_assigner = TeamAssigner()
+
+    # Estado da partida salvo ao fim de cada parte: partes concluídas, rastreador, cache de times
+    # e eventos de posse (com o número de frames já processados, para numerar os frames da partida)
+    match_state = file_loader(state_dir, 'match_state') or {'parts_done': [], 'frames_done': 0}
+    match_state.setdefault('frames_done', 0)
+    possession_events = PossessionEventDetector()
+    if 'tracker' in match_state:
+        tracker.load_state_dict(match_state['tracker'])
+        team_assigner.load_state_dict(match_state['team_assigner'])
+        possession_events = match_state.get('possession_events', possession_events)
+        print(f"Retomando após {len(match_state['parts_done'])} partes concluídas.")
+
     for video_file in video_files:
-        # Lê o vídeo
-        video_frames = read_video(os.path.join(video_folder, video_file))
+        if video_file in match_state['parts_done']:
+            continue
+
+        # Lê o vídeo sob demanda, sem carregar todos os frames na memória
+        video_frames = FrameSource(os.path.join(video_folder, video_file))
         file_name = video_file.replace('.mp4', '')
-        
+
         # Obtém os objetos rastreados
+        # Checkpoints periódicos permitem retomar a parte se o processamento for interrompido
+        checkpoint = TrackerCheckpoint(f'stub/{state_dir}/{file_name}')
         tracks = tracker.get_object_tracks(video_frames, read_from_stub=False,
-                                           stub_path='stubs/track_stubs_with_teams.pkl')
+                                           stub_path='stubs/track_stubs_with_teams.pkl',
+                                           checkpoint=checkpoint)
         
         # Interpola posições da bola
         tracks["ball"] = tracker.interpolate_ball_positions(tracks["ball"])
 
-        # Atribui os times aos jogadores
-        team_assigner = TeamAssigner()
-        team_assigner.assign_team_color(video_frames[0], tracks['players'][0])
-        
+        # O modelo de cores dos times é ajustado uma vez por partida, com frames amostrados dos
+        # primeiros minutos, e salvo para as próximas partes e execuções
+        if team_assigner.kmeans is None:
+            builder = TeamModelBuilder(frame_stride=25, max_frames=int((video_frames.fps or 25) * 60 * 3))
+            team_assigner.set_team_model(builder.fit_or_load(video_frames, tracks['players'], match_id))
+
         # Atribui o time para cada jogador em cada frame
-        for frame_num, player_track in enumerate(tracks['players']):
-            for player_id, track in player_track.items():
-                team = team_assigner.get_player_team(video_frames[frame_num], track['bbox'], player_id)
-                tracks['players'][frame_num][player_id]['team'] = team
-                tracks['players'][frame_num][player_id]['team_color'] = team_assigner.teams_colors[team]
-                print(f"Jogador {player_id} no frame {frame_num}: time atribuído: {team}")  # Log para verificação
-
-        # Atribuição de posse de bola
+        team_assigner.assign_teams(video_frames, tracks['players'])
+        print(f"Cache de times: {team_assigner.team_cache.stats()}")
+
+        # Atribuição de posse de bola para a parte inteira de uma vez
         player_assigner = PlayerBallAssigner()
-        team_ball_control = []
-        for frame_num, player_track in enumerate(tracks['players']):
-            ball_bbox = tracks['ball'][frame_num][1]['bbox']
-            assigned_player = player_assigner.assign_ball_to_player(player_track, ball_bbox)
-            
-            if assigned_player != -1:
-                tracks['players'][frame_num][assigned_player]['has_ball'] = True
-                team_ball_control.append(tracks['players'][frame_num][assigned_player]['team'])
-            else:
-                team_ball_control.append(team_ball_control[-1] if team_ball_control else 0)
-
-        team_ball_control = np.array(team_ball_control)
-
-        # Desenha o resultado para o vídeo atual
-        output_video_frames = tracker.draw_annotations(video_frames, tracks, team_ball_control)
-        
-        # Armazena os frames de saída
-        all_output_frames.extend(output_video_frames)  # Adiciona os frames do vídeo atual à lista total
+        assigned_players, team_ball_control = player_assigner.assign_ball_to_players(tracks['players'], tracks['ball'])
+
+        # Eventos de posse (início/fim, troca de time, passes) a partir da atribuição de cada frame
+        for frame_num, player_id in enumerate(assigned_players):
+            team = tracks['players'][frame_num][player_id]['team'] if player_id != -1 else 0
+            possession_events.update(match_state['frames_done'] + frame_num, int(player_id), team)
+
+        # Desenha e escreve o resultado da parte frame a frame, em um vídeo de saída por parte:
+        # ao retomar, os vídeos das partes já concluídas continuam válidos
+        output_path = f'output_videos/final_output_{match_id}_{file_name}.avi'
+        with VideoStreamWriter.from_source(output_path, video_frames) as writer:
+            writer.write_batch(tracker.annotate_frames(video_frames, tracks, team_ball_control))
 
         # Salva os dados dos jogadores em um arquivo .pkl após processar o vídeo atual
         with open('stubs/track_stubs_with_teams.pkl', 'wb') as f:
             pickle.dump(tracks, f)
 
-        # Limpa a memória após processar cada vídeo
-        del video_frames, tracks
-        import gc
-        gc.collect()  # Coleta de lixo para liberar memória
+        match_state['parts_done'].append(video_file)
+        match_state['frames_done'] += len(tracks['players'])
+        match_state['possession_events'] = possession_events
+        match_state['tracker'] = tracker.state_dict()
+        match_state['team_assigner'] = team_assigner.state_dict()
+        file_saver(match_state, state_dir, 'match_state')
+
+        # A parte já está registrada no estado da partida, então o seu checkpoint não é mais necessário
+        checkpoint.clear()
 
-    # Salva o vídeo final
-    save_video(all_output_frames, f'output_videos/final_output_{file_name}.avi')
+    possession_events.flush()
+    print(f"Eventos de posse: {len(possession_events.log)}, "
+          f"frames com a bola por time: {possession_events.log.possession_frames()}")
 
 if __name__ == '__main__':
     main()
@@ -64,6 +64,7 @@ def main():
 
     # Transforme os dados de rastreamento para a visão top-down
     transformed_tracks = view_transformer.transform(tracks['players'], keypoints_tracks, filter)
+    print(f"Cache de homografias: {view_transformer.homography.stats()}")
 
     # Salva o dicionário atualizado com times no arquivo .pkl
     with open('stubs/track_stubs_with_teams.pkl', 'wb') as f:
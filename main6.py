@@ -74,6 +74,7 @@ def main():
     for player_track in tracks['players']:
         transformed_player_tracks = view_transformer.transform(player_track, None, filter)
         transformed_tracks.append(transformed_player_tracks)
+    print(f"Cache de homografias: {view_transformer.homography.stats()}")
 
     # Salva o dicionário atualizado com times no arquivo .pkl
     with open('stubs/track_stubs_with_teams.pkl', 'wb') as f:
@@ -1,5 +1,6 @@
 import sys
 sys.path.append('../')
+import numpy as np
 from utils import get_center_of_bbox, measure_distance
 
 class PlayerBallAssigner():
@@ -24,4 +25,86 @@ class PlayerBallAssigner():
                     minimum_distance = distance
                     assigned_player = player_id
         
-        return assigned_player    
\ No newline at end of file
+        return assigned_player    
+
+    def assign_ball_batch(self, frame_index, track_ids, player_bboxes, ball_centers, teams=None):
+        """
+        Assigns the ball of every frame of the match at once.
+
+        Players are given as stacked rows, one per player and frame. The left and right foot
+        of every row are compared with the ball of its frame in a single broadcast, and each
+        frame keeps its closest player under `max_player_ball_distance`, as `assign_ball_to_player`
+        does frame by frame. Frames without an assigned player keep the team of the last one.
+
+        Args:
+            frame_index (np.ndarray): Frame of each player row, shape (n,).
+            track_ids (np.ndarray): Track id of each player row, shape (n,).
+            player_bboxes (np.ndarray): Player boxes of shape (n, 4) in xyxy format.
+            ball_centers (np.ndarray): Ball center of each frame, shape (num_frames, 2). NaN when there is no ball.
+            teams (np.ndarray): Team of each player row, shape (n,). None skips the team arrays.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Track id with the ball in each frame (-1 if none), and the
+                team in control of the ball in each frame (0 before the first assignment).
+        """
+        frame_index = np.asarray(frame_index, dtype=np.int64)
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        player_bboxes = np.asarray(player_bboxes, dtype=np.float64).reshape(-1, 4)
+        ball_centers = np.asarray(ball_centers, dtype=np.float64).reshape(-1, 2)
+        num_frames = len(ball_centers)
+
+        # Distance of the ball to the left foot (x1, y2) and the right foot (x2, y2) of every row
+        ball = ball_centers[frame_index]
+        dy = player_bboxes[:, 3] - ball[:, 1]
+        feet_dx = player_bboxes[:, [0, 2]] - ball[:, None, 0]
+        distance = np.sqrt(feet_dx ** 2 + dy[:, None] ** 2).min(axis=1)
+
+        # Closest row of each frame; the stable sort keeps the first of equal distances, like the loop
+        close = np.flatnonzero(distance < self.max_player_ball_distance)
+        close = close[np.lexsort((distance[close], frame_index[close]))]
+        first = np.ones(len(close), dtype=bool)
+        first[1:] = frame_index[close][1:] != frame_index[close][:-1]
+        chosen = close[first]
+
+        assigned_player = np.full(num_frames, -1, dtype=np.int64)
+        assigned_player[frame_index[chosen]] = track_ids[chosen]
+        if teams is None:
+            return assigned_player, None
+
+        # Hold-last-team: each frame takes the team of the last frame with an assigned player
+        assigned_team = np.zeros(num_frames, dtype=np.asarray(teams).dtype)
+        assigned_team[frame_index[chosen]] = np.asarray(teams)[chosen]
+        last_assigned = np.maximum.accumulate(np.where(assigned_player != -1, np.arange(num_frames), -1))
+        team_ball_control = np.where(last_assigned >= 0, assigned_team[np.maximum(last_assigned, 0)], 0)
+        return assigned_player, team_ball_control
+
+    def assign_ball_to_players(self, player_tracks, ball_tracks):
+        """
+        Assigns the ball of the whole match in one call and marks the players with `has_ball`.
+
+        Args:
+            player_tracks (List[Dict[int, Dict]]): Player tracks of each frame, as in `tracks['players']`.
+            ball_tracks (List[Dict[int, Dict]]): Ball tracks of each frame, as in `tracks['ball']`.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Track id with the ball in each frame (-1 if none), and the
+                team in control of the ball in each frame.
+        """
+        frame_index, track_ids, bboxes, teams = [], [], [], []
+        for frame_num, player_track in enumerate(player_tracks):
+            for player_id, player in player_track.items():
+                frame_index.append(frame_num)
+                track_ids.append(player_id)
+                bboxes.append(player['bbox'])
+                teams.append(player.get('team', 0))
+
+        ball_centers = np.full((len(player_tracks), 2), np.nan)
+        for frame_num, ball_track in enumerate(ball_tracks[:len(player_tracks)]):
+            if 1 in ball_track:
+                ball_centers[frame_num] = get_center_of_bbox(ball_track[1]['bbox'])
+
+        assigned_player, team_ball_control = self.assign_ball_batch(
+            frame_index, track_ids, bboxes, ball_centers, np.asarray(teams, dtype=np.int64))
+        for frame_num in np.flatnonzero(assigned_player != -1):
+            player_tracks[frame_num][int(assigned_player[frame_num])]['has_ball'] = True
+        return assigned_player, team_ball_control
@@ -1 +1,4 @@
-from .team_assigner import TeamAssigner
\ No newline at end of file
+from .team_assigner import TeamAssigner
+from .color_engine import player_colors
+from .team_vote_cache import TeamVoteCache
+from .team_model_builder import TeamModelBuilder
\ No newline at end of file
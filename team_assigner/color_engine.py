@@ -0,0 +1,114 @@
+import numpy as np
+from typing import Tuple
+
+def crop_grids(frame: np.ndarray, bboxes: np.ndarray, grid_size: Tuple[int, int] = (16, 16),
+               top_half: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample every crop of a frame on a fixed small grid in a single gather.
+
+    Each crop is the top half of its box (the shirt), sampled at the centers of a
+    `grid_size` grid of cells, so crops of any size become arrays of the same shape.
+
+    Args:
+        frame (np.ndarray): BGR frame.
+        bboxes (np.ndarray): Boxes of shape (n, 4) in xyxy format.
+        grid_size (Tuple[int, int]): Rows and columns of the grid.
+        top_half (bool): Whether to keep only the top half of each box.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Grids of shape (n, rows, cols, 3) as float32, and a boolean
+            array of shape (n,) marking crops that have at least one pixel inside the frame.
+    """
+    height, width = frame.shape[:2]
+    rows, cols = grid_size
+    bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+
+    x1 = np.clip(np.floor(bboxes[:, 0]), 0, width)
+    y1 = np.clip(np.floor(bboxes[:, 1]), 0, height)
+    x2 = np.clip(np.floor(bboxes[:, 2]), 0, width)
+    y2 = np.clip(np.floor(bboxes[:, 3]), 0, height)
+    if top_half:
+        y2 = y1 + np.floor((y2 - y1) / 2)
+    valid = (x2 - x1 >= 1) & (y2 - y1 >= 1)
+
+    # Cell centers of every crop, as pixel indices
+    ys = y1[:, None] + (np.arange(rows) + 0.5)[None, :] * (y2 - y1)[:, None] / rows
+    xs = x1[:, None] + (np.arange(cols) + 0.5)[None, :] * (x2 - x1)[:, None] / cols
+    ys = np.clip(ys.astype(np.int64), 0, height - 1)
+    xs = np.clip(xs.astype(np.int64), 0, width - 1)
+
+    grids = frame[ys[:, :, None], xs[:, None, :]].astype(np.float32)
+    return grids, valid
+
+
+def batched_two_means(pixels: np.ndarray, init_background: np.ndarray,
+                      iterations: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run 2-means clustering on many pixel sets at once, each with its own centroids.
+
+    Args:
+        pixels (np.ndarray): Pixels of shape (n, p, 3).
+        init_background (np.ndarray): Initial first centroid of each set, shape (n, 3). The second
+            starts at the pixel farthest from it, so the clustering is deterministic.
+        iterations (int): Maximum number of Lloyd iterations.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Labels of shape (n, p) and centroids of shape (n, 2, 3).
+    """
+    num_sets = len(pixels)
+    index = np.arange(num_sets)
+    farthest = np.argmax(((pixels - init_background[:, None, :]) ** 2).sum(axis=2), axis=1)
+    centers = np.stack([init_background, pixels[index, farthest]], axis=1)
+
+    labels = np.zeros(pixels.shape[:2], dtype=np.int64)
+    for iteration in range(iterations):
+        distances = ((pixels[:, :, None, :] - centers[:, None, :, :]) ** 2).sum(axis=3)
+        new_labels = np.argmin(distances, axis=2)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+        # Empty clusters keep their previous centroid
+        weights = np.stack([labels == 0, labels == 1], axis=1).astype(np.float32)  # (n, 2, p)
+        counts = weights.sum(axis=2, keepdims=True)
+        sums = weights @ pixels
+        centers = np.where(counts > 0, sums / np.maximum(counts, 1), centers)
+
+    return labels, centers
+
+
+def player_colors(frame: np.ndarray, bboxes: np.ndarray, grid_size: Tuple[int, int] = (16, 16),
+                  iterations: int = 10) -> np.ndarray:
+    """
+    Compute the shirt color of every player of a frame at once.
+
+    Each crop is split into two color clusters. As in `TeamAssigner.get_player_color`, the
+    cluster holding most of the four corners of the crop is the background, and the other
+    one is the player color.
+
+    Args:
+        frame (np.ndarray): BGR frame.
+        bboxes (np.ndarray): Player boxes of shape (n, 4) in xyxy format.
+        grid_size (Tuple[int, int]): Grid each crop is downsampled to.
+        iterations (int): Maximum number of 2-means iterations.
+
+    Returns:
+        np.ndarray: Colors of shape (n, 3). Crops outside the frame get black.
+    """
+    bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    if not len(bboxes):
+        return np.empty((0, 3))
+
+    grids, valid = crop_grids(frame, bboxes, grid_size)
+    num_crops, rows, cols, _ = grids.shape
+    corners = grids[:, [0, 0, -1, -1], [0, -1, 0, -1]]  # (n, 4, 3)
+
+    labels, centers = batched_two_means(grids.reshape(num_crops, rows * cols, 3), corners.mean(axis=1), iterations)
+    labels = labels.reshape(num_crops, rows, cols)
+
+    # Background is the cluster of most corners; ties go to cluster 0, like the original rule
+    corner_labels = labels[:, [0, 0, -1, -1], [0, -1, 0, -1]]
+    non_player_cluster = (corner_labels.sum(axis=1) > 2).astype(np.int64)
+    colors = centers[np.arange(num_crops), 1 - non_player_cluster].astype(np.float64)
+    colors[~valid] = 0
+    return colors
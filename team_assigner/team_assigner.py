@@ -1,12 +1,23 @@
 from sklearn.cluster import KMeans
+from collections import Counter
 import numpy as np
+import sys
+sys.path.append('../')
+from utils import iter_frames
+from .color_engine import player_colors
+from .team_vote_cache import TeamVoteCache
 
 class TeamAssigner:
-    def __init__(self):
+    def __init__(self, sample_stride=5, sample_window=50, early_lock_votes=3):
         self.teams_colors = {}
-        self.player_team_dict = {}
+        # Time de cada track decidido por votação nos primeiros frames e depois travado
+        self.team_cache = TeamVoteCache(sample_stride, sample_window, early_lock_votes)
         self.kmeans = None
 
+    @property
+    def player_team_dict(self):
+        return {player_id: self.team_cache.team(player_id) for player_id in self.team_cache.votes}
+
     def get_clustering_model(self, image):
         image_2d = image.reshape(-1, 3)
         kmeans = KMeans(n_clusters=2, init="k-means++", n_init=5, random_state=42)
@@ -14,30 +25,20 @@ class TeamAssigner:
         return kmeans
     
     def get_player_color(self, frame, bbox):
+        return self.get_player_colors(frame, [bbox])[0]
+
+    def get_player_colors(self, frame, bboxes):
+        # Cores de todos os jogadores do frame de uma vez: cada recorte é reduzido a uma grade
+        # fixa e agrupado em 2 cores num único k-means vetorizado, descartando a cor dos cantos
         try:
-            image = frame[int(bbox[1]):int(bbox[3]), int(bbox[0]):int(bbox[2])]
-            top_half_image = image[: int(image.shape[0] / 2), :]
-            kmeans = self.get_clustering_model(top_half_image)
-            
-            labels = kmeans.labels_
-            clustered_image = labels.reshape(top_half_image.shape[0], top_half_image.shape[1])
-            corner_clusters = [clustered_image[0, 0], clustered_image[0, -1], clustered_image[-1, 0], clustered_image[-1, -1]]
-            non_player_cluster = max(set(corner_clusters), key=corner_clusters.count)
-            player_cluster = 1 - non_player_cluster
-            player_color = kmeans.cluster_centers_[player_cluster]
-            
-            return player_color
+            return player_colors(frame, np.asarray(bboxes, dtype=np.float64).reshape(-1, 4))
         except Exception as e:
             print(f"Erro ao obter cor do jogador: {e}")
-            return np.array([0, 0, 0])  # Retorna uma cor padrão em caso de falha
+            return np.zeros((len(bboxes), 3))  # Retorna uma cor padrão em caso de falha
     
     def assign_team_color(self, frame, player_detections):
-        player_colors = []
-        for _, player_info in player_detections.items():
-            bbox = player_info['bbox']
-            player_color = self.get_player_color(frame, bbox)
-            if player_color is not None:
-                player_colors.append(player_color)
+        player_colors = self.get_player_colors(frame, [player_info['bbox'] for player_info in player_detections.values()])
+        player_colors = list(player_colors[player_colors.any(axis=1)])  # Recortes fora do frame voltam pretos
         
         if len(player_colors) >= 2:
             kmeans = KMeans(n_clusters=2, init="k-means++", n_init=10, random_state=42)
@@ -48,15 +49,75 @@ class TeamAssigner:
         else:
             print("Aviso: cores de times insuficientes para criar modelo KMeans.")
 
+    def set_team_model(self, kmeans):
+        # Usa um modelo já ajustado, por exemplo pelo TeamModelBuilder, em vez de ajustar no primeiro frame
+        self.kmeans = kmeans
+        self.teams_colors[1] = kmeans.cluster_centers_[0]
+        self.teams_colors[2] = kmeans.cluster_centers_[1]
+
     def get_player_team(self, frame, player_bbox, player_id):
-        if player_id in self.player_team_dict:
-            return self.player_team_dict[player_id]
-        
+        # Deve ser chamado uma vez por frame em que o track aparece: a cor só é calculada
+        # nos frames de amostragem, até o time do track ser travado
+        if not self.team_cache.needs_sample(player_id):
+            return self.team_cache.team(player_id)
+
         player_color = self.get_player_color(frame, player_bbox)
-        if self.kmeans is None or player_color is None:
+        if self.kmeans is None or player_color is None or not player_color.any():
             print("Aviso: modelo KMeans não inicializado ou cor do jogador não detectada.")
-            return 0  # Retorna um valor padrão para indicar que o time não foi determinado
-        
-        team_id = self.kmeans.predict(player_color.reshape(1, -1))[0] + 1
-        self.player_team_dict[player_id] = team_id
-        return team_id
+            return self.team_cache.team(player_id)  # 0 indica que o time ainda não foi determinado
+
+        self.team_cache.add_vote(player_id, int(self.kmeans.predict(player_color.reshape(1, -1))[0] + 1))
+        return self.team_cache.team(player_id)
+
+    def state_dict(self):
+        # Team cache: team of each track id, team colors and the color model
+        return {
+            'teams_colors': self.teams_colors,
+            'team_cache': self.team_cache,
+            'kmeans': self.kmeans,
+        }
+
+    def load_state_dict(self, state):
+        self.teams_colors = state['teams_colors']
+        self.kmeans = state['kmeans']
+        if 'team_cache' in state:
+            self.team_cache = state['team_cache']
+        else:
+            # Estado antigo: o time de cada track já estava decidido
+            for player_id, team in state['player_team_dict'].items():
+                self.team_cache.votes[player_id] = Counter({int(team): 1})
+                self.team_cache.locked[player_id] = int(team)
+
+    def assign_teams(self, frames, player_tracks):
+        # Streams the frames (list or FrameSource) alongside the per-frame player tracks
+        provisional = []  # Frames of tracks whose team was not locked yet
+        for frame_num, frame in enumerate(iter_frames(frames)):
+            player_track = player_tracks[frame_num]
+            if self.kmeans is None:
+                self.assign_team_color(frame, player_track)
+
+            # Only tracks not locked yet and due for a sample need a color: one batched call per frame
+            sampled_ids = [player_id for player_id in player_track if self.team_cache.needs_sample(player_id)]
+            if sampled_ids and self.kmeans is not None:
+                colors = self.get_player_colors(frame, [player_track[player_id]['bbox'] for player_id in sampled_ids])
+                # Recortes fora do frame ou degenerados voltam pretos e não votam, como no TeamModelBuilder
+                valid = colors.any(axis=1)
+                if valid.any():
+                    sampled_ids = [player_id for player_id, is_valid in zip(sampled_ids, valid) if is_valid]
+                    for player_id, team_id in zip(sampled_ids, self.kmeans.predict(colors[valid]) + 1):
+                        self.team_cache.add_vote(player_id, int(team_id))
+
+            for player_id, track in player_track.items():
+                self._set_team(track, self.team_cache.team(player_id))
+                if not self.team_cache.is_locked(player_id):
+                    provisional.append((player_id, track))
+
+        # The first frames of each track get the team of the final vote
+        for player_id, track in provisional:
+            self._set_team(track, self.team_cache.team(player_id))
+        return player_tracks
+
+    def _set_team(self, track, team):
+        track['team'] = team
+        if team in self.teams_colors:
+            track['team_color'] = self.teams_colors[team]
@@ -0,0 +1,137 @@
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from typing import Dict, List, Optional
+from utils import file_loader, file_saver, iter_frames
+from .color_engine import player_colors
+
+class TeamModelBuilder:
+    """
+    Fits the two-team color model on player crops sampled across many frames.
+
+    Every `frame_stride`-th frame of the first `max_frames` frames is sampled, so the model
+    sees both teams from many camera angles instead of a single frame. Player colors are
+    fitted incrementally with `MiniBatchKMeans.partial_fit`, one batch of `batch_size` colors
+    at a time. Colors far from both team centers, such as goalkeepers or referees tracked as
+    players, are rejected before each update. The fitted model can be saved per match, so
+    later parts and reruns load it instead of fitting it again.
+    """
+
+    def __init__(self, frame_stride: int = 25, max_frames: Optional[int] = 4500, batch_size: int = 256,
+                 outlier_factor: float = 3.0, random_state: int = 42) -> None:
+        """
+        Initializes the builder.
+
+        Args:
+            frame_stride (int): Frames between two sampled frames.
+            max_frames (Optional[int]): Only the first `max_frames` frames are sampled, e.g. fps * 60 * minutes.
+                None samples the whole video.
+            batch_size (int): Number of colors of each incremental update.
+            outlier_factor (float): A color is an outlier when its distance to the nearest team center is
+                above the median distance of its batch plus `outlier_factor` times the median absolute deviation.
+            random_state (int): Seed of the clustering.
+        """
+        if frame_stride < 1:
+            raise ValueError("frame_stride must be at least 1.")
+        self.frame_stride = frame_stride
+        self.max_frames = max_frames
+        self.batch_size = batch_size
+        self.outlier_factor = outlier_factor
+        self.random_state = random_state
+
+        self.kmeans: Optional[MiniBatchKMeans] = None
+        self.num_samples = 0
+        self.num_outliers = 0
+
+    def fit(self, frames, player_tracks: List[Dict[int, Dict]]) -> MiniBatchKMeans:
+        """
+        Fits the team model on the sampled frames.
+
+        Args:
+            frames: List of frames or `FrameSource`.
+            player_tracks (List[Dict[int, Dict]]): Player tracks of each frame, as in `tracks['players']`.
+
+        Returns:
+            MiniBatchKMeans: The model, whose cluster `i` is team `i + 1`.
+
+        Raises:
+            ValueError: If the sampled frames hold fewer than two player colors.
+        """
+        pending = []
+        for frame_num, frame in enumerate(iter_frames(frames)):
+            if (self.max_frames is not None and frame_num >= self.max_frames) or frame_num >= len(player_tracks):
+                break
+            if frame_num % self.frame_stride:
+                continue
+
+            bboxes = [track['bbox'] for track in player_tracks[frame_num].values()]
+            if not bboxes:
+                continue
+            colors = player_colors(frame, np.asarray(bboxes, dtype=np.float64))
+            pending.append(colors[colors.any(axis=1)])  # Crops outside the frame come back black
+
+            if sum(len(batch) for batch in pending) >= self.batch_size:
+                self.partial_fit(np.concatenate(pending))
+                pending = []
+
+        if pending:
+            self.partial_fit(np.concatenate(pending))
+        if self.kmeans is None:
+            raise ValueError("Not enough player colors to fit the team model.")
+        return self.kmeans
+
+    def partial_fit(self, colors: np.ndarray) -> None:
+        """
+        Updates the model with a batch of player colors, after rejecting the outliers.
+
+        Args:
+            colors (np.ndarray): Player colors of shape (n, 3).
+        """
+        colors = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+        if self.kmeans is None:
+            if len(colors) < 2:
+                return
+            # The first batch is clustered once to find its outliers, then fitted without them
+            provisional = self._new_model().partial_fit(colors)
+            inliers = self._inliers(provisional, colors)
+            self.kmeans = self._new_model().partial_fit(colors[inliers] if inliers.sum() >= 2 else colors)
+        else:
+            inliers = self._inliers(self.kmeans, colors)
+            if inliers.any():
+                self.kmeans.partial_fit(colors[inliers])
+
+        self.num_samples += len(colors)
+        self.num_outliers += int(len(colors) - inliers.sum())
+
+    def fit_or_load(self, frames, player_tracks: List[Dict[int, Dict]], match_id: str) -> MiniBatchKMeans:
+        """
+        Loads the team model of a match, or fits and saves it when there is none.
+
+        The model is saved with the id of its match, and a saved model of another match, or
+        without an id, is fitted again instead of being reused.
+
+        Args:
+            frames: List of frames or `FrameSource`.
+            player_tracks (List[Dict[int, Dict]]): Player tracks of each frame, as in `tracks['players']`.
+            match_id (str): Identity of the match, e.g. `files_fingerprint` of its video parts.
+
+        Returns:
+            MiniBatchKMeans: The model, whose cluster `i` is team `i + 1`.
+        """
+        saved = file_loader('team_models', match_id)
+        if isinstance(saved, dict) and saved.get('match_id') == match_id:
+            self.kmeans = saved['kmeans']
+            return self.kmeans
+
+        kmeans = self.fit(frames, player_tracks)
+        file_saver({'match_id': match_id, 'kmeans': kmeans}, 'team_models', match_id)
+        print(f"Modelo de times ajustado com {self.num_samples} cores, {self.num_outliers} descartadas.")
+        return kmeans
+
+    def _new_model(self) -> MiniBatchKMeans:
+        return MiniBatchKMeans(n_clusters=2, init='k-means++', n_init=3, random_state=self.random_state)
+
+    def _inliers(self, kmeans: MiniBatchKMeans, colors: np.ndarray) -> np.ndarray:
+        distances = np.min(kmeans.transform(colors), axis=1)
+        median = np.median(distances)
+        deviation = np.median(np.abs(distances - median))
+        return distances <= median + self.outlier_factor * max(deviation, 1.0)
@@ -0,0 +1,125 @@
+from collections import Counter
+from typing import Dict, Iterable, List
+
+class TeamVoteCache:
+    """
+    Per-track team cache decided by a majority vote over the first frames of each track.
+
+    A track is sampled on its first frame and then every `sample_stride` frames until
+    `sample_window` frames have passed. Each sample is one team vote. The team is locked
+    to the majority once the window is over, or earlier when `early_lock_votes` votes all
+    agree. After that no colour work is done for the track. One bad crop no longer decides
+    the team of a whole track.
+    """
+
+    def __init__(self, sample_stride: int = 5, sample_window: int = 50, early_lock_votes: int = 3) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            sample_stride (int): Frames between two colour samples of the same track.
+            sample_window (int): Number of frames, from the first one of a track, in which it is sampled.
+            early_lock_votes (int): Number of unanimous votes that lock the team before the window ends.
+                0 disables the early lock.
+        """
+        if sample_stride < 1 or sample_window < 1:
+            raise ValueError("sample_stride and sample_window must be at least 1.")
+        self.sample_stride = sample_stride
+        self.sample_window = sample_window
+        self.early_lock_votes = early_lock_votes
+
+        self.frames_seen: Dict[int, int] = {}  # Frames each track has been seen in
+        self.votes: Dict[int, Counter] = {}
+        self.locked: Dict[int, int] = {}  # Team of each locked track
+
+        self.lookups = 0
+        self.hits = 0  # Lookups answered without colour work
+        self.lock_latency = 0  # Sum over locked tracks of the frames seen before locking
+
+    def needs_sample(self, track_id: int) -> bool:
+        """
+        Records that the track is seen in one more frame and returns whether its colour
+        should be sampled in that frame.
+
+        Args:
+            track_id (int): Id of the track.
+
+        Returns:
+            bool: True if the caller should compute the colour and call `add_vote`.
+        """
+        self.lookups += 1
+        if track_id in self.locked:
+            self.hits += 1
+            return False
+
+        seen = self.frames_seen.get(track_id, 0)
+        self.frames_seen[track_id] = seen + 1
+        if seen >= self.sample_window and self._lock(track_id):
+            self.hits += 1
+            return False
+        if seen % self.sample_stride:
+            self.hits += 1
+            return False
+        return True
+
+    def add_vote(self, track_id: int, team: int) -> None:
+        """
+        Adds a team vote for a track.
+
+        Args:
+            track_id (int): Id of the track.
+            team (int): Team predicted from the colour sample. 0 (unknown) is ignored.
+        """
+        if track_id in self.locked or not team:
+            return
+        votes = self.votes.setdefault(track_id, Counter())
+        votes[team] += 1
+        if self.early_lock_votes and len(votes) == 1 and votes[team] >= self.early_lock_votes:
+            self._lock(track_id)
+
+    def team(self, track_id: int) -> int:
+        """Returns the locked team of a track, or its current majority, or 0 if it has no vote yet."""
+        if track_id in self.locked:
+            return self.locked[track_id]
+        votes = self.votes.get(track_id)
+        return votes.most_common(1)[0][0] if votes else 0
+
+    def confidence(self, track_id: int) -> float:
+        """Returns the share of votes of the majority team of a track, 0 if it has no vote."""
+        votes = self.votes.get(track_id)
+        if not votes:
+            return 0.0
+        return votes.most_common(1)[0][1] / sum(votes.values())
+
+    def is_locked(self, track_id: int) -> bool:
+        return track_id in self.locked
+
+    def teams(self, track_ids: Iterable[int]) -> List[int]:
+        """Returns the team of each track."""
+        return [self.team(track_id) for track_id in track_ids]
+
+    @property
+    def hit_rate(self) -> float:
+        """Returns the share of lookups that needed no colour work."""
+        return self.hits / max(self.lookups, 1)
+
+    @property
+    def mean_lock_latency(self) -> float:
+        """Returns the mean number of frames a track is seen before its team is locked."""
+        return self.lock_latency / max(len(self.locked), 1)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the cache counters."""
+        return {
+            'lookups': self.lookups, 'hits': self.hits, 'hit_rate': self.hit_rate,
+            'tracks': len(self.frames_seen), 'locked': len(self.locked),
+            'mean_lock_latency': self.mean_lock_latency,
+        }
+
+    def _lock(self, track_id: int) -> bool:
+        team = self.team(track_id)
+        if not team:
+            return False  # No usable vote yet, keep sampling
+        self.locked[track_id] = team
+        self.lock_latency += self.frames_seen.get(track_id, 0)
+        return True
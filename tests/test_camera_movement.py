@@ -0,0 +1,80 @@
+import cv2
+import numpy as np
+import pytest
+
+from view_transformer.camera_moviment_estimator import CameraMovementEstimator
+
+
+@pytest.fixture(scope='module')
+def panning_frames():
+    """Crops of a textured image panning right by a few pixels per frame."""
+    rng = np.random.default_rng(0)
+    texture = cv2.GaussianBlur(rng.integers(0, 255, (400, 700), dtype=np.uint8), (0, 0), 2)
+    texture = cv2.cvtColor(cv2.normalize(texture, None, 0, 255, cv2.NORM_MINMAX), cv2.COLOR_GRAY2BGR)
+    offsets = np.cumsum(np.r_[[0], rng.integers(0, 8, 39)])
+    return [texture[50:290, 20 + offset:340 + offset].copy() for offset in offsets]
+
+
+@pytest.fixture(scope='module')
+def full_hd_pan():
+    """1920x1080 crops of a textured image panning by known shifts, with the true movement of each frame."""
+    rng = np.random.default_rng(1)
+    texture = cv2.GaussianBlur(rng.integers(0, 255, (1300, 2400), dtype=np.uint8), (0, 0), 3)
+    texture = cv2.cvtColor(cv2.normalize(texture, None, 0, 255, cv2.NORM_MINMAX), cv2.COLOR_GRAY2BGR)
+    shifts = np.stack([rng.integers(6, 14, 20), rng.integers(-3, 4, 20)], axis=1)
+    offsets = np.cumsum(np.r_[[[0, 0]], shifts], axis=0) + 100
+    frames = [texture[y:y + 1080, x:x + 1920].copy() for x, y in offsets]
+    return frames, np.r_[[[0, 0]], shifts].astype(float)
+
+
+def estimator():
+    return CameraMovementEstimator(mask=np.ones((240, 320), dtype=bool))
+
+
+@pytest.mark.parametrize('segment_length', [None, 12])
+def test_parallel_matches_sequential(panning_frames, segment_length):
+    sequential = estimator().get_camera_movement(panning_frames)
+    parallel_estimator = estimator()
+    parallel = parallel_estimator.get_camera_movement_parallel(panning_frames, num_workers=2,
+                                                               segment_length=segment_length, overlap=10)
+
+    np.testing.assert_allclose(parallel, sequential, atol=0.5)
+    # The segments agree on the movement over each overlap, up to a movement under `minimum_distance`
+    # that one of them only reports after the overlap
+    assert len(parallel_estimator.seam_errors) == int(np.ceil(len(panning_frames) / (segment_length or 20))) - 1
+    assert max(parallel_estimator.seam_errors) <= parallel_estimator.minimum_distance + 0.5
+
+
+@pytest.mark.parametrize('overlap', [1, 3])
+def test_short_overlap_keeps_the_seam_movement(panning_frames, overlap):
+    sequential = estimator().get_camera_movement(panning_frames)
+    parallel = estimator().get_camera_movement_parallel(panning_frames, num_workers=4, overlap=overlap)
+
+    assert len(parallel) == len(sequential)
+    # The first frame of each segment is compared with the frame before it, so no movement is lost at the seams
+    for start in range(10, len(panning_frames), 10):
+        assert parallel[start] == pytest.approx(sequential[start], abs=0.5)
+
+
+def test_parallel_rejects_no_overlap(panning_frames):
+    with pytest.raises(ValueError):
+        estimator().get_camera_movement_parallel(panning_frames, num_workers=2, overlap=0)
+
+
+def test_single_worker_is_sequential(panning_frames):
+    parallel_estimator = estimator()
+    assert parallel_estimator.get_camera_movement_parallel(panning_frames, num_workers=1) == \
+        estimator().get_camera_movement(panning_frames)
+    assert parallel_estimator.seam_errors == []
+
+
+@pytest.mark.parametrize('pyramid_level', [1, 2, None])
+def test_downscaled_movement_matches_full_resolution(full_hd_pan, pyramid_level):
+    frames, true_movement = full_hd_pan
+    full_resolution = np.array(CameraMovementEstimator(pyramid_level=0).get_camera_movement(frames))
+    downscaled_estimator = CameraMovementEstimator(pyramid_level=pyramid_level)
+    downscaled = np.array(downscaled_estimator.get_camera_movement(frames))
+
+    assert downscaled_estimator.level >= 1
+    np.testing.assert_allclose(full_resolution, true_movement, atol=0.5)
+    np.testing.assert_allclose(downscaled, full_resolution, atol=1.0)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from trackers.detection_records import DetectionRecords
+from utils import DetectionCache
+
+
+@pytest.fixture
+def files(tmp_path):
+    video = tmp_path / 'video.mp4'
+    model = tmp_path / 'model.pt'
+    video.write_bytes(b'video')
+    model.write_bytes(b'model')
+    return str(video), str(model), str(tmp_path / 'cache')
+
+
+def records(num_frames):
+    offsets = np.arange(num_frames + 1)
+    return DetectionRecords(xyxy=np.arange(num_frames * 4, dtype=np.float32).reshape(-1, 4),
+                            class_id=np.zeros(num_frames), confidence=np.ones(num_frames), frame_offsets=offsets)
+
+
+def test_missing_chunk_is_a_miss(files):
+    video, model, cache_dir = files
+    cache = DetectionCache(video, model, 0.5, chunk_size=10, cache_dir=cache_dir)
+
+    assert not cache.has_chunk(0, 10)
+    assert cache.load_chunk(0, 10) is None
+    assert cache.cached_ranges() == []
+
+
+def test_saved_chunk_is_a_hit(files):
+    video, model, cache_dir = files
+    cache = DetectionCache(video, model, 0.5, chunk_size=10, cache_dir=cache_dir)
+    cache.save_chunk(0, 10, records(10))
+
+    loaded = DetectionCache(video, model, 0.5, chunk_size=10, cache_dir=cache_dir).load_chunk(0, 10)
+    assert loaded is not None
+    np.testing.assert_array_equal(loaded.xyxy, records(10).xyxy)
+    assert cache.cached_ranges() == [(0, 10)]
+    assert cache.load_chunk(10, 20) is None
+
+
+def test_key_changes_with_conf_model_and_namespace(files):
+    video, model, cache_dir = files
+    cache = DetectionCache(video, model, 0.5, chunk_size=10, cache_dir=cache_dir)
+    cache.save_chunk(0, 10, records(10))
+
+    assert DetectionCache(video, model, 0.6, chunk_size=10, cache_dir=cache_dir).load_chunk(0, 10) is None
+    assert DetectionCache(video, model, 0.5, 'keypoints', chunk_size=10, cache_dir=cache_dir).load_chunk(0, 10) is None
+    with open(model, 'wb') as f:
+        f.write(b'other model')
+    assert DetectionCache(video, model, 0.5, chunk_size=10, cache_dir=cache_dir).load_chunk(0, 10) is None
+
+
+def test_save_rejects_wrong_frame_count(files):
+    video, model, cache_dir = files
+    cache = DetectionCache(video, model, 0.5, chunk_size=10, cache_dir=cache_dir)
+    with pytest.raises(ValueError):
+        cache.save_chunk(0, 10, records(9))
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from trackers.track_table import TrackTable
+from view_transformer.homography import Homography
+from view_transformer.keyframe_scheduler import KeyframeScheduler
+from view_transformer.view_transformer import ViewTransformer
+
+H = np.array([[1.1, 0.05, 4.0], [0.02, 0.95, -2.0], [1e-4, 5e-5, 1.0]])
+POINTS = np.array([[0, 0], [100, 0], [100, 80], [0, 80], [50, 40], [20, 60]], dtype=np.float32)
+TOP_DOWN = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0.5, 0.5], [0.2, 0.7]], dtype=np.float32)
+
+
+def run(homography, frames):
+    """Feeds (keypoints, top-down keypoints) of each frame, returns whether each one hit the cache."""
+    hits = []
+    for keypoints, top_down_keypoints in frames:
+        before = homography.hits
+        homography.find_homography(keypoints, top_down_keypoints)
+        hits.append(homography.hits > before)
+    return hits
+
+
+def test_still_keypoints_reuse_the_homography():
+    homography = Homography(alpha=1.0, reuse_threshold=1.0, max_reuse_frames=100)
+    hits = run(homography, [(POINTS + 0.1 * i, TOP_DOWN) for i in range(5)])
+
+    assert hits == [False, True, True, True, True]
+    assert homography.stats() == {'lookups': 5, 'hits': 4, 'hit_rate': 0.8}
+
+
+def test_moving_keypoints_are_estimated_again():
+    homography = Homography(alpha=1.0, reuse_threshold=1.0)
+    assert run(homography, [(POINTS, TOP_DOWN), (POINTS + 2, TOP_DOWN)]) == [False, False]
+
+
+def test_a_new_visible_keypoint_set_is_a_miss():
+    homography = Homography(alpha=1.0, reuse_threshold=1.0)
+    hits = run(homography, [(POINTS, TOP_DOWN), (POINTS[:5], TOP_DOWN[:5]), (POINTS[1:], TOP_DOWN[1:]),
+                            (POINTS[1:], TOP_DOWN[1:])])
+
+    assert hits == [False, False, False, True]
+
+
+@pytest.mark.parametrize('max_reuse_frames', [1, 2, 3, 5])
+def test_homography_is_estimated_again_after_max_reuse_frames(max_reuse_frames):
+    homography = Homography(alpha=1.0, reuse_threshold=1.0, max_reuse_frames=max_reuse_frames)
+    hits = run(homography, [(POINTS, TOP_DOWN)] * 12)
+
+    # Estimated on every `max_reuse_frames`-th frame and reused on the frames in between
+    assert [i for i, hit in enumerate(hits) if not hit] == list(range(0, 12, max_reuse_frames))
+
+
+def test_disabled_cache_never_reuses():
+    homography = Homography(alpha=1.0, reuse_threshold=0)
+    assert not any(run(homography, [(POINTS, TOP_DOWN)] * 4))
+    assert homography.hit_rate == 0
+
+
+def per_point(positions, homographies, homography_index):
+    homography = Homography()
+    return np.array([homography.perspective_transform(position, homographies[index])
+                     for position, index in zip(positions, homography_index)]).reshape(-1, 2)
+
+
+def keyframe_homographies(num_frames, first_keyframe):
+    """Homographies of a panning camera, NaN before the first keyframe, as `keyframe_homographies` returns them."""
+    camera_movement = np.tile([[3.0, -1.0]], (num_frames, 1))
+    return KeyframeScheduler().propagate({first_keyframe: H, first_keyframe + 4: H @ np.diag([1.0, 1.02, 1.0])},
+                                         camera_movement)
+
+
+def test_batch_transform_matches_per_point_transform():
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(0, 1000, (50, 2))
+    homography = Homography()
+
+    single = homography.perspective_transform_batch(positions, H)
+    np.testing.assert_allclose(single, per_point(positions, [H], np.zeros(len(positions), dtype=int)))
+
+    homographies = keyframe_homographies(10, first_keyframe=3)
+    homography_index = rng.integers(0, 10, len(positions))
+    stacked = homography.perspective_transform_batch(positions, homographies, homography_index)
+
+    has_homography = homography_index >= 3
+    np.testing.assert_allclose(stacked[has_homography],
+                               per_point(positions[has_homography], homographies, homography_index[has_homography]))
+    assert np.isnan(stacked[~has_homography]).all()
+
+
+def test_stacked_homographies_need_an_index():
+    with pytest.raises(ValueError):
+        Homography().perspective_transform_batch(np.zeros((2, 2)), np.stack([H, H]))
+
+
+def test_transform_table_projects_every_row():
+    rng = np.random.default_rng(1)
+    tracks = {'players': [{track_id: {'bbox': list(rng.uniform(0, 500, 2)) + list(rng.uniform(500, 1000, 2))}
+                           for track_id in range(1, 4)} for _ in range(6)],
+              'referees': [{7: {'bbox': [10.0, 20.0, 30.0, 40.0]}}] * 6,
+              'ball': [{}] * 6}
+    table = TrackTable.from_tracks(tracks)
+    homographies = keyframe_homographies(8, first_keyframe=3)
+    view_transformer = ViewTransformer(TOP_DOWN)
+
+    # The table covers frames 2 to 7 of the homographies, so its first frame has no homography
+    projection = view_transformer.transform_table(table, homographies[2:], start_frame=0)
+
+    expected = per_point(table.feet(), homographies[2:], table.frame)
+    has_homography = table.frame >= 1
+    np.testing.assert_allclose(projection[has_homography], expected[has_homography], rtol=1e-5)
+    assert np.isnan(projection[~has_homography]).all()
+    np.testing.assert_array_equal(table.projection, projection)
+    np.testing.assert_allclose(table.position, table.feet(), rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        view_transformer.transform_table(table, homographies[:3])
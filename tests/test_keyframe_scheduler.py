@@ -0,0 +1,79 @@
+import numpy as np
+
+from trackers.keypoint_tracker import KeypointTracker
+from trackers.synthetic_detector import SyntheticBackend, SyntheticMatch
+from view_transformer.homography import Homography
+from view_transformer.keyframe_scheduler import KeyframeScheduler, translation
+
+
+def exact_homographies(H0, camera_movement):
+    """Homography of each frame when the camera only translates by `camera_movement` from frame 0."""
+    cumulative = np.cumsum(camera_movement, axis=0)
+    return np.stack([H0 @ translation(offset - cumulative[0]) for offset in cumulative])
+
+
+def test_propagate_recovers_exact_homographies():
+    rng = np.random.default_rng(0)
+    camera_movement = rng.normal(0, 3, (40, 2))
+    H0 = np.array([[1.2, 0.1, 5.0], [0.05, 0.9, -3.0], [1e-4, 2e-4, 1.0]])
+    expected = exact_homographies(H0, camera_movement)
+
+    keyframes = {3: expected[3], 20: expected[20], 31: expected[31]}
+    homographies = KeyframeScheduler().propagate(keyframes, camera_movement)
+
+    assert np.isnan(homographies[:3]).all()
+    np.testing.assert_allclose(homographies[3:], expected[3:], rtol=1e-9, atol=1e-9)
+
+
+def test_plan_follows_interval_and_displacement():
+    scheduler = KeyframeScheduler(interval=10, max_displacement=30)
+    still = scheduler.plan(np.zeros((25, 2)))
+    assert np.flatnonzero(still).tolist() == [0, 10, 20]
+
+    panning = scheduler.plan(np.tile([[8.0, 0.0]], (10, 1)))
+    assert np.flatnonzero(panning).tolist() == [0, 4, 8]
+    assert scheduler.keyframe_rate == 0.3
+
+
+def test_unusable_homography_makes_the_next_frame_a_keyframe():
+    scheduler = KeyframeScheduler(interval=10)
+    assert scheduler.update([0, 0])
+    scheduler.set_keyframe_homography(None)
+    assert scheduler.update([0, 0])
+
+
+def test_estimate_is_not_smoothed_or_cached():
+    H = np.array([[1.1, 0.0, 4.0], [0.0, 0.95, -2.0], [0.0, 0.0, 1.0]])
+    points = np.array([[0, 0], [100, 0], [100, 80], [0, 80], [50, 40]], dtype=np.float32)
+    projected = points @ H[:2, :2].T + H[:2, 2]
+
+    homography = Homography(alpha=0.5)
+    homography.find_homography(points + 20, projected)
+    estimated = homography.estimate(points, projected)
+
+    np.testing.assert_allclose(estimated / estimated[2, 2], H, atol=1e-4)
+    assert homography.estimate(points[:3], projected[:3]) is None
+
+
+class BlindMatch(SyntheticMatch):
+    """Synthetic match whose pitch is not detected in some frames."""
+
+    def __init__(self, blind_frames, **kwargs):
+        super().__init__(**kwargs)
+        self.blind_frames = set(blind_frames)
+
+    def keypoints(self, frame_num, conf=0.0):
+        return super().keypoints(frame_num, 1.0 if frame_num in self.blind_frames else conf)
+
+
+def test_frames_after_an_unusable_keyframe_are_detected():
+    match = BlindMatch(blind_frames=[10, 11], frame_size=(320, 180), seed=1)
+    tracker = KeypointTracker('unused.pt', backend=SyntheticBackend(match, task='pose'))
+    frames = list(match.frames(30))
+    keyframes = np.zeros(30, dtype=bool)
+    keyframes[[0, 10, 20]] = True
+
+    detections = tracker.get_detections(frames, batch_size=4, keyframes=keyframes)
+    rows = [detections.frame_slice(frame_num) for frame_num in range(30)]
+    detected = [frame_num for frame_num, frame_rows in enumerate(rows) if frame_rows.stop > frame_rows.start]
+    assert detected == [0, 12, 20]
@@ -0,0 +1,54 @@
+import os
+import pickle
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+from trackers.detection_records import DetectionRecords
+from trackers.keypoint_tracker import KeypointTracker
+from trackers.synthetic_detector import SyntheticBackend, SyntheticMatch
+
+
+def legacy_result(num_keypoints=6):
+    """Ultralytics pose result of one frame, as the keypoint stubs held before DetectionRecords."""
+    keypoints = torch.rand(1, num_keypoints, 3)
+    keypoints[..., 2] = 0.9
+    return Results(np.zeros((180, 320, 3), dtype=np.uint8), path='', names={0: 'pitch'},
+                   boxes=torch.tensor([[10.0, 10.0, 100.0, 100.0, 0.9, 0.0]]), keypoints=keypoints)
+
+
+def write_stub(stub_name, detections):
+    os.makedirs('./stub/keypoint_detections', exist_ok=True)
+    with open(f'./stub/keypoint_detections/{stub_name}.pkl', 'wb') as f:
+        pickle.dump(detections, f)
+
+
+def tracker(match):
+    return KeypointTracker('unused.pt', backend=SyntheticBackend(match, task='pose'))
+
+
+def test_legacy_stub_is_converted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_stub('legacy', [legacy_result(), legacy_result()])
+    match = SyntheticMatch(frame_size=(320, 180))
+
+    detections = tracker(match).get_detections(list(match.frames(3)), batch_size=4, read_from_stub=True,
+                                               stub_name='legacy')
+
+    assert isinstance(detections, DetectionRecords)
+    assert len(detections) == 2
+    keypoints, _ = tracker(match).get_tracks(detections)
+    assert keypoints[0].xy.shape == (1, 6, 2)
+
+
+def test_unknown_stub_detects_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_stub('unknown', [{'not': 'a result'}])
+    match = SyntheticMatch(frame_size=(320, 180))
+
+    detections = tracker(match).get_detections(list(match.frames(3)), batch_size=4, read_from_stub=True,
+                                               stub_name='unknown')
+
+    assert isinstance(detections, DetectionRecords)
+    assert len(detections) == 3
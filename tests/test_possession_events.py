@@ -0,0 +1,51 @@
+from trackers.possession_events import PossessionEventDetector, PossessionEventLog
+
+
+def run(detector, assignments):
+    """Feeds (player, team) assignments frame by frame and returns the events of the log."""
+    for frame_num, (player_id, team) in enumerate(assignments):
+        detector.update(frame_num, player_id, team)
+    detector.flush()
+    return detector.log.events
+
+
+def test_flicker_does_not_change_possession():
+    # Player 7 holds the ball, with two frames assigned to player 8 and one loose frame in between
+    assignments = [(7, 1)] * 10 + [(8, 2)] * 2 + [(-1, 0)] + [(7, 1)] * 10
+    events = run(PossessionEventDetector(min_frames=5, release_frames=25), assignments)
+
+    assert [event['type'] for event in events] == ['possession_start', 'possession_end']
+    assert events[0] == {'type': 'possession_start', 'frame': 0, 'player': 7, 'team': 1}
+    assert (events[1]['player'], events[1]['start_frame'], events[1]['end_frame']) == (7, 0, 22)
+
+
+def test_passes_and_team_changes():
+    assignments = [(7, 1)] * 10 + [(9, 1)] * 10 + [(11, 2)] * 10
+    events = run(PossessionEventDetector(min_frames=5, release_frames=25), assignments)
+
+    assert [event['type'] for event in events] == [
+        'possession_start', 'possession_end', 'pass', 'possession_start',
+        'possession_end', 'team_change', 'possession_start', 'possession_end']
+    assert events[2] == {'type': 'pass', 'frame': 10, 'from_player': 7, 'to_player': 9, 'team': 1}
+    assert events[5] == {'type': 'team_change', 'frame': 20, 'from_team': 1, 'to_team': 2}
+    assert [(e['player'], e['start_frame'], e['end_frame']) for e in events if e['type'] == 'possession_end'] == [
+        (7, 0, 9), (9, 10, 19), (11, 20, 29)]
+
+
+def test_owner_loses_the_ball_after_release_frames():
+    detector = PossessionEventDetector(min_frames=2, release_frames=5)
+    events = run(detector, [(7, 1)] * 4 + [(None, 0)] * 10)
+
+    assert [event['type'] for event in events] == ['possession_start', 'possession_end']
+    assert events[1]['frame'] == 3
+    assert detector.owner is None
+
+
+def test_log_round_trips_through_json_lines(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    detector = PossessionEventDetector(min_frames=2, log=PossessionEventLog(path))
+    run(detector, [(7, 1)] * 4 + [(11, 2)] * 4)
+
+    log = PossessionEventLog.load(path)
+    assert log.events == detector.log.events
+    assert log.possession_frames().tolist() == [4, 4]
@@ -0,0 +1,41 @@
+import numpy as np
+
+from trackers.possession_stats import PossessionStats
+
+
+def naive_shares(team_ball_control, start_frame, end_frame, include_none=False):
+    window = list(team_ball_control[start_frame:end_frame])
+    counts = np.array([sum(1 for team in window if team == t) for t in (1, 2)])
+    total = len(window) if include_none else counts.sum()
+    return counts / total if total > 0 else np.zeros(2)
+
+
+def test_shares_match_a_naive_scan():
+    rng = np.random.default_rng(0)
+    team_ball_control = rng.choice([0, 1, 2], size=300, p=[0.2, 0.5, 0.3])
+    stats = PossessionStats.from_array(team_ball_control)
+
+    for start_frame, end_frame in [(0, 300), (0, 1), (17, 18), (50, 120), (299, 300)]:
+        for include_none in (False, True):
+            np.testing.assert_allclose(stats.shares(start_frame, end_frame, include_none),
+                                       naive_shares(team_ball_control, start_frame, end_frame, include_none))
+    for frame_num in range(300):
+        np.testing.assert_allclose(stats.share_until(frame_num), naive_shares(team_ball_control, 0, frame_num + 1))
+
+
+def test_update_matches_from_array_and_grows():
+    team_ball_control = [1, 1, None, 2, 0, 3, 2, 2, 1] * 50
+    stats = PossessionStats(capacity=4)
+    for team in team_ball_control:
+        stats.update(team)
+
+    built = PossessionStats.from_array(team_ball_control)
+    assert len(stats) == len(built) == len(team_ball_control)
+    np.testing.assert_array_equal(stats.prefix[:len(stats) + 1], built.prefix[:len(built) + 1])
+    # None and unknown teams count as no possession
+    assert stats.counts(0, 9).tolist() == [3, 3, 3]
+
+
+def test_empty_window_has_zero_shares():
+    assert PossessionStats.from_array([0, 0, 0]).shares().tolist() == [0, 0]
+    assert PossessionStats.from_array([1, 2, 1]).shares(2, 1).tolist() == [0, 0]
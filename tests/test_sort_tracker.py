@@ -0,0 +1,64 @@
+import numpy as np
+
+from trackers.sort_tracker import SortTracker
+
+
+def moving_boxes(frame_num):
+    """Three boxes moving right at different speeds, far enough apart never to overlap."""
+    x = np.array([10.0, 10.0, 10.0]) + frame_num * np.array([2.0, 4.0, 6.0])
+    y = np.array([10.0, 200.0, 400.0])
+    return np.stack([x, y, x + 40, y + 80], axis=1)
+
+
+def test_ids_are_stable_on_a_synthetic_sequence():
+    tracker = SortTracker(max_age=5, min_hits=3)
+    ids = []
+    for frame_num in range(30):
+        det_idx, track_id, _ = tracker.update(moving_boxes(frame_num))
+        assert list(det_idx) == [0, 1, 2]
+        ids.append(track_id.tolist())
+
+    assert all(frame_ids == [1, 2, 3] for frame_ids in ids)
+
+
+def test_ids_survive_short_misses_and_expire_after_max_age():
+    tracker = SortTracker(max_age=3, min_hits=1)
+    for frame_num in range(10):
+        tracker.update(moving_boxes(frame_num))
+
+    # The second box is missed for two frames and keeps its id when it comes back
+    for frame_num in range(10, 12):
+        _, track_id, _ = tracker.update(moving_boxes(frame_num)[[0, 2]])
+        assert track_id.tolist() == [1, 3]
+    _, track_id, _ = tracker.update(moving_boxes(12))
+    assert track_id.tolist() == [1, 2, 3]
+
+    # Missed for longer than max_age, it gets a new id
+    for frame_num in range(13, 18):
+        tracker.update(moving_boxes(frame_num)[[0, 2]])
+    _, track_id, _ = tracker.update(moving_boxes(18))
+    assert track_id.tolist() == [1, 4, 3]
+
+
+def test_detections_only_match_tracks_of_their_class():
+    tracker = SortTracker(min_hits=1)
+    boxes = moving_boxes(0)[:1]
+    _, first_id, _ = tracker.update(boxes, np.array([2]))
+    _, second_id, class_id = tracker.update(boxes, np.array([3]))
+
+    assert second_id[0] != first_id[0]
+    assert class_id.tolist() == [3]
+
+
+def test_state_dict_round_trip_continues_the_same_tracks():
+    tracker = SortTracker(min_hits=1)
+    for frame_num in range(5):
+        tracker.update(moving_boxes(frame_num))
+
+    restored = SortTracker(min_hits=1)
+    restored.load_state_dict(tracker.state_dict())
+    for frame_num in range(5, 10):
+        expected = tracker.update(moving_boxes(frame_num))
+        actual = restored.update(moving_boxes(frame_num))
+        for a, b in zip(actual, expected):
+            np.testing.assert_array_equal(a, b)
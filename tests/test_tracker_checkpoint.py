@@ -0,0 +1,79 @@
+import pytest
+from supervision.tracker.byte_tracker.basetrack import BaseTrack
+from supervision.tracker.byte_tracker.core import STrack
+
+from trackers.synthetic_detector import SyntheticBackend, SyntheticMatch
+from trackers.tracker_new import Tracker
+from trackers.tracker_state import TrackerCheckpoint
+from utils import DetectionCache
+
+NUM_FRAMES = 40
+
+
+class CrashingBackend(SyntheticBackend):
+    """Synthetic backend that fails once it has detected `crash_after` frames."""
+
+    def __init__(self, match, crash_after):
+        super().__init__(match)
+        self.crash_after = crash_after
+        self.detected = 0
+
+    def predict(self, frames, conf):
+        self.detected += len(frames)
+        if self.detected > self.crash_after:
+            raise RuntimeError("Simulated crash")
+        return super().predict(frames, conf)
+
+
+def reset_track_ids():
+    # ByteTrack numbers its tracks with class-level counters, shared by every tracker
+    BaseTrack._count = 0
+    STrack._external_count = 0
+
+
+@pytest.fixture
+def match():
+    return SyntheticMatch(frame_size=(320, 180), seed=3)
+
+
+@pytest.fixture
+def cache_files(tmp_path):
+    video = tmp_path / 'video.mp4'
+    model = tmp_path / 'model.pt'
+    video.write_bytes(b'video')
+    model.write_bytes(b'model')
+    return str(video), str(model), str(tmp_path / 'cache')
+
+
+def test_resumed_run_matches_full_run(match, cache_files, tmp_path):
+    video, model, cache_dir = cache_files
+    frames = list(match.frames(NUM_FRAMES))
+
+    reset_track_ids()
+    expected = Tracker(model, backend=SyntheticBackend(match)).get_object_tracks(frames)
+
+    reset_track_ids()
+    checkpoint = TrackerCheckpoint(str(tmp_path / 'checkpoint'), every=7)
+    crashing = Tracker(model, backend=CrashingBackend(match, crash_after=28))
+    with pytest.raises(RuntimeError):
+        crashing.get_object_tracks(frames, cache=DetectionCache(video, model, 0.1, chunk_size=10, cache_dir=cache_dir),
+                                   checkpoint=checkpoint)
+    assert checkpoint.load()['frames_done'] == 14
+
+    # The resumed run starts from the checkpoint at frame 14, inside the cached chunk [10, 20)
+    resumed = Tracker(model, backend=SyntheticBackend(match)).get_object_tracks(
+        frames, cache=DetectionCache(video, model, 0.1, chunk_size=10, cache_dir=cache_dir),
+        checkpoint=TrackerCheckpoint(str(tmp_path / 'checkpoint'), every=7))
+
+    assert resumed == expected
+
+
+def test_checkpoint_of_another_video_is_ignored(tmp_path):
+    first, second = tmp_path / 'first.mp4', tmp_path / 'second.mp4'
+    first.write_bytes(b'first')
+    second.write_bytes(b'second')
+    checkpoint = TrackerCheckpoint(str(tmp_path / 'checkpoint'), every=5)
+    checkpoint.save(5, {'players': [{}] * 5, 'referees': [{}] * 5, 'ball': [{}] * 5}, {}, str(first))
+
+    assert checkpoint.load(str(first))['frames_done'] == 5
+    assert checkpoint.load(str(second)) is None
@@ -1,2 +1,15 @@
 from .tracker_new import Tracker
-from .keypoint_tracker import KeypointTracker
\ No newline at end of file
+from .keypoint_tracker import KeypointTracker
+from .detection_records import DetectionRecords
+from .inference_backend import InferenceBackend, create_backend, compare_backends
+from .batch_autotuner import BatchSizeAutotuner
+from .joint_detector import JointDetectionScheduler
+from .synthetic_detector import SyntheticMatch, SyntheticBackend
+
+from .track_table import TrackTable
+from .ball_interpolator import BallInterpolator, StreamingBallInterpolator
+from .sort_tracker import SortTracker
+from .track_index import TrackIndex
+from .tracker_state import TrackerCheckpoint
+from .possession_stats import PossessionStats
+from .possession_events import PossessionEventDetector, PossessionEventLog
\ No newline at end of file
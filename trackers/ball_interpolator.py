@@ -0,0 +1,300 @@
+import numpy as np
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+class ConstantVelocityKalman:
+    """
+    Kalman filter on the ball center with a constant velocity model.
+
+    The state is `[cx, cy, vx, vy]` in pixels and pixels per frame. Frames without a
+    measurement only run the prediction step, so the filter bridges short gaps.
+    """
+
+    def __init__(self, process_noise: float = 1.0, measurement_noise: float = 4.0) -> None:
+        """
+        Initializes the filter.
+
+        Args:
+            process_noise (float): Acceleration noise, in pixels per frame squared.
+            measurement_noise (float): Standard deviation of the detected center, in pixels.
+        """
+        self.F = np.array([[1, 0, 1, 0], [0, 1, 0, 1], [0, 0, 1, 0], [0, 0, 0, 1]], dtype=np.float64)
+        self.H = np.eye(2, 4)
+        G = np.array([[0.5, 0], [0, 0.5], [1, 0], [0, 1]])
+        self.Q = G @ G.T * process_noise ** 2
+        self.R = np.eye(2) * measurement_noise ** 2
+        self.x: Optional[np.ndarray] = None
+        self.P: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        """Forgets the state, e.g. after a gap too long to bridge."""
+        self.x, self.P = None, None
+
+    def step(self, measurement: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray],
+                                                               Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Runs one frame of the filter.
+
+        Args:
+            measurement (Optional[np.ndarray]): Detected center `[cx, cy]`, or None if the ball was not detected.
+
+        Returns:
+            Tuple: Predicted state and covariance, then filtered state and covariance. All None until
+                the first measurement.
+        """
+        if self.x is None:
+            if measurement is None:
+                return None, None, None, None
+            self.x = np.array([measurement[0], measurement[1], 0.0, 0.0])
+            self.P = np.diag([self.R[0, 0], self.R[1, 1], 100.0, 100.0])
+            return self.x.copy(), self.P.copy(), self.x.copy(), self.P.copy()
+
+        x_pred = self.F @ self.x
+        P_pred = self.F @ self.P @ self.F.T + self.Q
+        if measurement is None:
+            self.x, self.P = x_pred, P_pred
+        else:
+            S = self.H @ P_pred @ self.H.T + self.R
+            K = P_pred @ self.H.T @ np.linalg.inv(S)
+            self.x = x_pred + K @ (measurement - self.H @ x_pred)
+            self.P = (np.eye(4) - K @ self.H) @ P_pred
+        return x_pred, P_pred, self.x.copy(), self.P.copy()
+
+
+class BallInterpolator:
+    """
+    Fills the frames where the ball was not detected, over a contiguous `(frames, 4)` array.
+
+    Gaps are filled linearly between the detections around them, and frames before the first
+    or after the last detection hold the nearest detection, like the pandas `interpolate()` +
+    `bfill()` it replaces. Gaps longer than `max_gap` frames, e.g. the ball off camera, are
+    left missing. With `smoothing='kalman'` the detected centers are smoothed by a constant
+    velocity Kalman filter and RTS smoother, and gaps follow the smoothed trajectory.
+    """
+
+    def __init__(self, max_gap: Optional[int] = None, smoothing: Optional[str] = None,
+                 process_noise: float = 1.0, measurement_noise: float = 4.0) -> None:
+        """
+        Initializes the interpolator.
+
+        Args:
+            max_gap (Optional[int]): Longest run of missing frames that is filled. None fills gaps of any length.
+            smoothing (Optional[str]): None for linear interpolation, 'kalman' for constant velocity smoothing.
+            process_noise (float): Kalman acceleration noise, in pixels per frame squared.
+            measurement_noise (float): Kalman standard deviation of the detected center, in pixels.
+        """
+        if smoothing not in (None, 'kalman'):
+            raise ValueError(f"{smoothing} is not a supported smoothing. Choose None or 'kalman'.")
+        if max_gap is not None and max_gap < 0:
+            raise ValueError("max_gap must not be negative.")
+        self.max_gap = max_gap
+        self.smoothing = smoothing
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+    def interpolate(self, bboxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fills the missing boxes in place.
+
+        Args:
+            bboxes (np.ndarray): Float array of shape (frames, 4) in xyxy format, NaN where the ball is missing.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The same array, and a boolean array of shape (frames,) marking
+                the frames that were filled. Frames in gaps longer than `max_gap` stay NaN.
+        """
+        num_frames = len(bboxes)
+        detected = ~np.isnan(bboxes).any(axis=1)
+        detected_frames = np.flatnonzero(detected)
+        if not len(detected_frames):
+            return bboxes, np.zeros(num_frames, dtype=bool)
+
+        frames = np.arange(num_frames)
+        if self.smoothing == 'kalman':
+            self._smooth(bboxes, detected)
+
+        missing = np.flatnonzero(np.isnan(bboxes).any(axis=1))
+        for coordinate in range(4):
+            bboxes[missing, coordinate] = np.interp(missing, detected_frames, bboxes[detected_frames, coordinate])
+
+        fillable = ~detected
+        if self.max_gap is not None:
+            fillable &= self._gap_lengths(detected, frames) <= self.max_gap
+            bboxes[~detected & ~fillable] = np.nan
+        return bboxes, fillable
+
+    def interpolate_tracks(self, ball_positions: List[Dict[int, Dict]]) -> List[Dict[int, Dict]]:
+        """
+        Fills the missing ball positions of the dict tracks.
+
+        Args:
+            ball_positions (List[Dict[int, Dict]]): `tracks['ball']`, one dict per frame.
+
+        Returns:
+            List[Dict[int, Dict]]: One `{1: {'bbox': ..., 'interpolated': ...}}` per frame, or an empty
+                dict where the gap was too long to fill.
+        """
+        bboxes = np.full((len(ball_positions), 4), np.nan)
+        for frame_num, ball in enumerate(ball_positions):
+            bbox = ball.get(1, {}).get('bbox', [])
+            if len(bbox) == 4:
+                bboxes[frame_num] = bbox
+
+        if not np.isfinite(bboxes).any():
+            # Nothing to interpolate from: keep the legacy NaN boxes
+            return [{1: {'bbox': bbox, 'interpolated': False}} for bbox in bboxes.tolist()]
+
+        bboxes, interpolated = self.interpolate(bboxes)
+        return [
+            {1: {'bbox': bbox, 'interpolated': bool(filled)}} if not np.isnan(bbox[0]) else {}
+            for bbox, filled in zip(bboxes.tolist(), interpolated)
+        ]
+
+    def _gap_lengths(self, detected: np.ndarray, frames: np.ndarray) -> np.ndarray:
+        """Returns, for every frame, the length of the run of missing frames it belongs to."""
+        num_frames = len(detected)
+        previous = np.maximum.accumulate(np.where(detected, frames, -1))
+        following = np.minimum.accumulate(np.where(detected, frames, num_frames)[::-1])[::-1]
+        return following - previous - 1
+
+    def _smooth(self, bboxes: np.ndarray, detected: np.ndarray) -> None:
+        """Replaces the box centers between the first and last detection with the Kalman-RTS smoothed trajectory."""
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) / 2
+        sizes = bboxes[:, 2:] - bboxes[:, :2]
+        gap_lengths = self._gap_lengths(detected, np.arange(len(bboxes)))
+        first, last = np.flatnonzero(detected)[[0, -1]]
+
+        kalman = ConstantVelocityKalman(self.process_noise, self.measurement_noise)
+        predicted, filtered = {}, {}
+        for frame_num in range(first, last + 1):
+            if not detected[frame_num] and self.max_gap is not None and gap_lengths[frame_num] > self.max_gap:
+                kalman.reset()  # The gap will stay missing, so the trajectory restarts after it
+                continue
+            x_pred, P_pred, x, P = kalman.step(centers[frame_num] if detected[frame_num] else None)
+            predicted[frame_num], filtered[frame_num] = (x_pred, P_pred), (x, P)
+
+        # Rauch-Tung-Striebel backward pass inside each bridged segment
+        F = kalman.F
+        smoothed = {last: filtered[last][0]}
+        for frame_num in range(last - 1, first - 1, -1):
+            if frame_num not in filtered:
+                continue
+            x, P = filtered[frame_num]
+            if frame_num + 1 not in smoothed or frame_num + 1 not in predicted:
+                smoothed[frame_num] = x
+                continue
+            x_pred, P_pred = predicted[frame_num + 1]
+            C = P @ F.T @ np.linalg.inv(P_pred)
+            smoothed[frame_num] = x + C @ (smoothed[frame_num + 1] - x_pred)
+
+        # Detected frames get the smoothed center, bridged gaps follow the smoothed trajectory
+        detected_frames = np.flatnonzero(detected)
+        smoothed_frames = np.array(sorted(smoothed))
+        sizes = np.stack([np.interp(smoothed_frames, detected_frames, sizes[detected_frames, i]) for i in range(2)], axis=1)
+        smoothed_centers = np.array([smoothed[frame_num][:2] for frame_num in smoothed_frames])
+        bboxes[smoothed_frames] = np.hstack([smoothed_centers - sizes / 2, smoothed_centers + sizes / 2])
+
+
+class StreamingBallInterpolator:
+    """
+    Online version of `BallInterpolator` for frame-by-frame pipelines.
+
+    Frames are pushed as they are detected and come out in order, at most `look_ahead` frames
+    later. A gap is filled only if the next detection arrives within the look-ahead window
+    (and within `max_gap`), otherwise its frames come out missing. With `smoothing='kalman'`
+    the detections are filtered forward only, since the future is not known.
+    """
+
+    def __init__(self, look_ahead: int = 25, max_gap: Optional[int] = None, smoothing: Optional[str] = None,
+                 process_noise: float = 1.0, measurement_noise: float = 4.0) -> None:
+        """
+        Initializes the interpolator.
+
+        Args:
+            look_ahead (int): Maximum number of frames held back waiting for the next detection.
+            max_gap (Optional[int]): Longest run of missing frames that is filled. None is bounded by `look_ahead`.
+            smoothing (Optional[str]): None for linear interpolation, 'kalman' for forward Kalman filtering.
+            process_noise (float): Kalman acceleration noise, in pixels per frame squared.
+            measurement_noise (float): Kalman standard deviation of the detected center, in pixels.
+        """
+        if look_ahead < 0:
+            raise ValueError("look_ahead must not be negative.")
+        if smoothing not in (None, 'kalman'):
+            raise ValueError(f"{smoothing} is not a supported smoothing. Choose None or 'kalman'.")
+        self.look_ahead = look_ahead
+        self.max_gap = look_ahead if max_gap is None else min(max_gap, look_ahead)
+        self.kalman = ConstantVelocityKalman(process_noise, measurement_noise) if smoothing == 'kalman' else None
+
+        self.pending: Deque[int] = deque()  # Frames without detection waiting for the next one
+        self.last_bbox: Optional[np.ndarray] = None
+        self.last_frame: Optional[int] = None
+        self.bridging = True  # False once the current gap is known to be too long
+
+    def push(self, frame_num: int, bbox: Optional[Sequence[float]]) -> List[Tuple[int, Optional[np.ndarray], bool]]:
+        """
+        Adds the detection of the next frame.
+
+        Args:
+            frame_num (int): Index of the frame, consecutive across calls.
+            bbox (Optional[Sequence[float]]): Detected ball box in xyxy format, or None if not detected.
+
+        Returns:
+            List[Tuple[int, Optional[np.ndarray], bool]]: Frames ready to be emitted, in order, as
+                `(frame_num, bbox or None, interpolated)`.
+        """
+        if bbox is None or np.isnan(np.asarray(bbox, dtype=np.float64)).any():
+            if self.kalman is not None and self.kalman.x is not None:
+                self.kalman.step(None)
+            if not self.bridging:
+                return [(frame_num, None, False)]
+            self.pending.append(frame_num)
+            if len(self.pending) > self.max_gap:
+                # The gap cannot be filled anymore: release it without waiting
+                self.bridging = False
+                if self.kalman is not None:
+                    self.kalman.reset()
+                return self._release_pending()
+            return []
+
+        bbox = np.asarray(bbox, dtype=np.float64)
+        if self.kalman is not None:
+            _, _, state, _ = self.kalman.step((bbox[:2] + bbox[2:]) / 2)
+            size = bbox[2:] - bbox[:2]
+            bbox = np.concatenate([state[:2] - size / 2, state[:2] + size / 2])
+
+        ready = []
+        if self.pending and self.bridging:
+            if self.last_bbox is None:
+                # Leading frames hold the first detection, like bfill
+                ready = [(pending_frame, bbox.copy(), True) for pending_frame in self.pending]
+            else:
+                span = frame_num - self.last_frame
+                ready = [
+                    (pending_frame, self.last_bbox + (bbox - self.last_bbox) * (pending_frame - self.last_frame) / span, True)
+                    for pending_frame in self.pending
+                ]
+            self.pending.clear()
+        ready.append((frame_num, bbox, False))
+
+        self.last_bbox, self.last_frame = bbox, frame_num
+        self.bridging = True
+        return ready
+
+    def flush(self) -> List[Tuple[int, Optional[np.ndarray], bool]]:
+        """
+        Releases the frames still held at the end of the video. Trailing frames hold the last
+        detection, like the offline interpolation.
+
+        Returns:
+            List[Tuple[int, Optional[np.ndarray], bool]]: Remaining frames, in order.
+        """
+        if self.last_bbox is None or not self.bridging:
+            return self._release_pending()
+        ready = [(pending_frame, self.last_bbox.copy(), True) for pending_frame in self.pending]
+        self.pending.clear()
+        return ready
+
+    def _release_pending(self) -> List[Tuple[int, Optional[np.ndarray], bool]]:
+        ready = [(pending_frame, None, False) for pending_frame in self.pending]
+        self.pending.clear()
+        return ready
@@ -1,32 +1,54 @@
 import torch
 import numpy as np
 from abc import ABC, abstractmethod
-from ultralytics import YOLO
-from ultralytics.engine.results import Results
-from typing import List
+from typing import List, Optional, Union
 from numpy import ndarray
-from supervision import Detections
 from utils import get_settings
+from .detection_records import DetectionRecords
+from .inference_backend import InferenceBackend, create_backend
+from .batch_autotuner import autotune_batch_size
 
 class BaseTracker(ABC):
 
     def __init__(self,
                  model_path: str,
-                 conf: float = 0.3) -> None:
+                 conf: float = 0.3,
+                 backend: Union[str, InferenceBackend, None] = None) -> None:
         """
         Load the model from the given path and set the confidence threshold.
 
         Args:
             model_path (str): Path to the model.
             conf (float): Confidence threshold for detections.
+            backend (Union[str, InferenceBackend, None]): Inference backend ('torch', 'onnx', 'openvino'
+                or a backend instance such as `SyntheticBackend`).
+                None uses the INFERENCE_BACKEND setting.
         """
-        device = torch.device(get_settings().DEVICE)
-        self.model = YOLO(model_path).to(device)
+        settings = get_settings()
+        device = torch.device(settings.DEVICE)
+        self.model_path = model_path  # Kept to key cached detections by the weights content
+        self.device = device
+        self.model = create_backend(model_path, backend or settings.INFERENCE_BACKEND, device)
         self.conf = conf  # Set confidence threshold
+        self.batch_size: Optional[int] = None  # Tuned on the first frames when not given
+
+    def get_batch_size(self, sample_frame: ndarray) -> int:
+        """
+        Returns the inference batch size, tuning it for this machine on first use.
+
+        Args:
+            sample_frame (np.ndarray): Frame with the input resolution.
+
+        Returns:
+            int: The batch size.
+        """
+        if self.batch_size is None:
+            self.batch_size = autotune_batch_size(self.model, self.model_path, sample_frame, self.conf, self.device)
+        return self.batch_size
         
 
     @abstractmethod
-    def get_detections(self,frames: List[ndarray], batch_size: int=16) -> List[Results]:
+    def get_detections(self,frames: List[ndarray], batch_size: Optional[int]=None) -> DetectionRecords:
         """
         Abstract method for YOLO detection.
 
@@ -34,17 +56,17 @@ class BaseTracker(ABC):
             frames (List[np.ndarray]): List of frames for detection.
 
         Returns:
-            List[Results]: List of YOLO detection result objects.
+            DetectionRecords: Compact detections for all frames.
         """
         pass
         
     @abstractmethod
-    def get_tracks(self, detections: List[Detections]) -> dict:
+    def get_tracks(self, detections: DetectionRecords) -> dict:
         """
         Abstract method for tracking detections.
 
         Args:
-            detection (Results): YOLO detection results for a single frame.
+            detections (DetectionRecords): Compact detections for all frames.
 
         Returns:
             dict: Tracking data.
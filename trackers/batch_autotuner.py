@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import platform
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+from utils import file_hash, get_settings
+from .inference_backend import InferenceBackend
+
+class BatchSizeAutotuner:
+    """
+    Picks the inference batch size that maximises frames per second on the current machine.
+
+    Each candidate batch size is probed with real frames, measuring throughput and the memory
+    used by inference. The fastest batch within the memory ceiling is cached per model,
+    machine, device and input resolution, so later runs skip the probe.
+    """
+
+    def __init__(self, candidates: Sequence[int] = (1, 2, 4, 8, 16, 32, 64),
+                 memory_ceiling_mb: Optional[float] = None, probe_iterations: int = 2,
+                 cache_path: str = './stub/autotune/batch_sizes.json') -> None:
+        """
+        Initializes the autotuner.
+
+        Args:
+            candidates (Sequence[int]): Batch sizes to probe, in increasing order.
+            memory_ceiling_mb (Optional[float]): Maximum memory inference may use, in MB.
+                None uses 80% of the GPU memory on CUDA and the available RAM on CPU.
+            probe_iterations (int): Timed inference runs per candidate, after one warm-up run.
+            cache_path (str): JSON file where tuned batch sizes are stored.
+        """
+        self.candidates = sorted(candidates)
+        self.memory_ceiling_mb = memory_ceiling_mb
+        self.probe_iterations = probe_iterations
+        self.cache_path = cache_path
+
+    def tune(self, backend: InferenceBackend, model_path: str, sample_frame: np.ndarray,
+             conf: float = 0.1, device=None) -> int:
+        """
+        Returns the best batch size for a backend, probing it only if it is not cached yet.
+
+        Args:
+            backend (InferenceBackend): Backend to probe.
+            model_path (str): Path to the model weights, used in the cache key.
+            sample_frame (np.ndarray): Frame with the input resolution, repeated to build the probe batches.
+            conf (float): Confidence threshold used during the probe.
+            device: Device the backend runs on.
+
+        Returns:
+            int: The tuned batch size.
+        """
+        key = self._cache_key(backend, model_path, sample_frame.shape, device)
+        cache = self._load_cache()
+        if key in cache:
+            return cache[key]['batch_size']
+
+        ceiling_mb = self.memory_ceiling_mb or self._default_ceiling_mb(device)
+        best_batch_size, best_fps = self.candidates[0], 0.0
+        results = {}
+
+        for batch_size in self.candidates:
+            batch = [sample_frame] * batch_size
+            try:
+                fps, memory_mb = self._probe(backend, batch, conf, device)
+            except RuntimeError as e:  # Out of memory on the device
+                print(f"Batch size {batch_size} failed: {e}")
+                break
+
+            results[batch_size] = {'fps': fps, 'memory_mb': memory_mb}
+            if memory_mb > ceiling_mb:
+                break
+            if fps > best_fps:
+                best_batch_size, best_fps = batch_size, fps
+            elif fps < 0.9 * best_fps:
+                break  # Throughput is going down, larger batches will not help
+
+        cache[key] = {'batch_size': best_batch_size, 'fps': best_fps, 'probe': results}
+        self._save_cache(cache)
+        print(f"Tuned batch size: {best_batch_size} ({best_fps:.1f} FPS)")
+        return best_batch_size
+
+    def _probe(self, backend: InferenceBackend, batch: list, conf: float, device) -> Tuple[float, float]:
+        """Runs the batch and returns the throughput in frames per second and the memory used in MB."""
+        cuda = self._is_cuda(device)
+        if cuda:
+            import torch
+            torch.cuda.empty_cache()
+            torch.cuda.reset_peak_memory_stats()
+            memory_before = torch.cuda.memory_allocated()
+        else:
+            import psutil
+            process = psutil.Process()
+            memory_before = process.memory_info().rss
+
+        backend.predict(batch, conf)  # Warm-up
+
+        peak_memory = memory_before
+        start = time.perf_counter()
+        for _ in range(self.probe_iterations):
+            backend.predict(batch, conf)
+            if not cuda:
+                peak_memory = max(peak_memory, process.memory_info().rss)
+        if cuda:
+            torch.cuda.synchronize()
+            peak_memory = torch.cuda.max_memory_allocated()
+        elapsed = time.perf_counter() - start
+
+        fps = len(batch) * self.probe_iterations / max(elapsed, 1e-9)
+        return fps, (peak_memory - memory_before) / 2 ** 20
+
+    def _cache_key(self, backend: InferenceBackend, model_path: str, frame_shape: Tuple[int, ...], device) -> str:
+        """Builds the key identifying model, machine, device and input resolution."""
+        device_name = platform.processor() or platform.machine()
+        if self._is_cuda(device):
+            import torch
+            device_name = torch.cuda.get_device_name(torch.device(device))
+        return '|'.join([
+            file_hash(model_path), type(backend).__name__, platform.node(), device_name,
+            str(os.cpu_count()), 'x'.join(str(d) for d in frame_shape)
+        ])
+
+    def _default_ceiling_mb(self, device) -> float:
+        if self._is_cuda(device):
+            import torch
+            return 0.8 * torch.cuda.get_device_properties(torch.device(device)).total_memory / 2 ** 20
+        import psutil
+        return psutil.virtual_memory().available / 2 ** 20
+
+    def _is_cuda(self, device) -> bool:
+        return device is not None and str(device).startswith('cuda')
+
+    def _load_cache(self) -> Dict:
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache: Dict) -> None:
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        with open(self.cache_path, 'w') as f:
+            json.dump(cache, f, indent=4)
+
+
+def autotune_batch_size(backend: InferenceBackend, model_path: str, sample_frame: np.ndarray,
+                        conf: float = 0.1, device=None) -> int:
+    """
+    Tunes the batch size with the BATCH_MEMORY_CEILING_MB setting. Backends with a fixed
+    batch size are not probed.
+
+    Args:
+        backend (InferenceBackend): Backend to probe.
+        model_path (str): Path to the model weights.
+        sample_frame (np.ndarray): Frame with the input resolution.
+        conf (float): Confidence threshold used during the probe.
+        device: Device the backend runs on.
+
+    Returns:
+        int: The tuned batch size.
+    """
+    if backend.batch_size is not None:
+        return backend.batch_size
+    autotuner = BatchSizeAutotuner(memory_ceiling_mb=get_settings().BATCH_MEMORY_CEILING_MB)
+    return autotuner.tune(backend, model_path, sample_frame, conf, device)
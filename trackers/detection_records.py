@@ -0,0 +1,257 @@
+import numpy as np
+import supervision as sv
+from typing import Dict, Iterator, List, Optional
+
+class DetectionRecords:
+    """
+    Compact detections of a whole video stored as contiguous numpy arrays.
+
+    All detections of all frames are concatenated in frame order: boxes, class ids,
+    confidences, keypoint coordinates and keypoint confidences share the same row index,
+    and `frame_offsets[i]:frame_offsets[i + 1]` selects the rows of frame `i`.
+    `sv.Detections` and `sv.KeyPoints` are built on demand for a single frame, so nothing
+    keeps a reference to the decoded frames like ultralytics `Results` do.
+    """
+
+    def __init__(self, xyxy: np.ndarray, class_id: np.ndarray, confidence: np.ndarray,
+                 frame_offsets: np.ndarray, keypoints_xy: Optional[np.ndarray] = None,
+                 keypoints_confidence: Optional[np.ndarray] = None,
+                 class_names: Optional[Dict[int, str]] = None) -> None:
+        """
+        Initializes the records from already concatenated arrays.
+
+        Args:
+            xyxy (np.ndarray): Boxes of shape (n, 4).
+            class_id (np.ndarray): Class ids of shape (n,).
+            confidence (np.ndarray): Detection confidences of shape (n,).
+            frame_offsets (np.ndarray): Row offsets of shape (frames + 1,).
+            keypoints_xy (Optional[np.ndarray]): Keypoints of shape (n, k, 2). None for plain detections.
+            keypoints_confidence (Optional[np.ndarray]): Keypoint confidences of shape (n, k).
+            class_names (Optional[Dict[int, str]]): Mapping from class id to class name.
+        """
+        num_rows = len(xyxy)
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(num_rows, 4)
+        self.class_id = np.asarray(class_id, dtype=np.int32).reshape(num_rows)
+        self.confidence = np.asarray(confidence, dtype=np.float32).reshape(num_rows)
+        self.frame_offsets = np.asarray(frame_offsets, dtype=np.int64)
+
+        if keypoints_xy is None:
+            keypoints_xy = np.empty((num_rows, 0, 2), dtype=np.float32)
+        self.keypoints_xy = np.asarray(keypoints_xy, dtype=np.float32)
+        num_keypoints = self.keypoints_xy.shape[1]
+        if keypoints_confidence is None:
+            keypoints_confidence = np.ones((num_rows, num_keypoints), dtype=np.float32)
+        self.keypoints_confidence = np.asarray(keypoints_confidence, dtype=np.float32).reshape(num_rows, num_keypoints)
+
+        self.class_names = dict(class_names) if class_names else {}
+
+        if self.frame_offsets[-1] != num_rows:
+            raise ValueError("frame_offsets does not match the number of detections.")
+
+    @classmethod
+    def empty(cls, num_keypoints: int = 0, class_names: Optional[Dict[int, str]] = None) -> 'DetectionRecords':
+        """Returns records with no frames."""
+        return cls(
+            xyxy=np.empty((0, 4)), class_id=np.empty(0), confidence=np.empty(0),
+            frame_offsets=np.zeros(1), keypoints_xy=np.empty((0, num_keypoints, 2)),
+            class_names=class_names
+        )
+
+    @classmethod
+    def from_ultralytics(cls, results: List) -> 'DetectionRecords':
+        """
+        Builds the records from ultralytics results, one per frame.
+
+        Args:
+            results (List[Results]): Detection or pose results for consecutive frames.
+
+        Returns:
+            DetectionRecords: The compact records.
+        """
+        xyxy, class_id, confidence, keypoints_xy, keypoints_confidence = [], [], [], [], []
+        frame_offsets = [0]
+        class_names = {}
+
+        for result in results:
+            class_names = result.names
+            boxes = result.boxes
+            num_rows = 0 if boxes is None else len(boxes)
+            if num_rows:
+                xyxy.append(boxes.xyxy.cpu().numpy())
+                class_id.append(boxes.cls.cpu().numpy())
+                confidence.append(boxes.conf.cpu().numpy())
+
+            keypoints = result.keypoints
+            if keypoints is not None and num_rows:
+                keypoints_xy.append(keypoints.xy.cpu().numpy())
+                if keypoints.conf is not None:
+                    keypoints_confidence.append(keypoints.conf.cpu().numpy())
+                else:
+                    keypoints_confidence.append(np.ones(keypoints.xy.shape[:2], dtype=np.float32))
+
+            frame_offsets.append(frame_offsets[-1] + num_rows)
+
+        return cls(
+            xyxy=np.concatenate(xyxy) if xyxy else np.empty((0, 4)),
+            class_id=np.concatenate(class_id) if class_id else np.empty(0),
+            confidence=np.concatenate(confidence) if confidence else np.empty(0),
+            frame_offsets=np.array(frame_offsets),
+            keypoints_xy=np.concatenate(keypoints_xy) if keypoints_xy else np.empty((frame_offsets[-1], 0, 2)),
+            keypoints_confidence=np.concatenate(keypoints_confidence) if keypoints_confidence else None,
+            class_names=class_names
+        )
+
+    @classmethod
+    def concatenate(cls, records: List['DetectionRecords']) -> 'DetectionRecords':
+        """
+        Concatenates records of consecutive frame ranges.
+
+        Args:
+            records (List[DetectionRecords]): The records, in frame order.
+
+        Returns:
+            DetectionRecords: Records covering all frames.
+        """
+        if not records:
+            return cls.empty()
+
+        frame_offsets = [records[0].frame_offsets]
+        for record in records[1:]:
+            frame_offsets.append(record.frame_offsets[1:] + frame_offsets[-1][-1])
+
+        # Records without detections may not know the number of keypoints, so they are left out
+        non_empty = [record for record in records if record.num_detections] or [cls.empty()]
+        return cls(
+            xyxy=np.concatenate([record.xyxy for record in non_empty]),
+            class_id=np.concatenate([record.class_id for record in non_empty]),
+            confidence=np.concatenate([record.confidence for record in non_empty]),
+            frame_offsets=np.concatenate(frame_offsets),
+            keypoints_xy=np.concatenate([record.keypoints_xy for record in non_empty]),
+            keypoints_confidence=np.concatenate([record.keypoints_confidence for record in non_empty]),
+            class_names=next((record.class_names for record in records if record.class_names), None)
+        )
+
+    def expand(self, frame_index: np.ndarray, num_frames: int) -> 'DetectionRecords':
+        """
+        Places the frames of these records at the given frames of a longer video, the other
+        frames having no detection, e.g. when only keyframes were sent to the model.
+
+        Args:
+            frame_index (np.ndarray): Frame in the longer video of each frame of the records, increasing.
+            num_frames (int): Number of frames of the longer video.
+
+        Returns:
+            DetectionRecords: Records with `num_frames` frames, sharing the detection arrays.
+        """
+        counts = np.zeros(num_frames, dtype=np.int64)
+        counts[np.asarray(frame_index, dtype=np.int64)] = np.diff(self.frame_offsets)
+        return DetectionRecords(
+            xyxy=self.xyxy, class_id=self.class_id, confidence=self.confidence,
+            frame_offsets=np.concatenate([[0], np.cumsum(counts)]), keypoints_xy=self.keypoints_xy,
+            keypoints_confidence=self.keypoints_confidence, class_names=self.class_names
+        )
+
+    def __len__(self) -> int:
+        """Returns the number of frames."""
+        return len(self.frame_offsets) - 1
+
+    @property
+    def num_detections(self) -> int:
+        """Returns the number of detections over all frames."""
+        return len(self.xyxy)
+
+    def frame_slice(self, frame_num: int) -> slice:
+        """Returns the rows of the given frame."""
+        return slice(self.frame_offsets[frame_num], self.frame_offsets[frame_num + 1])
+
+    def slice(self, start_frame: int, end_frame: int) -> 'DetectionRecords':
+        """Returns the records of frames `[start_frame, end_frame)`."""
+        rows = slice(self.frame_offsets[start_frame], self.frame_offsets[end_frame])
+        return DetectionRecords(
+            xyxy=self.xyxy[rows], class_id=self.class_id[rows], confidence=self.confidence[rows],
+            frame_offsets=self.frame_offsets[start_frame:end_frame + 1] - self.frame_offsets[start_frame],
+            keypoints_xy=self.keypoints_xy[rows], keypoints_confidence=self.keypoints_confidence[rows],
+            class_names=self.class_names
+        )
+
+    def detections(self, frame_num: int) -> sv.Detections:
+        """
+        Builds the supervision detections of a frame.
+
+        Args:
+            frame_num (int): Index of the frame.
+
+        Returns:
+            sv.Detections: Detections of the frame, with class names when known.
+        """
+        rows = self.frame_slice(frame_num)
+        class_id = self.class_id[rows].copy()
+        data = {}
+        if self.class_names:
+            data['class_name'] = np.array([self.class_names[int(c)] for c in class_id])
+        return sv.Detections(
+            xyxy=self.xyxy[rows].copy(), confidence=self.confidence[rows].copy(), class_id=class_id, data=data
+        )
+
+    def keypoints(self, frame_num: int) -> sv.KeyPoints:
+        """
+        Builds the supervision keypoints of a frame.
+
+        Args:
+            frame_num (int): Index of the frame.
+
+        Returns:
+            sv.KeyPoints: Keypoints of the frame, one row per detected instance.
+        """
+        rows = self.frame_slice(frame_num)
+        if rows.start == rows.stop:
+            return sv.KeyPoints.empty()
+        return sv.KeyPoints(
+            xy=self.keypoints_xy[rows].copy(), confidence=self.keypoints_confidence[rows].copy(),
+            class_id=self.class_id[rows].copy()
+        )
+
+    def iter_detections(self) -> Iterator[sv.Detections]:
+        """Yields the supervision detections of every frame."""
+        for frame_num in range(len(self)):
+            yield self.detections(frame_num)
+
+    def iter_keypoints(self) -> Iterator[sv.KeyPoints]:
+        """Yields the supervision keypoints of every frame."""
+        for frame_num in range(len(self)):
+            yield self.keypoints(frame_num)
+
+    def save(self, path: str) -> None:
+        """
+        Saves the records to a `.npz` file.
+
+        Args:
+            path (str): Path of the output file.
+        """
+        class_ids = sorted(self.class_names)
+        np.savez(
+            path, xyxy=self.xyxy, class_id=self.class_id, confidence=self.confidence,
+            frame_offsets=self.frame_offsets, keypoints_xy=self.keypoints_xy,
+            keypoints_confidence=self.keypoints_confidence,
+            class_names_ids=np.array(class_ids, dtype=np.int32),
+            class_names_values=np.array([self.class_names[c] for c in class_ids], dtype=str)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'DetectionRecords':
+        """
+        Loads records saved with `save`.
+
+        Args:
+            path (str): Path of the `.npz` file.
+
+        Returns:
+            DetectionRecords: The loaded records.
+        """
+        with np.load(path) as data:
+            class_names = dict(zip(data['class_names_ids'].tolist(), data['class_names_values'].tolist()))
+            return cls(
+                xyxy=data['xyxy'], class_id=data['class_id'], confidence=data['confidence'],
+                frame_offsets=data['frame_offsets'], keypoints_xy=data['keypoints_xy'],
+                keypoints_confidence=data['keypoints_confidence'], class_names=class_names
+            )
@@ -0,0 +1,271 @@
+import os
+import glob
+import importlib.util
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Union
+from utils import box_iou
+from .detection_records import DetectionRecords
+
+class InferenceBackend(ABC):
+    """
+    Runs a detection model on batches of frames and returns compact detection records,
+    whatever runtime executes the model.
+    """
+
+    names: Dict[int, str] = {}
+    batch_size: Optional[int] = None  # Fixed batch size, or None to let the autotuner pick one
+    num_threads: Optional[int] = None  # Intra-op threads of the runtime, or None for its default
+
+    @abstractmethod
+    def predict(self, frames: List[np.ndarray], conf: float) -> DetectionRecords:
+        """
+        Abstract method for batch inference.
+
+        Args:
+            frames (List[np.ndarray]): Batch of BGR frames.
+            conf (float): Confidence threshold for detections.
+
+        Returns:
+            DetectionRecords: Detections of the batch, one frame per input frame.
+        """
+        pass
+
+    def set_num_threads(self, num_threads: int) -> None:
+        """
+        Bounds the intra-op threads of the runtime, e.g. when another model runs on the other cores.
+        Only runtimes with a setting per model are bounded (ONNX Runtime, OpenVINO). The others, such
+        as torch whose setting is process-wide, only keep the number.
+
+        Args:
+            num_threads (int): Number of threads.
+        """
+        self.num_threads = num_threads
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch eager inference through ultralytics, on the configured device."""
+
+    def __init__(self, model_path: str, device: Union[str, 'torch.device', None] = None) -> None:
+        """
+        Loads the model.
+
+        Args:
+            model_path (str): Path to the `.pt` weights.
+            device (Union[str, torch.device, None]): Device to run the model on. None uses the ultralytics default.
+        """
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        if device is not None:
+            self.model = self.model.to(device)
+        self.names = self.model.names
+
+    def predict(self, frames: List[np.ndarray], conf: float) -> DetectionRecords:
+        return DetectionRecords.from_ultralytics(self.model.predict(frames, conf=conf, verbose=False))
+
+
+class ExportedBackend(InferenceBackend):
+    """
+    Inference on weights exported once to another runtime format.
+
+    The export is written next to the `.pt` weights with the ultralytics naming and is reused
+    as long as it is newer than the weights, so only the first run pays for the export.
+    The runtimes are optional dependencies, listed in `requirements_backends.txt`.
+    """
+
+    export_format: str = ''
+    runtime_module: str = ''  # Python module of the runtime, checked before exporting
+
+    def __init__(self, model_path: str, imgsz: int = 640, num_threads: Optional[int] = None) -> None:
+        """
+        Exports the weights if needed and loads the exported model.
+
+        Args:
+            model_path (str): Path to the `.pt` weights.
+            imgsz (int): Input size used for the export.
+            num_threads (Optional[int]): Intra-op threads of the runtime. None uses the runtime default,
+                which takes every core.
+        """
+        from ultralytics import YOLO
+
+        if importlib.util.find_spec(self.runtime_module) is None:
+            raise ImportError(f"The {self.export_format} backend needs the '{self.runtime_module}' package. "
+                              f"Install it with `pip install -r requirements_backends.txt`.")
+
+        exported_path = self.exported_path(model_path)
+        if not os.path.exists(exported_path) or os.path.getmtime(exported_path) < os.path.getmtime(model_path):
+            print(f"Exporting {model_path} to {self.export_format}...")
+            exported_path = YOLO(model_path).export(format=self.export_format, imgsz=imgsz, dynamic=True)
+
+        self.model = YOLO(exported_path)
+        self.names = self.model.names
+        self.exported_file = str(exported_path)
+        self.imgsz = imgsz
+        self.num_threads = num_threads
+        self._threads_applied = num_threads is None
+
+    @classmethod
+    @abstractmethod
+    def exported_path(cls, model_path: str) -> str:
+        """Returns where ultralytics writes the export of the given weights."""
+        pass
+
+    def set_num_threads(self, num_threads: int) -> None:
+        # Applied before the next prediction, on the thread that runs it
+        self.num_threads = num_threads
+        self._threads_applied = False
+
+    def predict(self, frames: List[np.ndarray], conf: float) -> DetectionRecords:
+        if not self._threads_applied:
+            self._apply_num_threads()
+        return DetectionRecords.from_ultralytics(self.model.predict(frames, conf=conf, device='cpu', verbose=False))
+
+    def _apply_num_threads(self) -> None:
+        """Rebuilds the runtime session of the ultralytics model with `num_threads` intra-op threads."""
+        # ultralytics builds the session on the first prediction, so a blank frame builds it first
+        if self.model.predictor is None:
+            self.model.predict(np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8), device='cpu', verbose=False)
+        self._limit_threads(self.model.predictor.model)
+        self._threads_applied = True
+
+    @abstractmethod
+    def _limit_threads(self, autobackend) -> None:
+        """Replaces the runtime session of an ultralytics `AutoBackend` with one bounded to `num_threads`."""
+        pass
+
+
+class OnnxBackend(ExportedBackend):
+    """CPU inference through ONNX Runtime."""
+
+    export_format = 'onnx'
+    runtime_module = 'onnxruntime'
+
+    @classmethod
+    def exported_path(cls, model_path: str) -> str:
+        return os.path.splitext(model_path)[0] + '.onnx'
+
+    def _limit_threads(self, autobackend) -> None:
+        import onnxruntime
+
+        if not hasattr(autobackend, 'session'):
+            print(f"Could not bound the ONNX Runtime threads of {self.exported_file}.")
+            return
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.inter_op_num_threads = 1
+        autobackend.session = onnxruntime.InferenceSession(self.exported_file, options, providers=['CPUExecutionProvider'])
+
+
+class OpenVinoBackend(ExportedBackend):
+    """CPU inference through OpenVINO."""
+
+    export_format = 'openvino'
+    runtime_module = 'openvino'
+
+    @classmethod
+    def exported_path(cls, model_path: str) -> str:
+        return os.path.splitext(model_path)[0] + '_openvino_model'
+
+    def _limit_threads(self, autobackend) -> None:
+        import openvino as ov
+
+        if not hasattr(autobackend, 'ov_compiled_model'):
+            print(f"Could not bound the OpenVINO threads of {self.exported_file}.")
+            return
+        core = ov.Core()
+        model_xml = glob.glob(os.path.join(self.exported_file, '*.xml'))[0]
+        config = {
+            'INFERENCE_NUM_THREADS': self.num_threads,
+            'PERFORMANCE_HINT': autobackend.ov_compiled_model.get_property('PERFORMANCE_HINT'),
+        }
+        autobackend.ov_compiled_model = core.compile_model(core.read_model(model_xml), 'CPU', config)
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxBackend,
+    'openvino': OpenVinoBackend,
+}
+
+def create_backend(model_path: str, backend: Union[str, InferenceBackend] = 'torch',
+                   device: Union[str, 'torch.device', None] = None, **kwargs) -> InferenceBackend:
+    """
+    Creates the inference backend with the given name.
+
+    Args:
+        model_path (str): Path to the `.pt` weights.
+        backend (Union[str, InferenceBackend]): One of the names in `BACKENDS`, or an already
+            built backend, e.g. a `SyntheticBackend`, which is returned as is.
+        device (Union[str, torch.device, None]): Device for the torch backend. Exported backends run on CPU.
+        **kwargs: Extra arguments for the backend constructor.
+
+    Returns:
+        InferenceBackend: The backend, ready for inference.
+
+    Raises:
+        ValueError: If the backend name is not supported.
+    """
+    if isinstance(backend, InferenceBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f"{backend} is not a supported backend. Choose one of {list(BACKENDS)}.")
+    if backend == 'torch':
+        return TorchBackend(model_path, device=device, **kwargs)
+    return BACKENDS[backend](model_path, **kwargs)
+
+
+def compare_backends(reference: InferenceBackend, candidate: InferenceBackend, frames: List[np.ndarray],
+                     conf: float = 0.1, iou_threshold: float = 0.5, batch_size: int = 16) -> Dict[str, float]:
+    """
+    Runs two backends on the same frames and measures how closely their detections agree.
+
+    Detections are matched greedily per frame by IoU among boxes of the same class.
+
+    Args:
+        reference (InferenceBackend): Backend taken as ground truth, usually the torch one.
+        candidate (InferenceBackend): Backend being checked.
+        frames (List[np.ndarray]): Frames to run both backends on.
+        conf (float): Confidence threshold for both backends.
+        iou_threshold (float): Minimum IoU for two detections to match.
+        batch_size (int): Number of frames per inference batch.
+
+    Returns:
+        Dict[str, float]: Recall and precision of the candidate against the reference, mean IoU and
+            maximum confidence difference of the matched detections, and maximum keypoint distance in pixels.
+    """
+    reference_records = DetectionRecords.concatenate(
+        [reference.predict(frames[i:i + batch_size], conf) for i in range(0, len(frames), batch_size)])
+    candidate_records = DetectionRecords.concatenate(
+        [candidate.predict(frames[i:i + batch_size], conf) for i in range(0, len(frames), batch_size)])
+
+    matched, ious, conf_diffs, keypoint_diffs = 0, [], [], []
+    for frame_num in range(len(reference_records)):
+        ref_rows = reference_records.frame_slice(frame_num)
+        cand_rows = candidate_records.frame_slice(frame_num)
+        if ref_rows.start == ref_rows.stop or cand_rows.start == cand_rows.stop:
+            continue
+
+        iou = box_iou(reference_records.xyxy[ref_rows], candidate_records.xyxy[cand_rows])
+        same_class = reference_records.class_id[ref_rows][:, None] == candidate_records.class_id[cand_rows][None, :]
+        iou[~same_class] = 0
+
+        while iou.size and iou.max() >= iou_threshold:
+            ref_idx, cand_idx = np.unravel_index(np.argmax(iou), iou.shape)
+            matched += 1
+            ious.append(iou[ref_idx, cand_idx])
+            conf_diffs.append(abs(reference_records.confidence[ref_rows][ref_idx] -
+                                  candidate_records.confidence[cand_rows][cand_idx]))
+            if reference_records.keypoints_xy.shape[1] and candidate_records.keypoints_xy.shape[1]:
+                keypoint_diffs.append(np.abs(reference_records.keypoints_xy[ref_rows][ref_idx] -
+                                             candidate_records.keypoints_xy[cand_rows][cand_idx]).max())
+            iou[ref_idx, :] = 0
+            iou[:, cand_idx] = 0
+
+    return {
+        'recall': matched / max(reference_records.num_detections, 1),
+        'precision': matched / max(candidate_records.num_detections, 1),
+        'mean_iou': float(np.mean(ious)) if ious else 0.0,
+        'max_conf_diff': float(np.max(conf_diffs)) if conf_diffs else 0.0,
+        'max_keypoint_diff': float(np.max(keypoint_diffs)) if keypoint_diffs else 0.0,
+    }
@@ -0,0 +1,115 @@
+import os
+import time
+import torch
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from .inference_backend import InferenceBackend
+
+class JointDetectionScheduler:
+    """
+    Runs the object and keypoint models concurrently on the same batch of frames.
+
+    Each model gets its own single-thread pool, so the latency of a batch is close to the slower
+    model instead of the sum of both. Models on ONNX Runtime or OpenVINO are bounded to their own
+    number of intra-op threads through `InferenceBackend.set_num_threads`, so both models share the
+    CPU cores instead of one model leaving most of them idle. torch only has a process-wide
+    setting, so torch models are not bounded separately: they share `obj_threads + kp_threads`
+    threads, set once for the process.
+    """
+
+    def __init__(self, obj_detect: Callable[[List[np.ndarray]], Sequence[Any]],
+                 kp_detect: Callable[[List[np.ndarray]], Sequence[Any]],
+                 obj_threads: Optional[int] = None, kp_threads: Optional[int] = None,
+                 obj_backend: Optional[InferenceBackend] = None, kp_backend: Optional[InferenceBackend] = None) -> None:
+        """
+        Initializes the scheduler.
+
+        Args:
+            obj_detect (Callable): Object detection function, returning one result per frame.
+            kp_detect (Callable): Keypoint detection function, returning one result per frame.
+            obj_threads (Optional[int]): Intra-op threads for the object model on ONNX Runtime or OpenVINO.
+                None uses half of the cores.
+            kp_threads (Optional[int]): Intra-op threads for the keypoint model on ONNX Runtime or OpenVINO.
+                None uses the remaining cores.
+            obj_backend (Optional[InferenceBackend]): Backend behind `obj_detect`, bounded to `obj_threads` if its runtime allows it.
+            kp_backend (Optional[InferenceBackend]): Backend behind `kp_detect`, bounded to `kp_threads` if its runtime allows it.
+        """
+        cpu_count = os.cpu_count() or 2
+        obj_threads = obj_threads or max(1, cpu_count // 2)
+        kp_threads = kp_threads or max(1, cpu_count - obj_threads)
+
+        torch.set_num_threads(obj_threads + kp_threads)  # Process-wide, shared by the torch models
+
+        self.obj_detect = obj_detect
+        self.kp_detect = kp_detect
+        self.obj_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='obj-detect',
+                                           initializer=_limit_threads, initargs=(obj_threads, obj_backend))
+        self.kp_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kp-detect',
+                                          initializer=_limit_threads, initargs=(kp_threads, kp_backend))
+
+        self.batches = 0
+        self.obj_time = 0.0  # Total time spent in the object model
+        self.kp_time = 0.0  # Total time spent in the keypoint model
+        self.wall_time = 0.0  # Total time spent waiting for both models
+
+    def detect(self, frames: List[np.ndarray]) -> Tuple[List[Any], List[Any]]:
+        """
+        Detects objects and keypoints on a batch of frames at the same time.
+
+        Args:
+            frames (List[np.ndarray]): Batch of frames.
+
+        Returns:
+            Tuple[List[Any], List[Any]]: Object and keypoint detections, aligned by frame.
+
+        Raises:
+            ValueError: If a model does not return one result per frame.
+        """
+        start = time.perf_counter()
+        obj_future = self.obj_pool.submit(self._timed, self.obj_detect, frames)
+        kp_future = self.kp_pool.submit(self._timed, self.kp_detect, frames)
+        obj_detections, obj_time = obj_future.result()
+        kp_detections, kp_time = kp_future.result()
+
+        self.batches += 1
+        self.obj_time += obj_time
+        self.kp_time += kp_time
+        self.wall_time += time.perf_counter() - start
+
+        if len(obj_detections) != len(frames) or len(kp_detections) != len(frames):
+            raise ValueError("Both models must return one detection per frame.")
+
+        return list(obj_detections), list(kp_detections)
+
+    def overlap_ratio(self) -> float:
+        """
+        Returns how much of the sequential model time was saved by running concurrently:
+        0 means no overlap, values close to 1 mean the faster model was entirely hidden.
+        """
+        sequential_time = self.obj_time + self.kp_time
+        hidden_time = sequential_time - self.wall_time
+        return hidden_time / max(min(self.obj_time, self.kp_time), 1e-9)
+
+    def close(self) -> None:
+        """Shuts down both thread pools."""
+        self.obj_pool.shutdown(wait=True)
+        self.kp_pool.shutdown(wait=True)
+
+    def __enter__(self) -> 'JointDetectionScheduler':
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        self.close()
+
+    @staticmethod
+    def _timed(detect: Callable, frames: List[np.ndarray]) -> Tuple[Sequence[Any], float]:
+        start = time.perf_counter()
+        detections = detect(frames)
+        return detections, time.perf_counter() - start
+
+
+def _limit_threads(num_threads: int, backend: Optional[InferenceBackend]) -> None:
+    """Bounds the intra-op threads of the backend of a pool, if it has one."""
+    if isinstance(backend, InferenceBackend):
+        backend.set_num_threads(num_threads)
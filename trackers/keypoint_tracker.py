@@ -1,15 +1,18 @@
 from .base_tracker import BaseTracker
+from .detection_records import DetectionRecords
+from .inference_backend import InferenceBackend
+from .tracker_state import skip_frames
 
+import itertools
 import numpy as np
 import cv2
 import supervision as sv
-from ultralytics.engine.results import Results
-from utils import file_loader, file_saver
-from typing import List
+from utils import file_loader, file_saver, batch_frames, iter_frames, DetectionCache, FrameSource
+from typing import List, Optional, Union
 
 class KeypointTracker(BaseTracker):
     """Detection and Tracking of football field keypoints"""
-    def __init__(self, model_path: str, conf: float=0.1, kp_conf: float = 0.8) -> None:
+    def __init__(self, model_path: str, conf: float=0.1, kp_conf: float = 0.8, backend: Union[str, InferenceBackend, None] = None) -> None:
         """
         Initialize KeypointsTracker for tracking keypoints.
         
@@ -17,51 +20,172 @@ class KeypointTracker(BaseTracker):
             model_path (str): Model path.
             conf (float): Confidence threshold for field detection.
             kp_conf (float): Confidence threshold for keypoints.
+            backend (Union[str, InferenceBackend, None]): Inference backend name or instance. None uses the INFERENCE_BACKEND setting.
         """
-        super().__init__(model_path, conf)
+        super().__init__(model_path, conf, backend)
         
         self.kp_conf = kp_conf
         self.tracks = {}
 
-    def get_detections(self, frames: List[np.ndarray], batch_size: int = 16, read_from_stub: bool=False, stub_name: str=None) -> List[Results]:
+    def get_detections(self, frames: List[np.ndarray], batch_size: Optional[int] = None, read_from_stub: bool=False, stub_name: str=None,
+                       cache: Optional[DetectionCache] = None, keyframes: Optional[np.ndarray] = None) -> DetectionRecords:
         """
         Perform KeyPoint detection on the input frames.
         Args:
-            frames (List[ndarray]): List of frames to perform object detection on.
-            batch_size (int): Number of frames in a batch. Default is 16.
+            frames (List[ndarray]): List of frames (or FrameSource) to perform object detection on.
+            batch_size (Optional[int]): Number of frames in a batch. Default is None, which autotunes it.
             read_from_stub (bool): Whether to read from stub file. Default is False.
             stub_name (str): Name of the stub file. Default is None.
+            cache (Optional[DetectionCache]): Content-addressed detection cache. Cached chunks skip inference. Default is None.
+            keyframes (Optional[np.ndarray]): Boolean mask of the frames to run the model on, e.g. from
+                `KeyframeScheduler.plan`. After a keyframe with fewer than 4 confident keypoints, the next
+                frames are detected too, until one has enough keypoints or the next keyframe is reached,
+                so no interval is left without a homography. This needs a list of frames or a `FrameSource`.
+                Other frames get no detection. The cache is not used with keyframes, since its chunks hold
+                every frame. Default is None, which runs the model on every frame.
 
         Returns:
-            List[Results]: Keypoint Detection results for each frame.
+            DetectionRecords: Compact keypoint detections for all frames.
         """
         if read_from_stub:
             detections= file_loader(dir='keypoint_detections',file_name=stub_name)
-            if detections:
+            if isinstance(detections, list) and detections:
+                # Stubs saved before DetectionRecords hold the ultralytics results of each frame
+                try:
+                    detections = DetectionRecords.from_ultralytics(detections)
+                except AttributeError:
+                    print(f"Keypoint stub {stub_name} has an unknown format, detecting again.")
+                    detections = None
+            if isinstance(detections, DetectionRecords) and len(detections):
                 return detections
-            
-        frames = [self._adjust_contrast(frame) for frame in frames]
 
-        detections=[]
-        for i in range(0,len(frames),batch_size):
-            detections_batch=self.model.predict(frames[i:i+batch_size],conf=self.conf)
-            detections+=detections_batch
+        start_frame = getattr(frames, 'start_frame', 0)
+        source = frames
+        frames = iter_frames(frames)
+        first_frame = next(frames, None)
+        if first_frame is None:
+            return DetectionRecords.empty()
+        frames = itertools.chain([first_frame], frames)
+
+        if keyframes is not None:
+            return self._get_keyframe_detections(frames, source, batch_size, start_frame, np.asarray(keyframes, dtype=bool), stub_name)
+        # The batch size is tuned on the first chunk that misses the cache, so a fully cached video runs no inference
+        chunk_size = cache.chunk_size if cache is not None else self._batch_size(batch_size, first_frame)
+
+        chunks=[]
+        for frames_chunk in batch_frames(frames, chunk_size):
+            end_frame = start_frame + len(frames_chunk)
+
+            records = cache.load_chunk(start_frame, end_frame) if cache is not None else None
+            if records is None:
+                frames_chunk = [self._adjust_contrast(frame) for frame in frames_chunk]
+                chunk_batch_size = batch_size or self.get_batch_size(frames_chunk[0])
+                records = DetectionRecords.concatenate([
+                    self.model.predict(frames_chunk[i:i+chunk_batch_size],conf=self.conf)
+                    for i in range(0,len(frames_chunk),chunk_batch_size)
+                ])
+                if cache is not None:
+                    cache.save_chunk(start_frame, end_frame, records)
+
+            chunks.append(records)
+            start_frame = end_frame
 
+        detections = DetectionRecords.concatenate(chunks)
         if stub_name:
             file_saver(detections,'keypoint_detections',stub_name)            
         return detections
 
-    def get_tracks(self, detections: List[Results]) -> List[sv.KeyPoints]:
+    def _get_keyframe_detections(self, frames, source, batch_size: Optional[int], start_frame: int, keyframes: np.ndarray,
+                                 stub_name: Optional[str]) -> DetectionRecords:
+        """Runs the model on the keyframes only, in batches, retries after unusable keyframes and leaves the other frames empty."""
+        # Frames between keyframes are skipped before the contrast adjustment and inference
+        selected = (
+            (frame_num - start_frame, self._adjust_contrast(frame)) for frame_num, frame in enumerate(frames, start=start_frame)
+            if frame_num - start_frame < len(keyframes) and keyframes[frame_num - start_frame]
+        )
+        first = next(selected, None)
+        if first is None:
+            return DetectionRecords.empty().expand(np.empty(0, dtype=np.int64), len(keyframes))
+        selected = itertools.chain([first], selected)
+        batch_size = self._batch_size(batch_size, first[1])
+
+        detected = {}  # Detections of each detected frame
+        for batch in iter(lambda: list(itertools.islice(selected, batch_size)), []):
+            records = self.model.predict([frame for _, frame in batch], conf=self.conf)
+            detected.update({frame_num: records.slice(i, i + 1) for i, (frame_num, _) in enumerate(batch)})
+
+        self._retry_unusable_keyframes(source, keyframes, detected, batch_size)
+
+        frame_index = sorted(detected)
+        detections = DetectionRecords.concatenate([detected[frame_num] for frame_num in frame_index]).expand(
+            np.array(frame_index, dtype=np.int64), len(keyframes))
+        if stub_name:
+            file_saver(detections,'keypoint_detections',stub_name)
+        return detections
+
+    def _retry_unusable_keyframes(self, source, keyframes: np.ndarray, detected: dict, batch_size: int) -> None:
+        """
+        Detects the frames after each keyframe with fewer than 4 confident keypoints, in batches,
+        until one has enough keypoints or the next keyframe is reached. Adds them to `detected`.
+        """
+        planned = np.flatnonzero(keyframes)
+        unusable = [position for position, frame_num in enumerate(planned)
+                    if frame_num in detected and not self._is_usable(detected[frame_num])]
+        if not unusable:
+            return
+        if not isinstance(source, (list, tuple, FrameSource)):
+            print(f"{len(unusable)} keyframes have fewer than 4 keypoints. The frames after them can only be "
+                  f"detected from a list of frames or a FrameSource.")
+            return
+
+        for position in unusable:
+            next_keyframe = planned[position + 1] if position + 1 < len(planned) else len(keyframes)
+            frame_num = int(planned[position]) + 1
+            remaining, _ = skip_frames(source, frame_num)
+            remaining = iter_frames(remaining)
+            while frame_num < next_keyframe:
+                batch = [self._adjust_contrast(frame) for frame in
+                         itertools.islice(remaining, min(batch_size, next_keyframe - frame_num))]
+                if not batch:
+                    break
+                records = self.model.predict(batch, conf=self.conf)
+                usable = False
+                for i in range(len(batch)):
+                    detected[frame_num] = records.slice(i, i + 1)
+                    frame_num += 1
+                    if self._is_usable(detected[frame_num - 1]):
+                        usable = True
+                        break
+                if usable:
+                    break
+
+    def _is_usable(self, records: DetectionRecords) -> bool:
+        """Returns whether the pitch of a one-frame detection has the 4 confident keypoints a homography needs."""
+        rows = records.frame_slice(0)
+        if rows.start == rows.stop:
+            return False
+        return int((records.keypoints_confidence[rows.start] > self.kp_conf).sum()) >= 4
+
+    def _batch_size(self, batch_size: Optional[int], sample_frame: np.ndarray) -> int:
+        """Returns the given batch size, or the tuned one for a contrast-adjusted sample frame."""
+        return batch_size or self.get_batch_size(self._adjust_contrast(sample_frame))
+
+    def get_tracks(self, detections: DetectionRecords) -> List[sv.KeyPoints]:
         """ Get the keypoints tracks of a video frame.
         Args:
-            detections (Results): Detections from the frame.
+            detections (DetectionRecords): Keypoint detections for each frame.
         Returns:
             List[sv.KeyPoints]: List of keypoints tracks.
         """
         tracks = []
         filters = []
-        for detection in detections:
-            detection_sv = sv.KeyPoints.from_ultralytics(detection)
+        for detection_sv in detections.iter_keypoints():
+            if len(detection_sv) == 0:
+                # No pitch detected in this frame
+                tracks.append(sv.KeyPoints(xy=np.empty((1, 0, 2), dtype=np.float32)))
+                filters.append(np.zeros(detections.keypoints_xy.shape[1], dtype=bool))
+                continue
+
             filter = detection_sv.confidence[0] > self.kp_conf
             filtered_keypoints = detection_sv.xy[0][filter]
             filtered_keypoints = sv.KeyPoints(xy=filtered_keypoints[np.newaxis, ...])
@@ -0,0 +1,182 @@
+import json
+import numpy as np
+from typing import Dict, List, Optional
+
+class PossessionEventLog:
+    """
+    Append-only log of possession events.
+
+    Events are small dicts with a 'type' and the frame they happen at. Match-level possession
+    analytics read the events only, so their cost grows with the number of events instead of
+    the number of frames. When a path is given, every event is also appended to it as a line
+    of JSON, so the log survives the process and can be followed while the match is processed.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Initializes an empty log.
+
+        Args:
+            path (Optional[str]): JSON lines file the events are appended to. None keeps them in memory only.
+        """
+        self.path = path
+        self.events: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def append(self, event: Dict) -> None:
+        """Adds an event at the end of the log."""
+        self.events.append(event)
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(event) + '\n')
+
+    def of_type(self, event_type: str) -> List[Dict]:
+        """Returns the events of a type, in order."""
+        return [event for event in self.events if event['type'] == event_type]
+
+    def spells(self, team: Optional[int] = None) -> List[Dict]:
+        """
+        Returns the finished possession spells of a player, optionally only those of a team.
+
+        Returns:
+            List[Dict]: 'possession_end' events, with the player, team, first frame and last frame of each spell.
+        """
+        return [event for event in self.of_type('possession_end') if team is None or event['team'] == team]
+
+    def possession_frames(self, num_teams: int = 2) -> np.ndarray:
+        """
+        Returns the number of frames each team held the ball in the finished spells.
+
+        Returns:
+            np.ndarray: Frames of teams 1 to `num_teams`.
+        """
+        frames = np.zeros(num_teams, dtype=np.int64)
+        for event in self.spells():
+            if 1 <= event['team'] <= num_teams:
+                frames[event['team'] - 1] += event['end_frame'] - event['start_frame'] + 1
+        return frames
+
+    @classmethod
+    def load(cls, path: str) -> 'PossessionEventLog':
+        """Reads a log written to a JSON lines file, and keeps appending to it."""
+        log = cls()
+        with open(path) as f:
+            log.events = [json.loads(line) for line in f if line.strip()]
+        log.path = path
+        return log
+
+
+class PossessionEventDetector:
+    """
+    Online possession event extractor, fed frame by frame with the ball-to-player assignment.
+
+    A player only takes the ball after being assigned it for `min_frames` consecutive frames,
+    and only loses it after `release_frames` frames without any assignment, so a frame or two
+    of flicker between players does not create events. Each change of possession appends to
+    the log:
+
+    - 'possession_start' and 'possession_end' for the spells of each player,
+    - 'team_change' when the ball goes to the other team,
+    - 'pass' when it goes to a teammate, a candidate pass from the last owner to the new one.
+    """
+
+    def __init__(self, min_frames: int = 5, release_frames: int = 25,
+                 log: Optional[PossessionEventLog] = None) -> None:
+        """
+        Initializes the detector.
+
+        Args:
+            min_frames (int): Consecutive frames a player needs to be assigned the ball to take it.
+            release_frames (int): Frames without any assignment after which the owner loses the ball.
+            log (Optional[PossessionEventLog]): Log the events are appended to. A new in-memory log if None.
+        """
+        if min_frames < 1:
+            raise ValueError("min_frames must be at least 1.")
+        self.min_frames = min_frames
+        self.release_frames = release_frames
+        self.log = log if log is not None else PossessionEventLog()
+
+        self.owner: Optional[int] = None  # Player with the ball and its team
+        self.owner_team = 0
+        self.spell_start = 0
+        self.last_seen = 0  # Last frame the owner was assigned the ball
+
+        self.last_owner: Optional[int] = None  # Previous owner, for passes across loose-ball frames
+        self.last_team = 0
+
+        self.candidate: Optional[int] = None
+        self.candidate_team = 0
+        self.candidate_start = 0
+        self.candidate_frames = 0
+
+    def update(self, frame_num: int, player_id: Optional[int], team: int = 0) -> List[Dict]:
+        """
+        Adds the assignment of one frame.
+
+        Args:
+            frame_num (int): Frame number.
+            player_id (Optional[int]): Track id of the player with the ball, -1 or None if no player has it.
+            team (int): Team of that player.
+
+        Returns:
+            List[Dict]: The events emitted at this frame.
+        """
+        emitted = []
+        if player_id is None or player_id == -1:
+            self.candidate = None
+            if self.owner is not None and frame_num - self.last_seen >= self.release_frames:
+                emitted.append(self._end_spell())
+        elif player_id == self.owner:
+            self.candidate = None
+            self.last_seen = frame_num
+        else:
+            if player_id != self.candidate:
+                self.candidate, self.candidate_team = player_id, team
+                self.candidate_start, self.candidate_frames = frame_num, 0
+            self.candidate_frames += 1
+            if self.candidate_frames >= self.min_frames:
+                emitted += self._change_owner(frame_num)
+
+        for event in emitted:
+            self.log.append(event)
+        return emitted
+
+    def flush(self) -> List[Dict]:
+        """Ends the current spell, e.g. at the end of the match. Returns the emitted events."""
+        if self.owner is None:
+            return []
+        event = self._end_spell()
+        self.log.append(event)
+        return [event]
+
+    def _change_owner(self, frame_num: int) -> List[Dict]:
+        events = []
+        if self.owner is not None:
+            events.append(self._end_spell(self.candidate_start - 1))
+
+        new_owner, new_team, start = self.candidate, self.candidate_team, self.candidate_start
+        if self.last_owner is not None and self.last_team != new_team:
+            events.append({'type': 'team_change', 'frame': start, 'from_team': int(self.last_team),
+                           'to_team': int(new_team)})
+        elif self.last_owner is not None and self.last_owner != new_owner:
+            events.append({'type': 'pass', 'frame': start, 'from_player': int(self.last_owner),
+                           'to_player': int(new_owner), 'team': int(new_team)})
+
+        events.append({'type': 'possession_start', 'frame': start, 'player': int(new_owner), 'team': int(new_team)})
+        self.owner, self.owner_team = new_owner, new_team
+        self.spell_start, self.last_seen = start, frame_num
+        self.candidate = None
+        return events
+
+    def _end_spell(self, end_frame: Optional[int] = None) -> Dict:
+        end_frame = self.last_seen if end_frame is None else min(end_frame, self.last_seen)
+        event = {'type': 'possession_end', 'frame': end_frame, 'player': int(self.owner),
+                 'team': int(self.owner_team), 'start_frame': self.spell_start, 'end_frame': end_frame}
+        self.last_owner, self.last_team = self.owner, self.owner_team
+        self.owner = None
+        return event
@@ -0,0 +1,103 @@
+import numpy as np
+from typing import Iterable, Optional
+
+class PossessionStats:
+    """
+    Running ball possession counts with prefix sums, for the possession HUD.
+
+    Row `n` of the prefix table holds, for each team, the number of frames before frame `n`
+    in which that team had the ball, and column 0 the frames without possession. The share
+    of each team up to any frame, or in any window of frames, is then the difference of two
+    rows, in constant time, instead of a scan over all the frames so far. Frames are added
+    one at a time with `update` while a video is rendered, or all at once with `from_array`.
+    """
+
+    def __init__(self, num_teams: int = 2, capacity: int = 1024) -> None:
+        """
+        Initializes empty statistics.
+
+        Args:
+            num_teams (int): Number of teams. Teams are numbered from 1; 0 means no team has the ball.
+            capacity (int): Initial number of frames of the prefix table. It doubles when full.
+        """
+        self.num_teams = num_teams
+        self.prefix = np.zeros((max(capacity, 1) + 1, num_teams + 1), dtype=np.int64)
+        self.num_frames = 0
+
+    @classmethod
+    def from_array(cls, team_ball_control: Iterable, num_teams: int = 2) -> 'PossessionStats':
+        """
+        Builds the statistics of a whole match at once.
+
+        Args:
+            team_ball_control (Iterable): Team with the ball in each frame.
+            num_teams (int): Number of teams.
+
+        Returns:
+            PossessionStats: The statistics.
+        """
+        teams = cls._team_index(np.asarray(team_ball_control, dtype=object), num_teams)
+        stats = cls(num_teams, capacity=len(teams))
+        stats.prefix[1:len(teams) + 1] = np.cumsum(np.eye(num_teams + 1, dtype=np.int64)[teams], axis=0)
+        stats.num_frames = len(teams)
+        return stats
+
+    def __len__(self) -> int:
+        return self.num_frames
+
+    def update(self, team) -> None:
+        """
+        Adds the next frame.
+
+        Args:
+            team: Team with the ball in the frame. 0, None or any unknown team counts as no possession.
+        """
+        if self.num_frames + 1 >= len(self.prefix):
+            self.prefix = np.concatenate([self.prefix, np.zeros_like(self.prefix)])
+        row = self.prefix[self.num_frames].copy()
+        row[self._team_index(np.array([team], dtype=object), self.num_teams)[0]] += 1
+        self.num_frames += 1
+        self.prefix[self.num_frames] = row
+
+    def counts(self, start_frame: int = 0, end_frame: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the number of frames of each team in frames `[start_frame, end_frame)`.
+
+        Returns:
+            np.ndarray: Counts of shape (num_teams + 1,). Index 0 holds the frames without possession.
+        """
+        end_frame = self.num_frames if end_frame is None else min(max(end_frame, 0), self.num_frames)
+        start_frame = min(max(start_frame, 0), end_frame)
+        return self.prefix[end_frame] - self.prefix[start_frame]
+
+    def shares(self, start_frame: int = 0, end_frame: Optional[int] = None, include_none: bool = False) -> np.ndarray:
+        """
+        Returns the possession share of each team in frames `[start_frame, end_frame)`.
+
+        Args:
+            start_frame (int): First frame of the window.
+            end_frame (Optional[int]): Frame after the last one of the window. None goes to the last frame added.
+            include_none (bool): Whether frames without possession count in the total. If False the
+                team shares add up to 1, as in the HUD of `Tracker`.
+
+        Returns:
+            np.ndarray: Shares of teams 1 to `num_teams`, all 0 when the window has no frame counted.
+        """
+        counts = self.counts(start_frame, end_frame)
+        total = counts.sum() if include_none else counts[1:].sum()
+        return counts[1:] / total if total > 0 else np.zeros(self.num_teams)
+
+    def share_until(self, frame_num: int, include_none: bool = False) -> np.ndarray:
+        """Returns the possession share of each team from the first frame up to `frame_num`, inclusive."""
+        return self.shares(0, frame_num + 1, include_none)
+
+    def share_between(self, first_frame: int, last_frame: int, include_none: bool = False) -> np.ndarray:
+        """Returns the possession share of each team in frames `[first_frame, last_frame]`, inclusive."""
+        return self.shares(first_frame, last_frame + 1, include_none)
+
+    @staticmethod
+    def _team_index(teams: np.ndarray, num_teams: int) -> np.ndarray:
+        index = np.zeros(len(teams), dtype=np.int64)
+        for team in range(1, num_teams + 1):
+            index[teams == team] = team
+        return index
@@ -0,0 +1,192 @@
+import numpy as np
+import supervision as sv
+from scipy.optimize import linear_sum_assignment
+from typing import Dict, Optional, Tuple
+from utils import box_iou
+
+class SortTracker:
+    """
+    SORT multi-object tracker with every track updated at once.
+
+    Each track is a Kalman filter on `[cx, cy, area, aspect, vx, vy, v_area]`, as in the
+    original SORT. States and covariances of all tracks are stacked in arrays, so predict and
+    update are a few batched matrix products per frame instead of one Python object per track.
+    Detections are matched to tracks by IoU with `linear_sum_assignment`, only within the same
+    class, so players, goalkeepers, referees and ball are tracked in a single pass and each
+    track keeps its class id.
+    """
+
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1
+    H = np.eye(4, 7)
+    Q = np.diag([1, 1, 1, 1, 0.01, 0.01, 0.0001])
+    R = np.diag([1, 1, 10, 10])
+    P0 = np.diag([10, 10, 10, 10, 1e4, 1e4, 1e4])
+
+    def __init__(self, max_age: int = 30, min_hits: int = 3, iou_threshold: float = 0.3,
+                 class_aware: bool = True) -> None:
+        """
+        Initializes the tracker.
+
+        Args:
+            max_age (int): Frames a track survives without a matching detection.
+            min_hits (int): Matches needed before a track is reported, except in the first frames.
+            iou_threshold (float): Minimum IoU between a detection and a predicted track to match them.
+            class_aware (bool): Whether detections only match tracks of the same class.
+        """
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_threshold = iou_threshold
+        self.class_aware = class_aware
+        self.reset()
+
+    def reset(self) -> None:
+        """Removes all tracks and restarts the track ids."""
+        self.x = np.empty((0, 7))  # Track states
+        self.P = np.empty((0, 7, 7))  # Track covariances
+        self.track_id = np.empty(0, dtype=np.int64)
+        self.class_id = np.empty(0, dtype=np.int64)
+        self.hits = np.empty(0, dtype=np.int64)
+        self.time_since_update = np.empty(0, dtype=np.int64)
+        self.frame_count = 0
+        self.next_id = 1
+
+    def update(self, xyxy: np.ndarray, class_id: Optional[np.ndarray] = None
+               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Advances all tracks by one frame and matches them with the frame detections.
+
+        Args:
+            xyxy (np.ndarray): Detected boxes of shape (n, 4).
+            class_id (Optional[np.ndarray]): Class id of each detection. None treats all detections as one class.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: For each reported track: index of its detection
+                in `xyxy`, track id and class id.
+        """
+        xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+        class_id = np.zeros(len(xyxy), dtype=np.int64) if class_id is None else np.asarray(class_id, dtype=np.int64)
+        self.frame_count += 1
+
+        self._predict()
+        det_idx, trk_idx = self._match(xyxy, class_id)
+
+        self._update(trk_idx, xyxy[det_idx])
+        self.class_id[trk_idx] = class_id[det_idx]
+
+        unmatched = np.setdiff1d(np.arange(len(xyxy)), det_idx)
+        new_tracks = self._create(xyxy[unmatched], class_id[unmatched])
+
+        keep = self.time_since_update <= self.max_age
+        det_idx = np.concatenate([det_idx, unmatched])
+        trk_idx = np.concatenate([trk_idx, new_tracks])
+
+        confirmed = (self.hits[trk_idx] >= self.min_hits) | (self.frame_count <= self.min_hits)
+        result = det_idx[confirmed], self.track_id[trk_idx][confirmed], self.class_id[trk_idx][confirmed]
+        self._remove(~keep)
+
+        order = np.argsort(result[0])
+        return result[0][order], result[1][order], result[2][order]
+
+    def update_with_detections(self, detections: sv.Detections) -> sv.Detections:
+        """
+        Tracks supervision detections, like `sv.ByteTrack.update_with_detections`.
+
+        Args:
+            detections (sv.Detections): Detections of the frame.
+
+        Returns:
+            sv.Detections: The detections of reported tracks, with `tracker_id` set.
+        """
+        det_idx, track_id, _ = self.update(
+            detections.xyxy, detections.class_id if self.class_aware and detections.class_id is not None else None)
+        tracked = detections[det_idx]
+        tracked.tracker_id = track_id
+        return tracked
+
+    def _predict(self) -> None:
+        # Keep the area from going negative, as in the original SORT
+        shrinking = self.x[:, 2] + self.x[:, 6] <= 0
+        self.x[shrinking, 6] = 0
+        self.x = self.x @ self.F.T
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        self.time_since_update += 1
+
+    def _match(self, xyxy: np.ndarray, class_id: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the matched detection and track indices."""
+        empty = np.empty(0, dtype=np.int64)
+        if not len(xyxy) or not len(self.x):
+            return empty, empty
+
+        iou = box_iou(xyxy, state_to_xyxy(self.x))
+        if self.class_aware:
+            iou[class_id[:, None] != self.class_id[None, :]] = 0
+
+        det_idx, trk_idx = linear_sum_assignment(-iou)
+        matched = iou[det_idx, trk_idx] >= self.iou_threshold
+        return det_idx[matched].astype(np.int64), trk_idx[matched].astype(np.int64)
+
+    def _update(self, trk_idx: np.ndarray, xyxy: np.ndarray) -> None:
+        if not len(trk_idx):
+            return
+        x, P = self.x[trk_idx], self.P[trk_idx]
+        z = xyxy_to_measurement(xyxy)
+
+        S = self.H @ P @ self.H.T + self.R
+        K = P @ self.H.T @ np.linalg.inv(S)
+        innovation = z - x @ self.H.T
+        self.x[trk_idx] = x + np.einsum('nij,nj->ni', K, innovation)
+        self.P[trk_idx] = (np.eye(7) - K @ self.H) @ P
+
+        self.hits[trk_idx] += 1
+        self.time_since_update[trk_idx] = 0
+
+    def _create(self, xyxy: np.ndarray, class_id: np.ndarray) -> np.ndarray:
+        """Starts one track per detection and returns their indices."""
+        num_new = len(xyxy)
+        start = len(self.x)
+        x = np.zeros((num_new, 7))
+        x[:, :4] = xyxy_to_measurement(xyxy)
+
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, np.broadcast_to(self.P0, (num_new, 7, 7))])
+        self.track_id = np.concatenate([self.track_id, np.arange(self.next_id, self.next_id + num_new)])
+        self.class_id = np.concatenate([self.class_id, class_id])
+        self.hits = np.concatenate([self.hits, np.ones(num_new, dtype=np.int64)])
+        self.time_since_update = np.concatenate([self.time_since_update, np.zeros(num_new, dtype=np.int64)])
+        self.next_id += num_new
+        return np.arange(start, start + num_new)
+
+    def _remove(self, mask: np.ndarray) -> None:
+        keep = ~mask
+        self.x, self.P = self.x[keep], self.P[keep]
+        self.track_id, self.class_id = self.track_id[keep], self.class_id[keep]
+        self.hits, self.time_since_update = self.hits[keep], self.time_since_update[keep]
+
+    def state_dict(self) -> Dict[str, np.ndarray]:
+        """Returns the tracker state, e.g. to resume tracking on the next part of a video."""
+        return {
+            'x': self.x, 'P': self.P, 'track_id': self.track_id, 'class_id': self.class_id,
+            'hits': self.hits, 'time_since_update': self.time_since_update,
+            'frame_count': self.frame_count, 'next_id': self.next_id,
+        }
+
+    def load_state_dict(self, state: Dict[str, np.ndarray]) -> None:
+        """Restores a state returned by `state_dict`."""
+        for name, value in state.items():
+            setattr(self, name, value.copy() if isinstance(value, np.ndarray) else value)
+
+
+def xyxy_to_measurement(xyxy: np.ndarray) -> np.ndarray:
+    """Converts boxes of shape (n, 4) to `[cx, cy, area, aspect]`."""
+    w = xyxy[:, 2] - xyxy[:, 0]
+    h = xyxy[:, 3] - xyxy[:, 1]
+    return np.stack([xyxy[:, 0] + w / 2, xyxy[:, 1] + h / 2, w * h, w / np.maximum(h, 1e-9)], axis=1)
+
+
+def state_to_xyxy(x: np.ndarray) -> np.ndarray:
+    """Converts track states of shape (n, 7) to boxes of shape (n, 4)."""
+    area = np.maximum(x[:, 2], 0)
+    w = np.sqrt(area * np.maximum(x[:, 3], 0))
+    h = area / np.maximum(w, 1e-9)
+    return np.stack([x[:, 0] - w / 2, x[:, 1] - h / 2, x[:, 0] + w / 2, x[:, 1] + h / 2], axis=1)
@@ -0,0 +1,351 @@
+import cv2
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils import get_settings
+from .detection_records import DetectionRecords
+from .inference_backend import InferenceBackend
+
+class SyntheticMatch:
+    """
+    Deterministic synthetic match used in place of real footage and model weights.
+
+    Players, goalkeepers, referees and the ball move on the pitch plane (in the same
+    centimetre units as `Settings.vertices()`) along smooth, bounded trajectories. A camera
+    pans to follow the ball, and everything is projected to the image with the homography of
+    the frame. Every quantity is a pure function of the frame index and the seed, so any
+    frame can be generated on its own and two runs with the same seed are identical. Each
+    rendered frame carries its index in a stamp of black and white blocks in its top-left
+    corner, which `read_stamp` decodes.
+    """
+
+    BALL, GOALKEEPER, PLAYER, REFEREE = 0, 1, 2, 3
+    CLASS_NAMES = {BALL: 'ball', GOALKEEPER: 'goalkeeper', PLAYER: 'player', REFEREE: 'referee'}
+    TEAM_COLORS = {1: (40, 40, 200), 2: (235, 235, 235)}  # BGR shirt colors
+    REFEREE_COLOR = (0, 215, 255)
+    GOALKEEPER_COLORS = {1: (200, 120, 0), 2: (30, 30, 30)}
+    STAMP_MARKER = 0b10110100  # First 8 bits of the stamp, the 32 bits of the frame index follow
+    STAMP_BITS = 40
+    STAMP_BLOCK = 4  # Side of the square block of pixels of each bit
+
+    def __init__(self, frame_size: Tuple[int, int] = (1920, 1080), num_players: int = 20,
+                 num_referees: int = 3, speed: float = 1.0, view_length: float = 4500.0,
+                 pass_every: int = 50, pass_frames: int = 12, miss_rate: float = 0.02,
+                 ball_miss_rate: float = 0.15, jitter: float = 1.0, seed: int = 0) -> None:
+        """
+        Initializes the match.
+
+        Args:
+            frame_size (Tuple[int, int]): Width and height of the frames, in pixels.
+            num_players (int): Number of outfield players, split between both teams.
+            num_referees (int): Number of referees.
+            speed (float): Movement speed multiplier. 1.0 is about 5 m/s for players at 25 FPS.
+            view_length (float): Length of pitch visible in a frame, in centimetres. Smaller values zoom in.
+            pass_every (int): Frames between passes, i.e. how long a player keeps the ball.
+            pass_frames (int): Frames the ball takes to travel between players.
+            miss_rate (float): Probability of a player, goalkeeper or referee not being detected in a frame.
+            ball_miss_rate (float): Probability of the ball not being detected in a frame.
+            jitter (float): Standard deviation of the box noise, in pixels.
+            seed (int): Seed for the trajectories and the detection noise.
+        """
+        if num_players < 2:
+            raise ValueError("num_players must be at least 2.")
+        if pass_frames >= pass_every:
+            raise ValueError("pass_frames must be smaller than pass_every.")
+
+        settings = get_settings()
+        self.frame_size = frame_size
+        self.pitch_length = settings.PITCH_LENGTH
+        self.pitch_width = settings.PITCH_WIDTH
+        self.vertices = np.array(settings.vertices(), dtype=np.float32)
+        self.view_length = view_length
+        self.pass_every = pass_every
+        self.pass_frames = pass_frames
+        self.miss_rate = miss_rate
+        self.ball_miss_rate = ball_miss_rate
+        self.jitter = jitter
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        length, width = self.pitch_length, self.pitch_width
+
+        # Outfield players spread over their half, goalkeepers in front of their goal, referees around the middle
+        teams = np.arange(num_players) % 2 + 1
+        home_x = np.where(teams == 1, rng.uniform(0.1, 0.6, num_players), rng.uniform(0.4, 0.9, num_players)) * length
+        home_y = rng.uniform(0.1, 0.9, num_players) * width
+        amplitude = np.full(num_players, 900.0)
+
+        home_x = np.concatenate([home_x, [0.04 * length, 0.96 * length], rng.uniform(0.3, 0.7, num_referees) * length])
+        home_y = np.concatenate([home_y, [width / 2, width / 2], rng.uniform(0.2, 0.8, num_referees) * width])
+        amplitude = np.concatenate([amplitude, [250.0, 250.0], np.full(num_referees, 1500.0)])
+
+        self.class_id = np.concatenate([
+            np.full(num_players, self.PLAYER), np.full(2, self.GOALKEEPER), np.full(num_referees, self.REFEREE)
+        ]).astype(np.int32)
+        self.team = np.concatenate([teams, [1, 2], np.zeros(num_referees, dtype=int)]).astype(np.int32)
+        self.home = np.stack([home_x, home_y], axis=1)
+        self.amplitude = amplitude[:, None] * rng.uniform(0.6, 1.0, (len(amplitude), 2))
+
+        # Peak speed of a sinusoid is amplitude * angular frequency: ~20 cm per frame at speed 1.0
+        self.omega = 20.0 * speed / self.amplitude * rng.uniform(0.5, 1.0, self.amplitude.shape)
+        self.phase = rng.uniform(0, 2 * np.pi, self.amplitude.shape)
+
+        # Only outfield players and goalkeepers receive passes, never the player already on the ball
+        self.carriers = np.cumsum(rng.integers(1, num_players + 2, size=4096)) % (num_players + 2)
+
+        self._background = None
+
+    @property
+    def num_objects(self) -> int:
+        """Returns the number of people on the pitch."""
+        return len(self.class_id)
+
+    def positions(self, frame_num: int) -> np.ndarray:
+        """Returns the pitch positions of all people at a frame, of shape (num_objects, 2)."""
+        positions = self.home + self.amplitude * np.sin(self.omega * frame_num + self.phase)
+        return np.clip(positions, 0, [self.pitch_length, self.pitch_width])
+
+    def carrier(self, frame_num: int) -> int:
+        """Returns the index of the player the ball belongs to at a frame."""
+        return int(self.carriers[(frame_num // self.pass_every) % len(self.carriers)])
+
+    def ball_position(self, frame_num: int) -> np.ndarray:
+        """Returns the pitch position of the ball: at the feet of the carrier, or travelling during a pass."""
+        carrier = self.carrier(frame_num)
+        target = self.positions(frame_num)[carrier] + [60.0, 0.0]
+        progress = frame_num % self.pass_every
+        if frame_num < self.pass_every or progress >= self.pass_frames:
+            return target
+
+        pass_start = frame_num - progress
+        previous = self.carriers[(pass_start // self.pass_every - 1) % len(self.carriers)]
+        origin = self.positions(pass_start)[previous] + [60.0, 0.0]
+        alpha = progress / self.pass_frames
+        return (1 - alpha) * origin + alpha * target
+
+    def homography(self, frame_num: int) -> np.ndarray:
+        """Returns the 3x3 homography from pitch coordinates to image pixels at a frame."""
+        width, height = self.frame_size
+        half_view = self.view_length / 2
+        camera_x = np.clip(self.ball_position(frame_num)[0], half_view, self.pitch_length - half_view)
+
+        scale_x = width / self.view_length
+        scale_y = 0.8 * height / self.pitch_width
+        return np.array([
+            [scale_x, 0.0, width / 2 - scale_x * camera_x],
+            [0.0, scale_y, 0.1 * height],
+            [0.0, 0.0, 1.0],
+        ])
+
+    def _project(self, points: np.ndarray, homography: np.ndarray) -> np.ndarray:
+        points = np.hstack([points, np.ones((len(points), 1))]) @ homography.T
+        return points[:, :2] / points[:, 2:]
+
+    def boxes(self, frame_num: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the ground truth boxes of a frame, before detection noise.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Boxes (n, 4), class ids (n,) and object indices (n,),
+                where the ball has index `num_objects`. Objects outside the frame are left out.
+        """
+        width, height = self.frame_size
+        homography = self.homography(frame_num)
+        feet = self._project(np.vstack([self.positions(frame_num), self.ball_position(frame_num)]), homography)
+
+        # People further away (higher up in the image) look smaller
+        box_height = 0.09 * height * (0.7 + 0.3 * feet[:, 1] / height)
+        box_height[-1] = 0.012 * height
+        box_width = np.where(np.arange(len(feet)) < self.num_objects, 0.4 * box_height, box_height)
+
+        xyxy = np.stack([
+            feet[:, 0] - box_width / 2, feet[:, 1] - box_height,
+            feet[:, 0] + box_width / 2, feet[:, 1]
+        ], axis=1)
+        xyxy[-1, [1, 3]] += box_height[-1] / 2  # The ball is centred on its position
+
+        class_id = np.append(self.class_id, self.BALL)
+        inside = (xyxy[:, 2] > 0) & (xyxy[:, 0] < width) & (xyxy[:, 3] > 0) & (xyxy[:, 1] < height)
+        index = np.flatnonzero(inside)
+        return np.clip(xyxy[index], 0, [width, height, width, height]), class_id[index], index
+
+    def detections(self, frame_num: int, conf: float = 0.0) -> DetectionRecords:
+        """
+        Returns the noisy object detections of a frame, as a detector would.
+
+        Args:
+            frame_num (int): Index of the frame.
+            conf (float): Confidence threshold.
+
+        Returns:
+            DetectionRecords: Detections of the frame.
+        """
+        xyxy, class_id, _ = self.boxes(frame_num)
+        rng = np.random.default_rng((self.seed, frame_num))
+
+        miss_rate = np.where(class_id == self.BALL, self.ball_miss_rate, self.miss_rate)
+        confidence = rng.uniform(0.5, 0.95, len(class_id))
+        keep = (rng.random(len(class_id)) >= miss_rate) & (confidence >= conf)
+        xyxy = xyxy[keep] + rng.normal(0, self.jitter, (int(keep.sum()), 4))
+
+        return DetectionRecords(
+            xyxy=xyxy, class_id=class_id[keep], confidence=confidence[keep],
+            frame_offsets=np.array([0, len(xyxy)]), class_names=self.CLASS_NAMES
+        )
+
+    def keypoints(self, frame_num: int, conf: float = 0.0) -> DetectionRecords:
+        """
+        Returns the pitch keypoint detection of a frame, as the keypoint model would.
+
+        Keypoints inside the frame get a high confidence and the others a low one, so the
+        keypoint confidence filter keeps only the visible ones.
+
+        Args:
+            frame_num (int): Index of the frame.
+            conf (float): Confidence threshold for the pitch instance.
+
+        Returns:
+            DetectionRecords: One pitch instance with all keypoints, or no detection if below the threshold.
+        """
+        width, height = self.frame_size
+        rng = np.random.default_rng((self.seed, frame_num, 1))
+        xy = self._project(self.vertices, self.homography(frame_num))
+        xy = xy + rng.normal(0, self.jitter, xy.shape)
+
+        visible = (xy[:, 0] >= 0) & (xy[:, 0] < width) & (xy[:, 1] >= 0) & (xy[:, 1] < height)
+        keypoints_confidence = np.where(visible, rng.uniform(0.85, 0.99, len(xy)), rng.uniform(0.0, 0.3, len(xy)))
+        confidence = rng.uniform(0.8, 0.95)
+        if confidence < conf or not visible.any():
+            return DetectionRecords(xyxy=np.empty((0, 4)), class_id=np.empty(0), confidence=np.empty(0),
+                                    frame_offsets=np.zeros(2), keypoints_xy=np.empty((0, len(xy), 2)),
+                                    class_names={0: 'pitch'})
+
+        box = np.concatenate([xy[visible].min(axis=0), xy[visible].max(axis=0)])
+        return DetectionRecords(
+            xyxy=box[None], class_id=np.zeros(1), confidence=np.array([confidence]),
+            frame_offsets=np.array([0, 1]), keypoints_xy=xy[None], keypoints_confidence=keypoints_confidence[None],
+            class_names={0: 'pitch'}
+        )
+
+    def render(self, frame_num: int) -> np.ndarray:
+        """
+        Draws a frame: a green pitch with every person as a coloured shirt over dark shorts.
+
+        Shirts use the team colours, so team assignment has something to cluster.
+
+        Args:
+            frame_num (int): Index of the frame.
+
+        Returns:
+            np.ndarray: BGR frame.
+        """
+        width, height = self.frame_size
+        if self._background is None:
+            self._background = np.full((height, width, 3), (34, 139, 34), dtype=np.uint8)
+        frame = self._background.copy()
+
+        homography = self.homography(frame_num)
+        lines = self._project(self.vertices, homography).astype(np.int32)
+        for start, end in get_settings().edges:
+            cv2.line(frame, tuple(lines[start - 1]), tuple(lines[end - 1]), (255, 255, 255), 2)
+
+        xyxy, class_id, index = self.boxes(frame_num)
+        for (x1, y1, x2, y2), cls, i in zip(xyxy.astype(int), class_id, index):
+            if cls == self.BALL:
+                cv2.circle(frame, ((x1 + x2) // 2, (y1 + y2) // 2), max((x2 - x1) // 2, 2), (255, 255, 255), -1)
+                continue
+            if cls == self.REFEREE:
+                color = self.REFEREE_COLOR
+            elif cls == self.GOALKEEPER:
+                color = self.GOALKEEPER_COLORS[self.team[i]]
+            else:
+                color = self.TEAM_COLORS[self.team[i]]
+            # The body is inset in its box, so the box corners show the pitch like in real crops
+            inset_x, inset_y = (x2 - x1) // 5, (y2 - y1) // 10
+            middle = (y1 + y2) // 2
+            cv2.rectangle(frame, (x1 + inset_x, y1 + inset_y), (x2 - inset_x, middle), color, -1)
+            cv2.rectangle(frame, (x1 + inset_x, middle), (x2 - inset_x, y2 - inset_y), (20, 20, 20), -1)
+        return self.stamp(frame, frame_num)
+
+    @classmethod
+    def stamp(cls, frame: np.ndarray, frame_num: int) -> np.ndarray:
+        """
+        Writes the frame index in the top-left corner of a frame, one black or white block per bit.
+
+        Pure black and white survive the contrast equalization of `KeypointTracker`, so the
+        index can still be read from the frames passed to a pose model.
+
+        Args:
+            frame (np.ndarray): BGR frame, at least `STAMP_BITS * STAMP_BLOCK` pixels wide. Modified in place.
+            frame_num (int): Index of the frame.
+
+        Returns:
+            np.ndarray: The stamped frame.
+        """
+        value = (cls.STAMP_MARKER << 32) | (int(frame_num) & 0xFFFFFFFF)
+        bits = (value >> np.arange(cls.STAMP_BITS - 1, -1, -1)) & 1
+        block = cls.STAMP_BLOCK
+        frame[:block, :cls.STAMP_BITS * block] = np.repeat(bits * 255, block).astype(np.uint8)[None, :, None]
+        return frame
+
+    @classmethod
+    def read_stamp(cls, frame: np.ndarray) -> int:
+        """
+        Reads the frame index written by `stamp`.
+
+        Args:
+            frame (np.ndarray): Frame rendered by `render`, in BGR or grayscale.
+
+        Returns:
+            int: Index of the frame.
+
+        Raises:
+            ValueError: If the frame carries no stamp, e.g. it was not rendered by a `SyntheticMatch`.
+        """
+        block = cls.STAMP_BLOCK
+        pixels = np.asarray(frame)[:block, :cls.STAMP_BITS * block]
+        if pixels.shape[1] < cls.STAMP_BITS * block:
+            raise ValueError("The frame is too small to carry a synthetic frame stamp.")
+        if pixels.ndim == 3:
+            pixels = pixels.mean(axis=2)
+        bits = pixels.reshape(block, cls.STAMP_BITS, block).mean(axis=(0, 2)) > 127
+        value = int(''.join('1' if bit else '0' for bit in bits), 2)
+        if value >> 32 != cls.STAMP_MARKER:
+            raise ValueError("The frame carries no synthetic frame stamp. Render it with SyntheticMatch.render.")
+        return value & 0xFFFFFFFF
+
+    def frames(self, num_frames: int, start_frame: int = 0) -> Iterator[np.ndarray]:
+        """Yields rendered frames `[start_frame, start_frame + num_frames)`."""
+        for frame_num in range(start_frame, start_frame + num_frames):
+            yield self.render(frame_num)
+
+
+class SyntheticBackend(InferenceBackend):
+    """
+    Detector stand-in returning the detections of a `SyntheticMatch` instead of running a model.
+
+    Each frame passed to `predict` gets the detections of the match frame read from its
+    stamp (see `SyntheticMatch.stamp`), so the results do not depend on the order of the
+    calls: frames can be skipped, e.g. between keyframes, in cached chunks or on resume.
+    Pass an instance as the `backend` of any tracker to run the rest of the pipeline without
+    model weights. The batch size is fixed, since probing it would only measure the match.
+    """
+
+    batch_size = 32
+
+    def __init__(self, match: Optional[SyntheticMatch] = None, task: str = 'detect') -> None:
+        """
+        Initializes the backend.
+
+        Args:
+            match (Optional[SyntheticMatch]): Match to detect. None creates one with the default settings.
+            task (str): 'detect' for players, referees and ball, 'pose' for pitch keypoints.
+        """
+        if task not in ('detect', 'pose'):
+            raise ValueError(f"{task} is not a supported task. Choose 'detect' or 'pose'.")
+        self.match = match or SyntheticMatch()
+        self.task = task
+        self.names: Dict[int, str] = dict(SyntheticMatch.CLASS_NAMES) if task == 'detect' else {0: 'pitch'}
+
+    def predict(self, frames: List[np.ndarray], conf: float) -> DetectionRecords:
+        detect = self.match.detections if self.task == 'detect' else self.match.keypoints
+        return DetectionRecords.concatenate([detect(SyntheticMatch.read_stamp(frame), conf) for frame in frames])
@@ -0,0 +1,197 @@
+import os
+import numpy as np
+from typing import Dict, Optional, Tuple
+from .track_table import TrackTable
+
+class TrackIndex:
+    """
+    Per-track index over contiguous track storage.
+
+    Rows of all tracks are stored sorted by category, track id and frame, so the rows of one
+    track are a single slice of the `frame`, `bbox` and `projection` arrays. For each track the
+    index keeps its first and last frame, its number of frames and the start of its slice, and
+    a dict maps `(category, track_id)` to its entry, so getting a trajectory is a lookup and a
+    slice instead of a scan over every frame.
+    """
+
+    def __init__(self, category: np.ndarray, track_id: np.ndarray, frame: np.ndarray, bbox: np.ndarray,
+                 projection: np.ndarray, num_frames: int, fps: Optional[float] = None) -> None:
+        """
+        Builds the index from rows already sorted by category, track id and frame.
+
+        Args:
+            category (np.ndarray): Index in `TrackTable.CATEGORIES` of each row, shape (n,).
+            track_id (np.ndarray): Track id of each row, shape (n,).
+            frame (np.ndarray): Frame of each row, shape (n,).
+            bbox (np.ndarray): Boxes of shape (n, 4).
+            projection (np.ndarray): Pitch positions of shape (n, 2), NaN when not computed.
+            num_frames (int): Number of frames of the match.
+            fps (Optional[float]): Frame rate of the video, needed for queries by time.
+        """
+        self.frame = np.asarray(frame, dtype=np.int64)
+        self.bbox = np.asarray(bbox, dtype=np.float32)
+        self.projection = np.asarray(projection, dtype=np.float32)
+        self.num_frames = num_frames
+        self.fps = fps
+
+        category = np.asarray(category, dtype=np.int8)
+        track_id = np.asarray(track_id, dtype=np.int64)
+        new_track = np.ones(len(track_id), dtype=bool)
+        new_track[1:] = (category[1:] != category[:-1]) | (track_id[1:] != track_id[:-1])
+
+        self.start = np.flatnonzero(new_track)
+        self.count = np.diff(np.append(self.start, len(track_id)))
+        self.track_category = category[self.start]
+        self.track_id = track_id[self.start]
+        self.first_frame = self.frame[self.start]
+        self.last_frame = self.frame[self.start + self.count - 1] if len(self.start) else self.start.copy()
+
+        self.lookup: Dict[Tuple[str, int], int] = {
+            (TrackTable.CATEGORIES[c], int(t)): i for i, (c, t) in enumerate(zip(self.track_category, self.track_id))
+        }
+
+    @classmethod
+    def from_table(cls, table: TrackTable, fps: Optional[float] = None) -> 'TrackIndex':
+        """Builds the index of a `TrackTable`."""
+        order = np.lexsort((table.frame, table.track_id, table.category))
+        return cls(table.category[order], table.track_id[order], table.frame[order], table.bbox[order],
+                   table.projection[order], len(table), fps)
+
+    @classmethod
+    def from_tracks(cls, tracks: Dict, fps: Optional[float] = None) -> 'TrackIndex':
+        """Builds the index of nested dict tracks, as returned by `Tracker.get_object_tracks`."""
+        return cls.from_table(TrackTable.from_tracks(tracks), fps)
+
+    def __len__(self) -> int:
+        """Returns the number of tracks."""
+        return len(self.track_id)
+
+    def __contains__(self, key: Tuple[str, int]) -> bool:
+        return key in self.lookup
+
+    def entry(self, track_id: int, category: str = 'players') -> Dict[str, int]:
+        """
+        Returns the summary of a track.
+
+        Args:
+            track_id (int): Id of the track.
+            category (str): One of `TrackTable.CATEGORIES`.
+
+        Returns:
+            Dict[str, int]: First frame, last frame, number of frames and storage slice of the track.
+
+        Raises:
+            KeyError: If the track does not exist.
+        """
+        i = self.lookup[(category, track_id)]
+        return {
+            'first_frame': int(self.first_frame[i]), 'last_frame': int(self.last_frame[i]),
+            'count': int(self.count[i]), 'rows': slice(int(self.start[i]), int(self.start[i] + self.count[i])),
+        }
+
+    def rows(self, track_id: int, category: str = 'players', start_frame: int = 0,
+             end_frame: Optional[int] = None) -> slice:
+        """
+        Returns the storage slice of a track, restricted to frames `[start_frame, end_frame)`.
+
+        Args:
+            track_id (int): Id of the track.
+            category (str): One of `TrackTable.CATEGORIES`.
+            start_frame (int): First frame of the range.
+            end_frame (Optional[int]): Frame after the last one of the range. None goes to the end.
+
+        Returns:
+            slice: Rows of `frame`, `bbox` and `projection`.
+        """
+        i = self.lookup[(category, track_id)]
+        start, stop = int(self.start[i]), int(self.start[i] + self.count[i])
+        if start_frame > self.first_frame[i]:
+            start += int(np.searchsorted(self.frame[start:stop], start_frame))
+        if end_frame is not None and end_frame <= self.last_frame[i]:
+            stop = start + int(np.searchsorted(self.frame[start:stop], end_frame))
+        return slice(start, max(start, stop))
+
+    def trajectory(self, track_id: int, category: str = 'players', start_frame: int = 0,
+                   end_frame: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Returns the frames, boxes and pitch positions of a track in a frame range.
+
+        Args:
+            track_id (int): Id of the track.
+            category (str): One of `TrackTable.CATEGORIES`.
+            start_frame (int): First frame of the range.
+            end_frame (Optional[int]): Frame after the last one of the range. None goes to the end.
+
+        Returns:
+            Dict[str, np.ndarray]: Views of the storage under 'frame', 'bbox' and 'projection'.
+        """
+        rows = self.rows(track_id, category, start_frame, end_frame)
+        return {'frame': self.frame[rows], 'bbox': self.bbox[rows], 'projection': self.projection[rows]}
+
+    def tracks_in_range(self, start_frame: int, end_frame: int, category: Optional[str] = 'players') -> np.ndarray:
+        """
+        Returns the ids of the tracks present at some point in frames `[start_frame, end_frame)`.
+
+        Tracks are selected by their first and last frame, so a track with a hole covering the
+        whole range is still returned.
+
+        Args:
+            start_frame (int): First frame of the range.
+            end_frame (int): Frame after the last one of the range.
+            category (Optional[str]): One of `TrackTable.CATEGORIES`. None returns tracks of all categories.
+
+        Returns:
+            np.ndarray: Track ids.
+        """
+        overlaps = (self.first_frame < end_frame) & (self.last_frame >= start_frame)
+        if category is not None:
+            overlaps &= self.track_category == TrackTable.CATEGORIES.index(category)
+        return self.track_id[overlaps]
+
+    def frame_range(self, start_time: float, end_time: float) -> Tuple[int, int]:
+        """
+        Converts a time range in seconds to the frame range `[start_frame, end_frame)`.
+
+        Raises:
+            ValueError: If the index does not know the video frame rate.
+        """
+        if not self.fps:
+            raise ValueError("The frame rate is needed for queries by time.")
+        return int(np.ceil(start_time * self.fps)), int(np.ceil(end_time * self.fps))
+
+    def trajectory_between(self, track_id: int, start_time: float, end_time: float,
+                           category: str = 'players') -> Dict[str, np.ndarray]:
+        """Returns the trajectory of a track between two times, in seconds."""
+        return self.trajectory(track_id, category, *self.frame_range(start_time, end_time))
+
+    def save(self, path: str) -> None:
+        """
+        Saves the index and its storage to a `.npz` file, e.g. next to the tracks stub.
+
+        Args:
+            path (str): Path of the output file.
+        """
+        category = np.repeat(self.track_category, self.count)
+        track_id = np.repeat(self.track_id, self.count)
+        np.savez(path, category=category, track_id=track_id, frame=self.frame, bbox=self.bbox,
+                 projection=self.projection, num_frames=self.num_frames, fps=self.fps or 0.0)
+
+    @classmethod
+    def load(cls, path: str) -> 'TrackIndex':
+        """
+        Loads an index saved with `save`.
+
+        Args:
+            path (str): Path of the `.npz` file.
+
+        Returns:
+            TrackIndex: The loaded index.
+        """
+        with np.load(path) as data:
+            return cls(data['category'], data['track_id'], data['frame'], data['bbox'], data['projection'],
+                       int(data['num_frames']), float(data['fps']) or None)
+
+    @staticmethod
+    def sidecar_path(stub_path: str) -> str:
+        """Returns where the index of a tracks stub is saved."""
+        return os.path.splitext(stub_path)[0] + '_index.npz'
@@ -0,0 +1,421 @@
+import numpy as np
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+class TrackTable:
+    """
+    Columnar store for the tracks of a whole match.
+
+    Every tracked object in every frame is one row of parallel numpy arrays: frame, track id,
+    category, bbox, team, team color, feet position, pitch projection and ball possession.
+    Rows are sorted by frame, and `frame_offsets[i]:frame_offsets[i + 1]` selects the rows
+    of frame `i`, so whole-match stages work on arrays instead of walking nested dicts.
+
+    `table['players'][frame_num][track_id]['team']` still works through a view that reads
+    and writes the arrays, including adding and deleting tracks, so code written for the
+    dict tracks runs unchanged. Adding or deleting a track moves the rows after it, so the
+    view is meant for the per-frame code that has not moved to the columns yet: annotation,
+    speed and distance, and the per-frame team assignment. Whole-match stages such as ball
+    possession (`PlayerBallAssigner.assign_ball_batch`) and projection
+    (`ViewTransformer.transform_table`) are the ones expected to read the columns directly.
+    """
+
+    CATEGORIES = ('players', 'referees', 'ball')
+    FIELDS = ('bbox', 'team', 'team_color', 'position', 'projection', 'has_ball')
+    COLUMNS = ('frame', 'track_id', 'category') + FIELDS
+    NO_TEAM = -1  # Team of the rows without a team, so team 0 stays a valid value
+
+    def __init__(self, frame: np.ndarray, track_id: np.ndarray, category: np.ndarray, bbox: np.ndarray,
+                 num_frames: Optional[int] = None, team: Optional[np.ndarray] = None,
+                 team_color: Optional[np.ndarray] = None, position: Optional[np.ndarray] = None,
+                 projection: Optional[np.ndarray] = None, has_ball: Optional[np.ndarray] = None) -> None:
+        """
+        Initializes the table from its columns. Rows are sorted by frame if they are not already.
+
+        Args:
+            frame (np.ndarray): Frame index of each row, shape (n,).
+            track_id (np.ndarray): Track id of each row, shape (n,).
+            category (np.ndarray): Index in `CATEGORIES` of each row, shape (n,).
+            bbox (np.ndarray): Boxes in xyxy format, shape (n, 4).
+            num_frames (Optional[int]): Number of frames of the match. None uses the last frame with rows.
+            team (Optional[np.ndarray]): Team of each row, `NO_TEAM` when not assigned.
+            team_color (Optional[np.ndarray]): Team color of each row, shape (n, 3), NaN when not assigned.
+            position (Optional[np.ndarray]): Feet position in the image, shape (n, 2), NaN when not computed.
+            projection (Optional[np.ndarray]): Position on the pitch, shape (n, 2), NaN when not computed.
+            has_ball (Optional[np.ndarray]): Whether the row has the ball, shape (n,).
+        """
+        num_rows = len(frame)
+        frame = np.asarray(frame, dtype=np.int64).reshape(num_rows)
+        order = np.argsort(frame, kind='stable')
+        if num_frames is None:
+            num_frames = int(frame.max()) + 1 if num_rows else 0
+
+        def column(values, shape, dtype, fill):
+            if values is None:
+                return np.full((num_rows,) + shape, fill, dtype=dtype)
+            return np.asarray(values, dtype=dtype).reshape((num_rows,) + shape)[order]
+
+        self.frame = frame[order]
+        self.track_id = np.asarray(track_id, dtype=np.int64).reshape(num_rows)[order]
+        self.category = np.asarray(category, dtype=np.int8).reshape(num_rows)[order]
+        self.bbox = np.asarray(bbox, dtype=np.float32).reshape(num_rows, 4)[order]
+        self.team = column(team, (), np.int8, self.NO_TEAM)
+        self.team_color = column(team_color, (3,), np.float32, np.nan)
+        self.position = column(position, (2,), np.float32, np.nan)
+        self.projection = column(projection, (2,), np.float32, np.nan)
+        self.has_ball = column(has_ball, (), bool, False)
+        self.frame_offsets = np.searchsorted(self.frame, np.arange(num_frames + 1))
+
+        # Fields set through the dict view that have no column, keyed by row
+        self.extra: Dict[int, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_tracks(cls, tracks: Dict[str, List[Dict[int, Dict[str, Any]]]]) -> 'TrackTable':
+        """
+        Builds the table from the nested dict tracks returned by `Tracker.get_object_tracks`.
+
+        Args:
+            tracks (Dict[str, List[Dict[int, Dict]]]): Tracks per category, frame and track id.
+
+        Returns:
+            TrackTable: The columnar tracks. Unknown fields are kept in `extra`.
+        """
+        columns = {name: [] for name in ('frame', 'track_id', 'category', 'bbox') + cls.FIELDS[1:]}
+        extra = []
+        num_frames = max((len(tracks.get(category, [])) for category in cls.CATEGORIES), default=0)
+
+        for frame_num in range(num_frames):
+            for category_index, category in enumerate(cls.CATEGORIES):
+                frames = tracks.get(category, [])
+                if frame_num >= len(frames):
+                    continue
+                for track_id, track in frames[frame_num].items():
+                    if len(track.get('bbox', [])) != 4:
+                        continue
+                    columns['frame'].append(frame_num)
+                    columns['track_id'].append(track_id)
+                    columns['category'].append(category_index)
+                    columns['bbox'].append(track['bbox'])
+                    columns['team'].append(track.get('team', cls.NO_TEAM))
+                    columns['team_color'].append(_or_nan(track.get('team_color'), 3))
+                    columns['position'].append(_or_nan(track.get('position'), 2))
+                    columns['projection'].append(_or_nan(track.get('projection'), 2))
+                    columns['has_ball'].append(track.get('has_ball', False))
+                    extra.append({key: value for key, value in track.items() if key not in cls.FIELDS})
+
+        table = cls(
+            frame=np.array(columns['frame'], dtype=np.int64), track_id=np.array(columns['track_id'], dtype=np.int64),
+            category=np.array(columns['category'], dtype=np.int8),
+            bbox=np.array(columns['bbox'], dtype=np.float32).reshape(-1, 4), num_frames=num_frames,
+            team=np.array(columns['team']), team_color=np.array(columns['team_color']).reshape(-1, 3),
+            position=np.array(columns['position']).reshape(-1, 2),
+            projection=np.array(columns['projection']).reshape(-1, 2), has_ball=np.array(columns['has_ball'])
+        )
+        # Rows were appended in frame order, so row indices did not move
+        table.extra = {row: fields for row, fields in enumerate(extra) if fields}
+        return table
+
+    def to_tracks(self) -> Dict[str, List[Dict[int, Dict[str, Any]]]]:
+        """Returns the tracks as nested dicts, in the format of `Tracker.get_object_tracks`."""
+        return {
+            category: [{track_id: dict(track) for track_id, track in frame.items()} for frame in self[category]]
+            for category in self.CATEGORIES
+        }
+
+    def __len__(self) -> int:
+        """Returns the number of frames."""
+        return len(self.frame_offsets) - 1
+
+    @property
+    def num_rows(self) -> int:
+        """Returns the number of rows over all frames and categories."""
+        return len(self.frame)
+
+    def insert(self, frame_num: int, category: str, track_id: int, track: Dict[str, Any]) -> int:
+        """
+        Adds a track after the other rows of a frame. The rows after it move by one.
+
+        Args:
+            frame_num (int): Frame of the track.
+            category (str): One of `CATEGORIES`.
+            track_id (int): Track id.
+            track (Dict[str, Any]): Fields of the track, with at least its 'bbox'.
+
+        Returns:
+            int: Row of the new track.
+        """
+        if len(track.get('bbox', [])) != 4:
+            raise ValueError("A track needs a bbox of 4 values.")
+        row = int(self.frame_offsets[frame_num + 1])
+        values = {
+            'frame': frame_num, 'track_id': track_id, 'category': self.category_index(category),
+            'bbox': track['bbox'], 'team': track.get('team', self.NO_TEAM),
+            'team_color': _or_nan(track.get('team_color'), 3), 'position': _or_nan(track.get('position'), 2),
+            'projection': _or_nan(track.get('projection'), 2), 'has_ball': track.get('has_ball', False),
+        }
+        for name in self.COLUMNS:
+            setattr(self, name, np.insert(getattr(self, name), row, values[name], axis=0))
+        self.frame_offsets[frame_num + 1:] += 1
+
+        self.extra = {old_row + (old_row >= row): fields for old_row, fields in self.extra.items()}
+        fields = {key: value for key, value in track.items() if key not in self.FIELDS}
+        if fields:
+            self.extra[row] = fields
+        return row
+
+    def delete(self, row: int) -> None:
+        """Deletes a row. The rows after it move back by one."""
+        frame_num = int(self.frame[row])
+        for name in self.COLUMNS:
+            setattr(self, name, np.delete(getattr(self, name), row, axis=0))
+        self.frame_offsets[frame_num + 1:] -= 1
+        self.extra = {old_row - (old_row > row): fields for old_row, fields in self.extra.items() if old_row != row}
+
+    def frame_slice(self, frame_num: int) -> slice:
+        """Returns the rows of the given frame."""
+        return slice(self.frame_offsets[frame_num], self.frame_offsets[frame_num + 1])
+
+    def select(self, category: Optional[str] = None, start_frame: int = 0,
+               end_frame: Optional[int] = None, track_id: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the indices of the rows matching all the given filters, in frame order.
+
+        Args:
+            category (Optional[str]): One of `CATEGORIES`. None keeps all categories.
+            start_frame (int): First frame to keep.
+            end_frame (Optional[int]): Frame after the last one to keep. None keeps up to the end.
+            track_id (Optional[int]): Track to keep. None keeps all tracks.
+
+        Returns:
+            np.ndarray: Row indices.
+        """
+        end_frame = len(self) if end_frame is None else min(end_frame, len(self))
+        start_row, end_row = self.frame_offsets[start_frame], self.frame_offsets[max(end_frame, start_frame)]
+        mask = np.ones(end_row - start_row, dtype=bool)
+        if category is not None:
+            mask &= self.category[start_row:end_row] == self.category_index(category)
+        if track_id is not None:
+            mask &= self.track_id[start_row:end_row] == track_id
+        return start_row + np.flatnonzero(mask)
+
+    def category_index(self, category: str) -> int:
+        """Returns the index of a category name in `CATEGORIES`."""
+        if category not in self.CATEGORIES:
+            raise ValueError(f"{category} is not a track category. Choose one of {list(self.CATEGORIES)}.")
+        return self.CATEGORIES.index(category)
+
+    def centers(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns the bbox centers of the given rows (all rows if None), shape (n, 2)."""
+        bbox = self.bbox if rows is None else self.bbox[rows]
+        return (bbox[:, :2] + bbox[:, 2:]) / 2
+
+    def feet(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns the bottom center of the bbox of the given rows (all rows if None), shape (n, 2)."""
+        bbox = self.bbox if rows is None else self.bbox[rows]
+        return np.stack([(bbox[:, 0] + bbox[:, 2]) / 2, bbox[:, 3]], axis=1)
+
+    def per_frame(self, rows: np.ndarray, values: np.ndarray, fill: Any = np.nan) -> np.ndarray:
+        """
+        Scatters one value per row into one value per frame, e.g. the ball bbox of every frame.
+
+        Args:
+            rows (np.ndarray): Row indices, at most one per frame.
+            values (np.ndarray): Values of those rows.
+            fill (Any): Value of frames without a row.
+
+        Returns:
+            np.ndarray: Values indexed by frame.
+        """
+        values = np.asarray(values)
+        out = np.full((len(self),) + values.shape[1:], fill, dtype=np.result_type(values, np.asarray(fill)))
+        out[self.frame[rows]] = values
+        return out
+
+    def __getitem__(self, category: str) -> 'TrackCategoryView':
+        """Returns the dict-compatible view of a category: `table['players'][frame_num][track_id]`."""
+        return TrackCategoryView(self, self.category_index(category))
+
+    def __setitem__(self, category: str, frames: Sequence[Dict[int, Dict[str, Any]]]) -> None:
+        """Replaces all rows of a category with dict tracks, e.g. after ball interpolation."""
+        category_index = self.category_index(category)
+        replacement = TrackTable.from_tracks({category: list(frames)})
+        replacement.category[:] = category_index
+
+        keep = np.flatnonzero(self.category != category_index)
+        num_frames = max(len(self), len(replacement))
+        extra = {new_row: self.extra[row] for new_row, row in enumerate(keep) if row in self.extra}
+        extra.update({len(keep) + row: fields for row, fields in replacement.extra.items()})
+
+        merged = TrackTable(
+            frame=np.concatenate([self.frame[keep], replacement.frame]),
+            track_id=np.concatenate([self.track_id[keep], replacement.track_id]),
+            category=np.concatenate([self.category[keep], replacement.category]),
+            bbox=np.concatenate([self.bbox[keep], replacement.bbox]), num_frames=num_frames,
+            team=np.concatenate([self.team[keep], replacement.team]),
+            team_color=np.concatenate([self.team_color[keep], replacement.team_color]),
+            position=np.concatenate([self.position[keep], replacement.position]),
+            projection=np.concatenate([self.projection[keep], replacement.projection]),
+            has_ball=np.concatenate([self.has_ball[keep], replacement.has_ball])
+        )
+        order = np.argsort(np.concatenate([self.frame[keep], replacement.frame]), kind='stable')
+        new_row = np.empty_like(order)
+        new_row[order] = np.arange(len(order))
+        merged.extra = {int(new_row[row]): fields for row, fields in extra.items()}
+        self.__dict__.update(merged.__dict__)
+
+    def save(self, path: str) -> None:
+        """
+        Saves the columns to a `.npz` file. Fields in `extra` are not saved.
+
+        Args:
+            path (str): Path of the output file.
+        """
+        np.savez(
+            path, frame=self.frame, track_id=self.track_id, category=self.category, bbox=self.bbox,
+            num_frames=len(self), team=self.team, team_color=self.team_color, position=self.position,
+            projection=self.projection, has_ball=self.has_ball
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'TrackTable':
+        """
+        Loads a table saved with `save`.
+
+        Args:
+            path (str): Path of the `.npz` file.
+
+        Returns:
+            TrackTable: The loaded table.
+        """
+        with np.load(path) as data:
+            return cls(
+                frame=data['frame'], track_id=data['track_id'], category=data['category'], bbox=data['bbox'],
+                num_frames=int(data['num_frames']), team=data['team'], team_color=data['team_color'],
+                position=data['position'], projection=data['projection'], has_ball=data['has_ball']
+            )
+
+
+class TrackCategoryView(Sequence):
+    """List-like view of one category of a `TrackTable`, one `TrackFrameView` per frame."""
+
+    def __init__(self, table: TrackTable, category_index: int) -> None:
+        self.table = table
+        self.category_index = category_index
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, frame_num):
+        if isinstance(frame_num, slice):
+            return [self[i] for i in range(*frame_num.indices(len(self)))]
+        if frame_num < 0:
+            frame_num += len(self)
+        if not 0 <= frame_num < len(self):
+            raise IndexError("frame index out of range")
+        return TrackFrameView(self.table, self.category_index, frame_num)
+
+
+class TrackFrameView(MutableMapping):
+    """
+    Dict-like view of the tracks of one category in one frame, keyed by track id.
+    Setting a track id writes a whole track, adding a row if the id is new, and `del` removes its row.
+    """
+
+    def __init__(self, table: TrackTable, category_index: int, frame_num: int) -> None:
+        self.table = table
+        self.category_index = category_index
+        self.frame_num = frame_num
+
+    @property
+    def rows(self) -> Dict[int, int]:
+        """Row of each track id, read again on each access since writes move the rows."""
+        rows = self.table.frame_slice(self.frame_num)
+        in_category = self.table.category[rows] == self.category_index
+        return {int(track_id): int(row) for track_id, row in
+                zip(self.table.track_id[rows][in_category], rows.start + np.flatnonzero(in_category))}
+
+    def __getitem__(self, track_id: int) -> 'TrackView':
+        return TrackView(self.table, self.rows[track_id])
+
+    def __setitem__(self, track_id: int, track: Dict[str, Any]) -> None:
+        track = dict(track)  # The track may be a view of the row being replaced
+        row = self.rows.get(track_id)
+        if row is not None:
+            self.table.delete(row)
+        self.table.insert(self.frame_num, TrackTable.CATEGORIES[self.category_index], track_id, track)
+
+    def __delitem__(self, track_id: int) -> None:
+        self.table.delete(self.rows[track_id])
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class TrackView(MutableMapping):
+    """
+    Dict-like view of one row of a `TrackTable`. Reads and writes go to the columns;
+    fields that are not assigned (`NO_TEAM`, NaN positions, no ball) behave as missing keys.
+    """
+
+    def __init__(self, table: TrackTable, row: int) -> None:
+        self.table = table
+        self.row = row
+
+    def _has(self, key: str) -> bool:
+        if key == 'bbox':
+            return True
+        if key == 'has_ball':
+            return bool(self.table.has_ball[self.row])
+        if key == 'team':
+            return self.table.team[self.row] != TrackTable.NO_TEAM
+        if key in ('team_color', 'position', 'projection'):
+            return not np.isnan(getattr(self.table, key)[self.row]).any()
+        return key in self.table.extra.get(self.row, {})
+
+    def __getitem__(self, key: str) -> Any:
+        if not self._has(key):
+            raise KeyError(key)
+        if key == 'bbox':
+            return self.table.bbox[self.row].tolist()
+        if key == 'team':
+            return int(self.table.team[self.row])
+        if key == 'has_ball':
+            return bool(self.table.has_ball[self.row])
+        if key in ('team_color', 'position', 'projection'):
+            return getattr(self.table, key)[self.row].copy()
+        return self.table.extra[self.row][key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in TrackTable.FIELDS:
+            getattr(self.table, key)[self.row] = value
+        else:
+            self.table.extra.setdefault(self.row, {})[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if not self._has(key) or key == 'bbox':
+            raise KeyError(key)
+        if key == 'team':
+            self.table.team[self.row] = TrackTable.NO_TEAM
+        elif key == 'has_ball':
+            self.table.has_ball[self.row] = False
+        elif key in TrackTable.FIELDS:
+            getattr(self.table, key)[self.row] = np.nan
+        else:
+            del self.table.extra[self.row][key]
+
+    def __iter__(self) -> Iterator[str]:
+        fields = [field for field in TrackTable.FIELDS if self._has(field)]
+        return iter(fields + list(self.table.extra.get(self.row, {})))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def _or_nan(value: Any, size: int) -> np.ndarray:
+    """Returns the value as a float array, or NaNs if it is missing."""
+    if value is None:
+        return np.full(size, np.nan, dtype=np.float32)
+    return np.asarray(value, dtype=np.float32).reshape(size)
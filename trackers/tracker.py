@@ -1,33 +1,42 @@
-from ultralytics import YOLO
 import supervision as sv
 import numpy as np
-import pandas as pd
 import pickle
 import os
 import cv2
 import sys
 sys.path.append('../')
 from utils import get_center_of_bbox, get_bbox_width
-from sort import Sort  # Importando o SORT
+from .sort_tracker import SortTracker
+from .ball_interpolator import BallInterpolator
+from .possession_stats import PossessionStats
+from .inference_backend import TorchBackend
+from .batch_autotuner import autotune_batch_size
 
 class Tracker:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
-        self.tracker = Sort()  # Substituindo ByteTrack pelo SORT
+    def __init__(self, model_path, batch_size=None):
+        # batch_size: None tunes it for this machine on the first frame, like BaseTracker
+        self.model_path = model_path
+        self.backend = TorchBackend(model_path)
+        self.model = self.backend.model  # YOLO, whose results the tracking below reads
+        self.batch_size = batch_size
+        self.tracker = SortTracker()  # SORT vetorizado, sem o submódulo externo
     
-    def interpolate_ball_positions(self, ball_positions):
-        ball_positions = [x.get(1, {}).get('bbox', []) for x in ball_positions]
-        df_ball_positions = pd.DataFrame(ball_positions, columns=['x1', 'y1', 'x2', 'y2'])
-        
-        # Interpolate missing values
-        df_ball_positions = df_ball_positions.interpolate()
-        df_ball_positions = df_ball_positions.bfill()
-        
-        ball_positions = [{1: {"bbox": x}} for x in df_ball_positions.to_numpy().tolist()]
-        return ball_positions
+    def interpolate_ball_positions(self, ball_positions, max_gap=None, smoothing=None):
+        # max_gap: longest run of missing frames to fill (None fills any gap, like the old pandas version)
+        # smoothing: None for linear interpolation or 'kalman' for constant velocity smoothing
+        # Each frame gets {1: {"bbox": ..., "interpolated": bool}}, or {} if its gap was too long
+        return BallInterpolator(max_gap=max_gap, smoothing=smoothing).interpolate_tracks(ball_positions)
             
+    def get_batch_size(self, sample_frame):
+        # Tuned for this machine on the first frame, then kept
+        if self.batch_size is None:
+            self.batch_size = autotune_batch_size(self.backend, self.model_path, sample_frame, 0.10)
+        return self.batch_size
+
     def detect_frames(self, frames):
-        batch_size = 100
+        if len(frames) == 0:
+            return []
+        batch_size = self.get_batch_size(frames[0])
         detections = []
         for i in range(0, len(frames), batch_size):
             detections_batch = self.model.predict(frames[i:i + batch_size], conf=0.10)
@@ -55,29 +64,20 @@ class Tracker:
             # Convert to supervision Detection format
             detection_supervision = sv.Detections.from_ultralytics(detection)
             
-            # Prepara as detecções para o SORT
-            detections_to_sort = []
-            for i, (bbox, class_id) in enumerate(zip(detection_supervision.xyxy, detection_supervision.class_id)):
-                detections_to_sort.append((bbox[0], bbox[1], bbox[2], bbox[3], cls_names[class_id]))  # x1, y1, x2, y2, class
-
-            # Rastreamento usando o SORT
-            track_bbs_ids = self.tracker.update(np.array(detections_to_sort))
+            # Rastreamento usando o SORT: cada track mantém a classe da sua detecção
+            detection_with_tracks = self.tracker.update_with_detections(detection_supervision)
             
             tracks["players"].append({})
             tracks["referees"].append({})
             tracks["ball"].append({})
             
-            for track in track_bbs_ids:
-                bbox = track[:4]  # x1, y1, x2, y2
-                track_id = int(track[4])  # ID do rastreamento
-
-                # Verifica a classe do objeto
-                if track_id in detection_supervision.class_id:
-                    cls_id = detection_supervision.class_id[track_id]
-                    if cls_names[cls_id] == "player":
-                        tracks["players"][frame_num][track_id] = {"bbox": bbox}
-                    elif cls_names[cls_id] == "referee":
-                        tracks["referees"][frame_num][track_id] = {"bbox": bbox}
+            for bbox, cls_id, track_id in zip(detection_with_tracks.xyxy, detection_with_tracks.class_id,
+                                              detection_with_tracks.tracker_id):
+                track_id = int(track_id)  # ID do rastreamento
+                if cls_names[cls_id] in ("player", "goalkeeper"):
+                    tracks["players"][frame_num][track_id] = {"bbox": bbox.tolist()}
+                elif cls_names[cls_id] == "referee":
+                    tracks["referees"][frame_num][track_id] = {"bbox": bbox.tolist()}
             
             # Adicionar lógica para rastreamento da bola
             for frame_detection in detection_supervision:
@@ -159,18 +159,10 @@ class Tracker:
         alpha = 0.4
         cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
 
-        team_ball_control_till_frame = team_ball_control[:frame_num + 1]
-        # Obtém o número de vezes que cada time teve o controle da bola
-        team_1_num_frames = team_ball_control_till_frame[team_ball_control_till_frame == 1].shape[0]
-        team_2_num_frames = team_ball_control_till_frame[team_ball_control_till_frame == 2].shape[0]
-
-        # Evita divisão por zero
-        total_frames = team_1_num_frames + team_2_num_frames
-        if total_frames > 0:
-            team_1 = team_1_num_frames / total_frames
-            team_2 = team_2_num_frames / total_frames
-        else:
-            team_1, team_2 = 0, 0
+        # Posse acumulada até o frame atual, lida das somas de prefixo em tempo constante
+        if not isinstance(team_ball_control, PossessionStats):
+            team_ball_control = PossessionStats.from_array(team_ball_control[:frame_num + 1])
+        team_1, team_2 = team_ball_control.share_until(frame_num)  # Zero se nenhum time teve a bola
 
         # Exibe a porcentagem de posse de bola
         cv2.putText(frame, f"Team 1 Ball Control: {team_1 * 100:.2f}%", (1400, 900), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 3)
@@ -202,6 +194,7 @@ class Tracker:
         output_video_frames = []
         last_ball_position = None  # Variável para armazenar a última posição da bola
         last_team_ball_control = None  # Variável para armazenar a última posse de bola
+        possession = PossessionStats()  # Posse acumulada, atualizada a cada frame
 
         for frame_num, frame in enumerate(video_frames):
             frame = frame.copy()
@@ -242,9 +235,11 @@ class Tracker:
                 ball_position = last_ball_position  # Mantém a última posição
                 team_ball_control[frame_num] = last_team_ball_control  # Mantém a posse de bola
                 
+            possession.update(team_ball_control[frame_num])
+
             # Chama a função de controle da bola usando a última posição
             if last_ball_position is not None:
-                frame = self.draw_team_ball_control(frame, frame_num, team_ball_control, player_dict, last_ball_position)
+                frame = self.draw_team_ball_control(frame, frame_num, possession, player_dict, last_ball_position)
 
             output_video_frames.append(frame)
             
@@ -1,58 +1,132 @@
-from ultralytics import YOLO
 import supervision as sv
 import numpy as np
-import pandas as pd
 import pickle
+import itertools
 import os
 import cv2
 import sys
 sys.path.append('../')
-from utils import get_center_of_bbox, get_bbox_width
+from .detection_records import DetectionRecords
+from .inference_backend import create_backend
+from .batch_autotuner import autotune_batch_size
+from .ball_interpolator import BallInterpolator
+from .track_index import TrackIndex
+from .tracker_state import byte_track_state, restore_byte_track, skip_frames
+from .possession_stats import PossessionStats
+from utils import get_center_of_bbox, get_bbox_width, batch_frames, iter_frames, get_settings
 
 class Tracker:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, conf=0.10, backend=None, batch_size=None):
+        # backend: 'torch', 'onnx', 'openvino' or a backend instance (e.g. SyntheticBackend);
+        # None uses the INFERENCE_BACKEND setting
+        # batch_size: None tunes it for this machine on the first frames
+        self.model_path = model_path
+        self.device = None
+        self.model = create_backend(model_path, backend or get_settings().INFERENCE_BACKEND)
+        self.conf = conf
+        self.batch_size = batch_size
         self.tracker = sv.ByteTrack()
+        self.track_index = None  # TrackIndex of the last get_object_tracks call
     
-    def interpolate_ball_positions(self, ball_positions):
-        ball_positions = [x.get(1, {}).get('bbox', []) for x in ball_positions]
-        df_ball_positions = pd.DataFrame(ball_positions, columns=['x1', 'y1', 'x2', 'y2'])
-        
-        # Interpolate missing values
-        df_ball_positions = df_ball_positions.interpolate()
-        df_ball_positions = df_ball_positions.bfill()
-        
-        ball_positions = [{1: {"bbox": x}} for x in df_ball_positions.to_numpy().tolist()]
-        return ball_positions
+    def interpolate_ball_positions(self, ball_positions, max_gap=None, smoothing=None):
+        # max_gap: longest run of missing frames to fill (None fills any gap, like the old pandas version)
+        # smoothing: None for linear interpolation or 'kalman' for constant velocity smoothing
+        # Each frame gets {1: {"bbox": ..., "interpolated": bool}}, or {} if its gap was too long
+        return BallInterpolator(max_gap=max_gap, smoothing=smoothing).interpolate_tracks(ball_positions)
             
-    def detect_frames(self, frames):
-        batch_size = 20
-        detections = []
-        for i in range(0, len(frames), batch_size):
-            detections_batch = self.model.predict(frames[i:i + batch_size], conf=0.10)
-            detections += detections_batch
-        return detections
+    def get_batch_size(self, sample_frame):
+        # Tuned for this machine on the first frame that needs inference, then kept
+        if self.batch_size is None:
+            self.batch_size = autotune_batch_size(self.model, self.model_path, sample_frame, self.conf, self.device)
+        return self.batch_size
+
+    def iter_detection_chunks(self, frames, cache=None, start_frame=None):
+        # Accepts a list of frames or a FrameSource; only one chunk of frames is held at a time
+        # start_frame: index of the first frame in the video, for the cache (default: the FrameSource start)
+        if start_frame is None:
+            start_frame = getattr(frames, 'start_frame', 0)
+        frames = iter_frames(frames)
+        first_frame = next(frames, None)
+        if first_frame is None:
+            return
+        frames = itertools.chain([first_frame], frames)
+
+        chunk_size = cache.chunk_size if cache is not None else self.get_batch_size(first_frame)
+
+        for frames_chunk in batch_frames(frames, chunk_size):
+            end_frame = start_frame + len(frames_chunk)
+
+            # Chunks already in the cache skip inference entirely, including the batch size tuning
+            records = cache.load_chunk(start_frame, end_frame) if cache is not None else None
+            if records is None:
+                batch_size = self.get_batch_size(frames_chunk[0])
+                records = DetectionRecords.concatenate([
+                    self.model.predict(frames_chunk[i:i + batch_size], conf=self.conf)
+                    for i in range(0, len(frames_chunk), batch_size)
+                ])
+                if cache is not None:
+                    cache.save_chunk(start_frame, end_frame, records)
+
+            yield records
+            start_frame = end_frame
+
+    def iter_detections(self, frames, cache=None, start_frame=None):
+        # sv.Detections are built on demand from the compact records, one frame at a time
+        for records in self.iter_detection_chunks(frames, cache, start_frame):
+            yield from records.iter_detections()
+
+    def detect_frames(self, frames, cache=None):
+        return DetectionRecords.concatenate(list(self.iter_detection_chunks(frames, cache)))
     
-    def get_object_tracks(self, frames, read_from_stub=False, stub_path=None):
+    def state_dict(self):
+        # ByteTrack state at a frame boundary: active/lost tracks, Kalman state and id counters
+        return byte_track_state(self.tracker)
+
+    def load_state_dict(self, state):
+        # Continues tracking from a saved state; new track ids follow the saved ones
+        self.tracker = restore_byte_track(state)
+
+    def get_object_tracks(self, frames, read_from_stub=False, stub_path=None, cache=None, checkpoint=None):
+        # cache (DetectionCache): content-addressed detections, preferred over the stub pickle
+        # checkpoint (TrackerCheckpoint): saves tracks and tracker state periodically and resumes from them
+        # The TrackIndex of the tracks is kept in self.track_index and saved next to the stub
+        fps = getattr(frames, 'fps', None)
+        video = getattr(frames, 'video_path', None)
         if read_from_stub and stub_path is not None and os.path.exists(stub_path):
             with open(stub_path, 'rb') as f:
                 tracks = pickle.load(f)
+            index_path = TrackIndex.sidecar_path(stub_path)
+            if os.path.exists(index_path):
+                self.track_index = TrackIndex.load(index_path)
+            else:
+                self.track_index = TrackIndex.from_tracks(tracks, fps)
             return tracks
         
-        detections = self.detect_frames(frames)
-        
         tracks = {
             "players": [],
             "referees": [],
             "ball": []
         }
         
-        for frame_num, detection in enumerate(detections):
-            cls_names = detection.names
-            cls_names_inv = {v: k for k, v in cls_names.items()}
-            
-            # Convert to supervision Detection format
-            detection_supervision = sv.Detections.from_ultralytics(detection)
+        # Resume from the last checkpoint of this video, skipping the frames already tracked
+        frames_done, start_frame, tracked_in_chunk = 0, None, 0
+        resume = checkpoint.load(video) if checkpoint is not None else None
+        if resume is not None and resume['tracks'] is not None:
+            tracks = resume['tracks']
+            self.load_state_dict(resume['tracker'])
+            frames_done = len(tracks["players"])
+            # Detection restarts at the start of the cache chunk holding the next frame, so chunks keep
+            # their boundaries, and the frames of that chunk already tracked are dropped
+            tracked_in_chunk = frames_done % cache.chunk_size if cache is not None else 0
+            frames, start_frame = skip_frames(frames, frames_done - tracked_in_chunk)
+            print(f"Resuming tracking from frame {frames_done}.")
+
+        # Detections are consumed as they are produced so the frames can be released batch by batch
+        cls_names = self.model.names
+        cls_names_inv = {v: k for k, v in cls_names.items()}
+
+        detections = itertools.islice(self.iter_detections(frames, cache, start_frame), tracked_in_chunk, None)
+        for frame_num, detection_supervision in enumerate(detections, start=frames_done):
             
             # Convert GoalKeeper to player object
             for object_ind, class_id in enumerate(detection_supervision.class_id):
@@ -83,10 +157,18 @@ class Tracker:
 
                 if cls_id == cls_names_inv['ball']:
                     tracks["ball"][frame_num][1] = {"bbox": bbox}
+
+            if checkpoint is not None and checkpoint.due(frame_num + 1):
+                checkpoint.save(frame_num + 1, tracks, self.state_dict(), video)
                 
+        if checkpoint is not None:
+            checkpoint.save(len(tracks["players"]), tracks, self.state_dict(), video)
+
+        self.track_index = TrackIndex.from_tracks(tracks, fps)
         if stub_path is not None:
             with open(stub_path, 'wb') as f:
                 pickle.dump(tracks, f)
+            self.track_index.save(TrackIndex.sidecar_path(stub_path))
                 
         return tracks
     
@@ -156,18 +238,10 @@ class Tracker:
         alpha = 0.4
         cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
 
-        team_ball_control_till_frame = team_ball_control[:frame_num + 1]
-        # Obtém o número de vezes que cada time teve o controle da bola
-        team_1_num_frames = team_ball_control_till_frame[team_ball_control_till_frame == 1].shape[0]
-        team_2_num_frames = team_ball_control_till_frame[team_ball_control_till_frame == 2].shape[0]
-
-        # Evita divisão por zero
-        total_frames = team_1_num_frames + team_2_num_frames
-        if total_frames > 0:
-            team_1 = team_1_num_frames / total_frames
-            team_2 = team_2_num_frames / total_frames
-        else:
-            team_1, team_2 = 0, 0
+        # Posse acumulada até o frame atual, lida das somas de prefixo em tempo constante
+        if not isinstance(team_ball_control, PossessionStats):
+            team_ball_control = PossessionStats.from_array(team_ball_control[:frame_num + 1])
+        team_1, team_2 = team_ball_control.share_until(frame_num)  # Zero se nenhum time teve a bola
 
         # Exibe a porcentagem de posse de bola
         cv2.putText(frame, f"Team 1 Ball Control: {team_1 * 100:.2f}%", (1400, 900), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 3)
@@ -198,11 +272,15 @@ class Tracker:
 
 
     def draw_annotations(self, video_frames, tracks, team_ball_control):
-        output_video_frames = []
+        return list(self.annotate_frames(video_frames, tracks, team_ball_control))
+
+    def annotate_frames(self, video_frames, tracks, team_ball_control):
+        # Generator version of draw_annotations: accepts a FrameSource and yields one annotated frame at a time
         last_ball_position = None  # Variável para armazenar a última posição da bola
         last_team_ball_control = None  # Variável para armazenar a última posse de bola
+        possession = PossessionStats()  # Posse acumulada, atualizada a cada frame
 
-        for frame_num, frame in enumerate(video_frames):
+        for frame_num, frame in enumerate(iter_frames(video_frames)):
             frame = frame.copy()
             
             player_dict = tracks["players"][frame_num]
@@ -241,11 +319,11 @@ class Tracker:
                 ball_position = last_ball_position  # Mantém a última posição
                 team_ball_control[frame_num] = last_team_ball_control  # Mantém a posse de bola
                 
+            possession.update(team_ball_control[frame_num])
+
             # Chama a função de controle da bola usando a última posição
             if last_ball_position is not None:
-                frame = self.draw_team_ball_control(frame, frame_num, team_ball_control, player_dict, last_ball_position)
+                frame = self.draw_team_ball_control(frame, frame_num, possession, player_dict, last_ball_position)
 
-            output_video_frames.append(frame)
-            
-        return output_video_frames
+            yield frame
 
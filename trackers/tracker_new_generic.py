@@ -1,53 +1,87 @@
-from ultralytics import YOLO
+import itertools
 import supervision as sv
 import numpy as np
-import pandas as pd
 import pickle
 import os
 import cv2
 import sys
 sys.path.append('../')
-from utils import get_center_of_bbox, get_bbox_width
+from .ball_interpolator import BallInterpolator
+from .tracker_state import byte_track_state, restore_byte_track, skip_frames
+from .inference_backend import TorchBackend
+from .batch_autotuner import autotune_batch_size
+from utils import get_center_of_bbox, get_bbox_width, batch_frames, iter_frames
 
 class Tracker:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, batch_size=None):
+        # batch_size: None tunes it for this machine on the first frame, like BaseTracker
+        self.model_path = model_path
+        self.backend = TorchBackend(model_path)
+        self.model = self.backend.model  # YOLO, whose results the tracking below reads
+        self.batch_size = batch_size
         self.tracker = sv.ByteTrack()
     
-    def interpolate_ball_positions(self, ball_positions):
-        ball_positions = [x.get(1, {}).get('bbox', []) for x in ball_positions]
-        df_ball_positions = pd.DataFrame(ball_positions, columns=['x1', 'y1', 'x2', 'y2'])
-        
-        # Interpolate missing values
-        df_ball_positions = df_ball_positions.interpolate()
-        df_ball_positions = df_ball_positions.bfill()
-        
-        ball_positions = [{1: {"bbox": x}} for x in df_ball_positions.to_numpy().tolist()]
-        return ball_positions
+    def interpolate_ball_positions(self, ball_positions, max_gap=None, smoothing=None):
+        # max_gap: longest run of missing frames to fill (None fills any gap, like the old pandas version)
+        # smoothing: None for linear interpolation or 'kalman' for constant velocity smoothing
+        # Each frame gets {1: {"bbox": ..., "interpolated": bool}}, or {} if its gap was too long
+        return BallInterpolator(max_gap=max_gap, smoothing=smoothing).interpolate_tracks(ball_positions)
             
+    def get_batch_size(self, sample_frame):
+        # Tuned for this machine on the first frame, then kept
+        if self.batch_size is None:
+            self.batch_size = autotune_batch_size(self.backend, self.model_path, sample_frame, 0.10)
+        return self.batch_size
+
     def detect_frames(self, frames):
-        batch_size = 20
+        # Accepts a list of frames or a FrameSource
+        frames = iter_frames(frames)
+        first_frame = next(frames, None)
+        if first_frame is None:
+            return []
+        frames = itertools.chain([first_frame], frames)
+        batch_size = self.get_batch_size(first_frame)
         detections = []
-        for i in range(0, len(frames), batch_size):
-            detections_batch = self.model.predict(frames[i:i + batch_size], conf=0.10)
+        for frames_batch in batch_frames(frames, batch_size):
+            detections_batch = self.model.predict(frames_batch, conf=0.10)
             detections += detections_batch
         return detections
     
-    def get_object_tracks(self, frames, read_from_stub=False, stub_path=None):
+    def state_dict(self):
+        # ByteTrack state at a frame boundary: active/lost tracks, Kalman state and id counters
+        return byte_track_state(self.tracker)
+
+    def load_state_dict(self, state):
+        # Continues tracking from a saved state; new track ids follow the saved ones
+        self.tracker = restore_byte_track(state)
+
+    def get_object_tracks(self, frames, read_from_stub=False, stub_path=None, checkpoint=None):
+        # checkpoint (TrackerCheckpoint): saves tracks and tracker state periodically and resumes from them
         if read_from_stub and stub_path is not None and os.path.exists(stub_path):
             with open(stub_path, 'rb') as f:
                 tracks = pickle.load(f)
             return tracks
         
-        detections = self.detect_frames(frames)
-        
         tracks = {
             "players": [],
             "referees": [],
             "ball": []
         }
+
+        # Resume from the last checkpoint of this video, detecting only the frames not tracked yet
+        frames_done = 0
+        video = getattr(frames, 'video_path', None)
+        resume = checkpoint.load(video) if checkpoint is not None else None
+        if resume is not None and resume['tracks'] is not None:
+            tracks = resume['tracks']
+            self.load_state_dict(resume['tracker'])
+            frames_done = len(tracks["players"])
+            frames, _ = skip_frames(frames, frames_done)
+            print(f"Resuming tracking from frame {frames_done}.")
+
+        detections = self.detect_frames(frames)
         
-        for frame_num, detection in enumerate(detections):
+        for frame_num, detection in enumerate(detections, start=frames_done):
             cls_names = detection.names
             cls_names_inv = {v: k for k, v in cls_names.items()}
             
@@ -72,7 +106,13 @@ class Tracker:
                 
                 if cls_names[cls_id] == "sports ball":
                     tracks["ball"][frame_num][track_id] = {"bbox": bbox}
+
+            if checkpoint is not None and checkpoint.due(frame_num + 1):
+                checkpoint.save(frame_num + 1, tracks, self.state_dict(), video)
             
+        if checkpoint is not None:
+            checkpoint.save(len(tracks["players"]), tracks, self.state_dict(), video)
+
         if stub_path is not None:
             with open(stub_path, 'wb') as f:
                 pickle.dump(tracks, f)
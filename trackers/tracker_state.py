@@ -0,0 +1,204 @@
+import os
+import glob
+import pickle
+import itertools
+import supervision as sv
+from supervision.tracker.byte_tracker.basetrack import BaseTrack
+from supervision.tracker.byte_tracker.core import STrack
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from utils import FrameSource, iter_frames, files_fingerprint
+
+def byte_track_state(byte_track: sv.ByteTrack) -> Dict[str, Any]:
+    """
+    Snapshot of a `sv.ByteTrack` at a frame boundary.
+
+    The tracker is pickled whole: tracked, lost and removed tracks with their Kalman mean and
+    covariance, and the frame counter. The id counters are class attributes shared by all
+    ByteTrack instances, so they are saved separately. Removed tracks are first pruned to the
+    ones still in the lost tracks, the only ones the next update reads, so the snapshot does
+    not grow over a match with trackers that keep every removed track.
+
+    Args:
+        byte_track (sv.ByteTrack): The tracker.
+
+    Returns:
+        Dict[str, Any]: The picklable state.
+    """
+    lost = {_track_key(track) for track in byte_track.lost_tracks}
+    byte_track.removed_tracks = [track for track in byte_track.removed_tracks if _track_key(track) in lost]
+    return {
+        'byte_track': pickle.dumps(byte_track, protocol=pickle.HIGHEST_PROTOCOL),
+        'track_count': BaseTrack._count,
+        'external_count': STrack._external_count,
+    }
+
+
+def _track_key(track: STrack) -> int:
+    """Id ByteTrack compares tracks by: `internal_track_id` in recent supervision versions, `track_id` before."""
+    return track.internal_track_id if hasattr(track, 'internal_track_id') else track.track_id
+
+
+def restore_byte_track(state: Dict[str, Any]) -> sv.ByteTrack:
+    """
+    Rebuilds a `sv.ByteTrack` from `byte_track_state`, including the id counters, so new
+    tracks keep numbering where the snapshot left off.
+
+    Args:
+        state (Dict[str, Any]): The saved state.
+
+    Returns:
+        sv.ByteTrack: The restored tracker.
+    """
+    BaseTrack._count = state['track_count']
+    STrack._external_count = state['external_count']
+    return pickle.loads(state['byte_track'])
+
+
+def skip_frames(frames: Iterable, num_frames: int) -> Tuple[Iterable, int]:
+    """
+    Skips the first frames of a list or `FrameSource` without decoding them when possible.
+
+    Args:
+        frames (Iterable): List of frames or `FrameSource`.
+        num_frames (int): Number of frames to skip.
+
+    Returns:
+        Tuple[Iterable, int]: The remaining frames, and the index of their first frame in the video.
+    """
+    if isinstance(frames, FrameSource):
+        remaining = FrameSource(frames.video_path, frames.buffer_size, frames.start_frame + num_frames, frames.end_frame)
+        return remaining, remaining.start_frame
+    if isinstance(frames, (list, tuple)):
+        return frames[num_frames:], num_frames
+    return itertools.islice(iter_frames(frames), num_frames, None), num_frames
+
+
+class TrackerCheckpoint:
+    """
+    Periodic checkpoint of a tracking run, so a crashed run resumes from its last checkpoint.
+
+    The directory holds a small state file (tracker state, number of frames done, video with
+    its size and modification time, and any extra state such as the team cache) and the tracks in append-only segments, one per
+    checkpoint. A checkpoint writes only the tracks of the frames since the previous one,
+    so checkpointing often stays cheap on long matches. Files are written to a temporary
+    path and renamed, so a crash while saving leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, checkpoint_dir: str, every: int = 1000) -> None:
+        """
+        Initializes the checkpoint.
+
+        Args:
+            checkpoint_dir (str): Directory of the checkpoint, one per video.
+            every (int): Number of frames between checkpoints.
+        """
+        if every < 1:
+            raise ValueError("every must be at least 1.")
+        self.checkpoint_dir = checkpoint_dir
+        self.every = every
+        self.saved_frames = 0
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, 'state.pkl')
+
+    def segment_path(self, start_frame: int, end_frame: int) -> str:
+        """Returns the path of the tracks of frames `[start_frame, end_frame)`."""
+        return os.path.join(self.checkpoint_dir, f'tracks_{start_frame:09d}_{end_frame:09d}.pkl')
+
+    def load(self, video: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Loads the last checkpoint.
+
+        Args:
+            video (Optional[str]): Video being processed. A checkpoint of another video, or of a video
+                with the same path but another size or modification time, is ignored.
+
+        Returns:
+            Optional[Dict[str, Any]]: The state with the tracks of all checkpointed frames under 'tracks',
+                or None if there is no usable checkpoint.
+        """
+        state = self._read(self.state_path)
+        if state is None:
+            return None
+        if video is not None and (state.get('video') != video or state.get('video_key') != self._video_key(video)):
+            print(f"Checkpoint in {self.checkpoint_dir} belongs to another video ({state.get('video')}), ignoring it.")
+            return None
+
+        tracks = None
+        for start_frame, end_frame in state['segments']:
+            segment = self._read(self.segment_path(start_frame, end_frame))
+            if segment is None:
+                print(f"Checkpoint segment {start_frame}-{end_frame} is missing, ignoring the checkpoint.")
+                return None
+            if tracks is None:
+                tracks = segment
+            else:
+                for category, frames in segment.items():
+                    tracks[category] += frames
+
+        state['tracks'] = tracks
+        self.saved_frames = state['frames_done']
+        return state
+
+    def due(self, frames_done: int) -> bool:
+        """Returns whether a checkpoint should be saved after `frames_done` frames."""
+        return frames_done - self.saved_frames >= self.every
+
+    def save(self, frames_done: int, tracks: Dict[str, List], tracker_state: Dict[str, Any],
+             video: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Saves a checkpoint after `frames_done` frames.
+
+        Args:
+            frames_done (int): Number of frames whose tracks are complete.
+            tracks (Dict[str, List]): Tracks of all frames done so far. Only the new frames are written.
+            tracker_state (Dict[str, Any]): State of the tracker, e.g. from `Tracker.state_dict`.
+            video (Optional[str]): Video being processed.
+            extra (Optional[Dict[str, Any]]): Any other state to resume, e.g. the team cache.
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        previous = self._read(self.state_path) or {'segments': []}
+        segments = [segment for segment in previous['segments'] if segment[1] <= self.saved_frames]
+
+        if frames_done > self.saved_frames:
+            segment = {category: frames[self.saved_frames:frames_done] for category, frames in tracks.items()}
+            self._write(self.segment_path(self.saved_frames, frames_done), segment)
+            segments.append((self.saved_frames, frames_done))
+
+        self._write(self.state_path, {
+            'frames_done': frames_done, 'tracker': tracker_state, 'video': video,
+            'video_key': self._video_key(video),
+            'segments': segments, 'extra': extra or {},
+        })
+        self.saved_frames = frames_done
+
+    def clear(self) -> None:
+        """Deletes the checkpoint, e.g. once the results are saved elsewhere."""
+        for path in glob.glob(os.path.join(self.checkpoint_dir, '*.pkl')):
+            os.remove(path)
+        if os.path.isdir(self.checkpoint_dir) and not os.listdir(self.checkpoint_dir):
+            os.rmdir(self.checkpoint_dir)
+        self.saved_frames = 0
+
+    @staticmethod
+    def _video_key(video: Optional[str]) -> Optional[str]:
+        """Identity of the video file from its name, size and modification time."""
+        if video is None or not os.path.exists(video):
+            return None
+        return files_fingerprint([video])
+
+    def _read(self, path: str) -> Optional[Any]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _write(self, path: str, content: Any) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
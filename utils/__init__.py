@@ -1,4 +1,5 @@
-from .video_utils import read_video, save_video, process_video
-from .bbox_utils import xy_distance, point_distance, get_anchors_coordinates, get_bbox_width, get_center_of_bbox, measure_distance
+from .video_utils import read_video, save_video, process_video, FrameSource, VideoStreamWriter, iter_frames, batch_frames
+from .bbox_utils import xy_distance, point_distance, get_anchors_coordinates, get_bbox_width, get_center_of_bbox, measure_distance, box_iou
 from .config import get_settings, Settings
-from .file_maneger import file_loader, file_saver
\ No newline at end of file
+from .file_maneger import file_loader, file_saver
+from .detection_cache import DetectionCache, file_hash, files_fingerprint
\ No newline at end of file
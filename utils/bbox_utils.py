@@ -97,4 +97,23 @@ def xy_distance(p1: Tuple[float, float], p2: Tuple[float, float]) -> Tuple[float
     Returns:
         Tuple[float, float]: The horizontal and vertical distances between the two points.
     """
-    return p1[0] - p2[0], p1[1] - p2[1]
\ No newline at end of file
+    return p1[0] - p2[0], p1[1] - p2[1]
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Calculate the pairwise IoU between two sets of boxes with numpy broadcasting.
+
+    Args:
+        boxes_a (np.ndarray): Boxes of shape (n, 4) in xyxy format.
+        boxes_b (np.ndarray): Boxes of shape (m, 4) in xyxy format.
+
+    Returns:
+        np.ndarray: IoU matrix of shape (n, m).
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from dataclasses import field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 import torch
 
 class Settings(BaseSettings):
@@ -29,6 +29,8 @@ class Settings(BaseSettings):
 
     # Device
     DEVICE: Union[str, torch.device] = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    INFERENCE_BACKEND: str = "torch"  # "torch", "onnx" or "openvino" (CPU runtimes, see requirements_backends.txt)
+    BATCH_MEMORY_CEILING_MB: Optional[float] = None  # Memory limit for the batch size autotuner, None for automatic
     INPUT_VIDEO_PATH: str = "input_videos/"
     INPUT_VIDEO_NAME: str = "output_video_000.mp4"
 
@@ -0,0 +1,189 @@
+import os
+import glob
+import pickle
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+_file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Compute the content hash of a file, reading it in blocks.
+
+    The result is memoized by path, size and modification time, so hashing the same
+    video or weights file again in the same process is free.
+
+    Args:
+        path (str): Path to the file.
+        block_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: Hexadecimal BLAKE2b digest of the file content.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _file_hashes:
+        return _file_hashes[memo_key]
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    _file_hashes[memo_key] = digest.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def files_fingerprint(paths: List[str]) -> str:
+    """
+    Compute a cheap identity of a set of files from their names, sizes and modification times.
+
+    Unlike `file_hash`, no content is read, so it suits keying the state of a whole match
+    split in many large video parts.
+
+    Args:
+        paths (List[str]): Paths to the files, in order.
+
+    Returns:
+        str: Hexadecimal BLAKE2b digest of the file names, sizes and modification times.
+    """
+    digest = hashlib.blake2b(digest_size=10)
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f'{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """
+    Content-addressed cache for per-frame detections.
+
+    Entries are keyed by the video content hash, the model weights hash and the confidence
+    threshold, so changing any of them never reuses stale results. Detections are stored
+    in chunks named after their frame index range: an interrupted run resumes from the
+    last complete chunk, and each chunk can be loaded on its own.
+    """
+
+    def __init__(self, video_path: str, model_path: str, conf: float,
+                 namespace: str = 'detections', chunk_size: int = 500,
+                 cache_dir: str = './stub/detection_cache') -> None:
+        """
+        Initializes the cache for one video, model and confidence threshold.
+
+        Args:
+            video_path (str): Path to the video the detections come from.
+            model_path (str): Path to the model weights used for the detections.
+            conf (float): Confidence threshold used for the detections.
+            namespace (str): Name separating different kinds of detections, e.g. objects and keypoints.
+            chunk_size (int): Number of frames stored in each chunk.
+            cache_dir (str): Root directory of the cache.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+
+        self.video_hash = file_hash(video_path)
+        self.model_hash = file_hash(model_path)
+        self.conf = conf
+        self.namespace = namespace
+        self.chunk_size = chunk_size
+
+        key = hashlib.blake2b(
+            f'{self.video_hash}:{self.model_hash}:{conf:.6f}:{namespace}'.encode(), digest_size=16
+        ).hexdigest()
+        self.cache_dir = os.path.join(cache_dir, namespace, key)
+
+    def chunk_path(self, start_frame: int, end_frame: int) -> str:
+        """Returns the path of the chunk holding frames `[start_frame, end_frame)`."""
+        return os.path.join(self.cache_dir, f'chunk_{start_frame:09d}_{end_frame:09d}.pkl')
+
+    def has_chunk(self, start_frame: int, end_frame: int) -> bool:
+        """Returns whether the chunk holding frames `[start_frame, end_frame)` is cached."""
+        return os.path.exists(self.chunk_path(start_frame, end_frame))
+
+    def load_chunk(self, start_frame: int, end_frame: int) -> Optional[List[Any]]:
+        """
+        Load the detections of frames `[start_frame, end_frame)`.
+
+        Args:
+            start_frame (int): Index of the first frame of the chunk.
+            end_frame (int): Index after the last frame of the chunk.
+
+        Returns:
+            Optional[List[Any]]: One detection per frame, or None if the chunk is missing or unreadable.
+        """
+        chunk_path = self.chunk_path(start_frame, end_frame)
+        if not os.path.exists(chunk_path):
+            return None
+
+        try:
+            with open(chunk_path, 'rb') as f:
+                chunk = pickle.load(f)
+        except Exception:
+            return None
+
+        detections = chunk.get('detections')
+        if detections is None or len(detections) != end_frame - start_frame:
+            return None
+        return detections
+
+    def save_chunk(self, start_frame: int, end_frame: int, detections: List[Any]) -> None:
+        """
+        Store the detections of frames `[start_frame, end_frame)`.
+
+        The chunk is written to a temporary file first and then renamed, so a crash while
+        saving never leaves a truncated chunk behind.
+
+        Args:
+            start_frame (int): Index of the first frame of the chunk.
+            end_frame (int): Index after the last frame of the chunk.
+            detections (List[Any]): One detection per frame.
+        """
+        if len(detections) != end_frame - start_frame:
+            raise ValueError("The number of detections does not match the chunk frame range.")
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        chunk_path = self.chunk_path(start_frame, end_frame)
+        tmp_path = chunk_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'start_frame': start_frame,
+                'end_frame': end_frame,
+                'video_hash': self.video_hash,
+                'model_hash': self.model_hash,
+                'conf': self.conf,
+                'detections': detections,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, chunk_path)
+
+    def cached_ranges(self) -> List[Tuple[int, int]]:
+        """Returns the `(start_frame, end_frame)` ranges of all cached chunks, in order."""
+        ranges = []
+        for chunk_path in glob.glob(os.path.join(self.cache_dir, 'chunk_*_*.pkl')):
+            _, start_frame, end_frame = os.path.basename(chunk_path)[:-len('.pkl')].split('_')
+            ranges.append((int(start_frame), int(end_frame)))
+        return sorted(ranges)
+
+    def load_range(self, start_frame: int, end_frame: int) -> Optional[List[Any]]:
+        """
+        Load the detections of frames `[start_frame, end_frame)` from consecutive chunks.
+
+        Args:
+            start_frame (int): Index of the first frame.
+            end_frame (int): Index after the last frame.
+
+        Returns:
+            Optional[List[Any]]: One detection per frame, or None if any frame is not cached.
+        """
+        detections = []
+        frame_num = start_frame
+        for chunk_start, chunk_end in self.cached_ranges():
+            if chunk_end <= frame_num or chunk_start > frame_num:
+                continue
+            chunk = self.load_chunk(chunk_start, chunk_end)
+            if chunk is None:
+                return None
+            detections += chunk[frame_num - chunk_start:min(chunk_end, end_frame) - chunk_start]
+            frame_num = min(chunk_end, end_frame)
+            if frame_num >= end_frame:
+                return detections
+        return None
@@ -7,9 +7,144 @@ import tempfile
 import time
 import signal
 import traceback
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional, Union
 import numpy as np
 
+class FrameSource:
+    """
+    Iterable video reader that decodes frames on a background thread into a bounded
+    read-ahead buffer, so memory is set by `buffer_size` and not by the video length.
+
+    Every iteration opens the video again, which allows several passes over the same
+    match (tracking, team assignment, annotation) without keeping the frames in memory.
+    Iterating yields `(frame_index, timestamp, frame)` tuples, with the timestamp in seconds.
+    """
+
+    def __init__(self, video_path: str, buffer_size: int = 64,
+                 start_frame: int = 0, end_frame: Optional[int] = None) -> None:
+        """
+        Initializes the frame source.
+
+        Args:
+            video_path (str): Path to the video file.
+            buffer_size (int): Maximum number of decoded frames waiting to be consumed.
+            start_frame (int): Index of the first frame to yield.
+            end_frame (Optional[int]): Index after the last frame to yield. None reads to the end.
+        """
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be at least 1.")
+
+        self.video_path = video_path
+        self.buffer_size = buffer_size
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video source: {video_path}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        cap.release()
+
+    def __len__(self) -> int:
+        end_frame = self.frame_count if self.end_frame is None else min(self.end_frame, self.frame_count)
+        return max(end_frame - self.start_frame, 0)
+
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        cap = cv2.VideoCapture(self.video_path)
+        if self.start_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+
+        buffer = queue.Queue(maxsize=self.buffer_size)
+        stop_event = threading.Event()
+
+        def reader() -> None:
+            """Decode frames into the buffer until the end of the video or a stop request."""
+            frame_index = self.start_frame
+            try:
+                while not stop_event.is_set():
+                    if self.end_frame is not None and frame_index >= self.end_frame:
+                        break
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    timestamp = frame_index / self.fps if self.fps > 0 else 0.0
+                    item = (frame_index, timestamp, frame)
+                    # Block while the buffer is full, but keep checking for a stop request
+                    while not stop_event.is_set():
+                        try:
+                            buffer.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    frame_index += 1
+            finally:
+                buffer.put(None)
+
+        thread = threading.Thread(target=reader, daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                item = buffer.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            stop_event.set()
+            # Drain the buffer so the reader is never blocked on a full queue
+            while thread.is_alive():
+                try:
+                    buffer.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
+            cap.release()
+
+    def frames(self) -> Iterator[np.ndarray]:
+        """Yields only the decoded frames, without index and timestamp."""
+        for _, _, frame in self:
+            yield frame
+
+
+def iter_frames(frames: Union[Iterable[np.ndarray], Iterable[Tuple[int, float, np.ndarray]]]) -> Iterator[np.ndarray]:
+    """
+    Iterate over the frames of a list of frames, a `FrameSource` or any iterable of
+    `(frame_index, timestamp, frame)` tuples.
+
+    Args:
+        frames: The frames to iterate over.
+
+    Returns:
+        Iterator[np.ndarray]: The frames, one at a time.
+    """
+    for item in frames:
+        yield item[2] if isinstance(item, tuple) else item
+
+
+def batch_frames(frames: Union[Iterable[np.ndarray], Iterable[Tuple[int, float, np.ndarray]]],
+                 batch_size: int) -> Iterator[List[np.ndarray]]:
+    """
+    Group the frames of any frame iterable in lists of at most `batch_size` frames.
+
+    Args:
+        frames: The frames to group, in any format accepted by `iter_frames`.
+        batch_size (int): Maximum number of frames in a batch.
+
+    Returns:
+        Iterator[List[np.ndarray]]: The frame batches.
+    """
+    batch = []
+    for frame in iter_frames(frames):
+        batch.append(frame)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def read_video(video_path):
     cap = cv2.VideoCapture(video_path)
     frames = []
@@ -20,12 +155,138 @@ def read_video(video_path):
         frames.append(frame)
     return frames
 
-def save_video(ouput_video_frames,output_video_path):
-    fourcc = cv2.VideoWriter_fourcc(*'XVID')
-    out = cv2.VideoWriter(output_video_path, fourcc, 24, (ouput_video_frames[0].shape[1], ouput_video_frames[0].shape[0]))
-    for frame in ouput_video_frames:
-        out.write(frame)
-    out.release()
+class VideoStreamWriter:
+    """
+    Context-managed video writer that encodes frames on a background thread.
+
+    Frames are accepted one at a time or in batches and handed to the encoder through a
+    bounded queue, so the memory used for the output is constant and encoding overlaps
+    with the rest of the pipeline.
+    """
+
+    def __init__(self, output_video_path: str, fps: float = 24,
+                 frame_size: Optional[Tuple[int, int]] = None,
+                 fourcc: Optional[str] = None, queue_size: int = 64) -> None:
+        """
+        Initializes the writer and starts the encoder thread.
+
+        Args:
+            output_video_path (str): Path of the output video.
+            fps (float): Frames per second of the output video.
+            frame_size (Optional[Tuple[int, int]]): Output (width, height). Frames of a different
+                size are resized. None uses the size of the first written frame.
+            fourcc (Optional[str]): Four character codec code. None picks XVID for .avi and mp4v otherwise.
+            queue_size (int): Maximum number of frames waiting to be encoded.
+        """
+        self.output_video_path = output_video_path
+        self.fps = fps if fps and fps > 0 else 24
+        self.frame_size = frame_size
+        self.fourcc = fourcc or ('XVID' if output_video_path.lower().endswith('.avi') else 'mp4v')
+        self.frames_written = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._encode, name='video-writer', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_source(cls, output_video_path: str, source: Union[str, 'FrameSource', cv2.VideoCapture],
+                    **kwargs) -> 'VideoStreamWriter':
+        """
+        Creates a writer with the fps and frame size of the source video.
+
+        Args:
+            output_video_path (str): Path of the output video.
+            source (Union[str, FrameSource, cv2.VideoCapture]): Source video path, frame source or capture.
+            **kwargs: Extra arguments for the writer, e.g. `fourcc` or `queue_size`.
+
+        Returns:
+            VideoStreamWriter: The writer, already started.
+        """
+        if isinstance(source, FrameSource):
+            fps, frame_size = source.fps, source.frame_size
+        else:
+            cap = cv2.VideoCapture(source) if isinstance(source, str) else source
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            if isinstance(source, str):
+                cap.release()
+
+        kwargs.setdefault('frame_size', frame_size if frame_size[0] > 0 and frame_size[1] > 0 else None)
+        return cls(output_video_path, fps=fps, **kwargs)
+
+    def write(self, frame: np.ndarray) -> None:
+        """
+        Queues a frame for encoding, waiting while the queue is full.
+
+        Args:
+            frame (np.ndarray): The BGR frame to write.
+        """
+        self._raise_if_failed()
+        if self._closed:
+            raise ValueError("Cannot write to a closed VideoStreamWriter.")
+        self._queue.put(frame)
+
+    def write_batch(self, frames: Iterable[np.ndarray]) -> None:
+        """
+        Queues several frames for encoding.
+
+        Args:
+            frames (Iterable[np.ndarray]): The frames to write, in any format accepted by `iter_frames`.
+        """
+        for frame in iter_frames(frames):
+            self.write(frame)
+
+    def close(self) -> None:
+        """Waits for the queued frames to be encoded and releases the output file."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_if_failed()
+
+    def __enter__(self) -> 'VideoStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        self.close()
+
+    def _encode(self) -> None:
+        """Encoder thread: writes queued frames until the end-of-stream marker is received."""
+        writer = None
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                if self._error is not None:
+                    continue  # Keep draining so producers never block after a failure
+                try:
+                    if writer is None:
+                        if self.frame_size is None:
+                            self.frame_size = (frame.shape[1], frame.shape[0])
+                        writer = cv2.VideoWriter(self.output_video_path, cv2.VideoWriter_fourcc(*self.fourcc),
+                                                 self.fps, self.frame_size)
+                    if (frame.shape[1], frame.shape[0]) != self.frame_size:
+                        frame = cv2.resize(frame, self.frame_size)
+                    writer.write(frame)
+                    self.frames_written += 1
+                except Exception as e:
+                    self._error = e
+        finally:
+            if writer is not None:
+                writer.release()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Failed to encode {self.output_video_path}") from self._error
+
+
+def save_video(ouput_video_frames, output_video_path, fps: float = 24):
+    # Accepts any frame iterable (e.g. Tracker.annotate_frames) and encodes it incrementally
+    with VideoStreamWriter(output_video_path, fps=fps) as writer:
+        writer.write_batch(ouput_video_frames)
     
 def process_video(processor = None, video_source: str = 0, output_video: Optional[str] = "output.mp4", 
                   batch_size: int = 30, skip_seconds: int = 0) -> None:
@@ -39,7 +300,7 @@ def process_video(processor = None, video_source: str = 0, output_video: Optiona
         batch_size (int, optional): Number of frames to process at once.
         skip_seconds (int, optional): Seconds to skip at the beginning of the video.
     """
-    from annotation import AbstractVideoProcessor  # Lazy import
+    from annotation.abstract_video_processor import AbstractVideoProcessor  # Lazy import
 
     if processor is not None and not isinstance(processor, AbstractVideoProcessor):
         raise ValueError("The processor must be an instance of AbstractVideoProcessor.")
@@ -50,7 +311,7 @@ def process_video(processor = None, video_source: str = 0, output_video: Optiona
         print("Error: Could not open video source.")
         return
 
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    fps = cap.get(cv2.CAP_PROP_FPS)  # Kept fractional, e.g. 29.97, so the output stays in sync
     frames_to_skip = int(skip_seconds * fps)
 
     # Skip the first 'frames_to_skip' frames
@@ -58,7 +319,6 @@ def process_video(processor = None, video_source: str = 0, output_video: Optiona
         cap.read()  # Simply read and discard the frames
 
     frame_queue = queue.Queue(maxsize=100)
-    processed_queue = queue.Queue(maxsize=100)
     stop_event = threading.Event()
     
     def signal_handler(signum, frame):
@@ -67,4 +327,101 @@ def process_video(processor = None, video_source: str = 0, output_video: Optiona
         print("Interrupt received, initiating shutdown...")
         stop_event.set()
 
-    signal.signal(signal.SIGINT, signal_handler)
\ No newline at end of file
+    previous_handler = signal.signal(signal.SIGINT, signal_handler)
+
+    stats = {'decoded': 0, 'processed': 0, 'process_time': 0.0}
+
+    # The writer encodes on its own thread through a bounded queue (encode stage)
+    writer = VideoStreamWriter(output_video, fps=fps, queue_size=100) if output_video is not None else None
+
+    def decode_worker() -> None:
+        """Read frames from the capture into the frame queue until the video ends or a stop is requested."""
+        try:
+            while not stop_event.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if not _put_until_stopped(frame_queue, frame, stop_event):
+                    break
+                stats['decoded'] += 1
+        except Exception:
+            traceback.print_exc()
+            stop_event.set()
+        finally:
+            frame_queue.put(None)
+
+    decoder = threading.Thread(target=decode_worker, name='decoder', daemon=True)
+
+    start_time = time.perf_counter()
+    decoder.start()
+
+    try:
+        # Inference runs on the calling thread while decoding and encoding run in the background
+        finished = False
+        while not finished:
+            batch = []
+            while len(batch) < batch_size:
+                frame = frame_queue.get()
+                if frame is None:
+                    finished = True
+                    break
+                batch.append(frame)
+
+            if not batch:
+                break
+
+            process_start = time.perf_counter()
+            processed_batch = processor.process(batch, fps) if processor is not None else batch
+            stats['process_time'] += time.perf_counter() - process_start
+            stats['processed'] += len(batch)
+
+            if writer is not None:
+                writer.write_batch(processed_batch)
+
+            if stop_event.is_set():
+                break
+    except Exception:
+        traceback.print_exc()
+        stop_event.set()
+    finally:
+        stop_event.set()
+        # Unblock the decoder if it is waiting on a full queue, then flush the encoder
+        while decoder.is_alive():
+            try:
+                frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        decoder.join()
+        cap.release()
+        signal.signal(signal.SIGINT, previous_handler)
+        if writer is not None:
+            writer.close()
+        if processor is not None:
+            processor.close()
+
+    elapsed = time.perf_counter() - start_time
+    written = writer.frames_written if writer is not None else 0
+    print(f"Decoded {stats['decoded']} frames, processed {stats['processed']}, written {written} "
+          f"in {elapsed:.2f}s ({stats['processed'] / max(elapsed, 1e-6):.2f} FPS overall, "
+          f"{stats['processed'] / max(stats['process_time'], 1e-6):.2f} FPS in processing)")
+
+
+def _put_until_stopped(target_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+    """
+    Put an item in a bounded queue, waiting while it is full unless a stop is requested.
+
+    Args:
+        target_queue (queue.Queue): The queue to put the item in.
+        item: The item to put in the queue.
+        stop_event (threading.Event): Event signalling that the pipeline is shutting down.
+
+    Returns:
+        bool: True if the item was queued, False if the pipeline stopped first.
+    """
+    while not stop_event.is_set():
+        try:
+            target_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
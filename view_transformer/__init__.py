@@ -1,4 +1,5 @@
 from .base import BaseTransformer
 from .homography import Homography
 from .view_transformer import ViewTransformer
-from .camera_moviment_estimator import CameraMovementEstimator
\ No newline at end of file
+from .camera_moviment_estimator import CameraMovementEstimator
+from .keyframe_scheduler import KeyframeScheduler
\ No newline at end of file
@@ -1,79 +1,216 @@
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import os
 import cv2
 import numpy as np
-from utils import point_distance, xy_distance
+from utils import FrameSource, iter_frames
 
 class CameraMovementEstimator():
-    
-    def __init__(self, frame: np.ndarray):
+    """
+    Estimates the camera movement between consecutive frames with Lucas-Kanade optical flow.
+
+    Frames are converted to grayscale on a downscaled pyramid level, so the cost per frame
+    stays small and about the same at any input resolution. Features are only taken from a
+    mask of static areas, and the movement of a frame is the median displacement (old position
+    minus new position) of the tracked features, scaled back to input pixels. The median keeps
+    a few badly tracked features, whose error the scaling would multiply, from moving the estimate. Frames are
+    processed one at a time with `update`, or all at once with `get_camera_movement`.
+    """
+
+    def __init__(self, frame: Optional[np.ndarray] = None, pyramid_level: Optional[int] = None,
+                 max_width: int = 640, mask: Optional[np.ndarray] = None,
+                 mask_columns: Tuple[Tuple[float, float], ...] = ((0, 20 / 1920), (900 / 1920, 1050 / 1920))):
         """
-        Initialize the CameraMovementEstimator object with the first frame of the video
+        Initialize the CameraMovementEstimator object
 
         Args:
-            frame (np.ndarray): The first frame of the video
+            frame (Optional[np.ndarray]): The first frame of the video, used for its size. If None, the
+                size is taken from the first frame given to `update`.
+            pyramid_level (Optional[int]): Pyramid level the flow runs on, each level halving the frame size.
+                None picks the lowest level whose width is at most `max_width`.
+            max_width (int): Maximum width of the working frames when `pyramid_level` is None.
+            mask (Optional[np.ndarray]): Mask of the areas to take features from, at the input resolution,
+                e.g. built from the pitch mask. None builds it from `mask_columns`.
+            mask_columns (Tuple[Tuple[float, float], ...]): Column ranges of the feature mask, as fractions of the
+                frame width. The defaults are the borders used at 1920 pixels wide.
         """
         self.minimum_distance = 5 # Minimum distance between two points to consider them as the same point in pixels
+        self.params = dict(pyramid_level=pyramid_level, max_width=max_width, mask=mask, mask_columns=mask_columns)
+        self.seam_errors: List[float] = [] # Cumulative movement mismatch at each seam of the last parallel run
+        self.pyramid_level = pyramid_level
+        self.max_width = max_width
+        self.input_mask = mask
+        self.mask_columns = mask_columns
 
         self.lk_params = dict(
             winSize = (15,15),
             maxLevel = 2,
             criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
-        ) # Parameters for the Lucas-Kanade optical flow algorithm 
-
-        first_frame_grayscale = cv2.cvtColor(frame,cv2.COLOR_BGR2GRAY) # Convert the first frame to grayscale
-
-        mask_features = np.zeros_like(first_frame_grayscale) # Create a mask to limit the features to the field area 
-        mask_features[:,0:20] = 1 # Left border
-        mask_features[:,900:1050] = 1 # Right border
+        ) # Parameters for the Lucas-Kanade optical flow algorithm
+
+        self.features = None
+        self.reset()
+        if frame is not None:
+            self._setup(frame.shape[:2])
+
+    def reset(self) -> None:
+        """Forgets the previous frame, so the next frame starts a new video."""
+        self.old_gray = None
+        self.old_features = None
+
+    def _setup(self, frame_shape: Tuple[int, int]) -> None:
+        """Chooses the working pyramid level and builds the feature mask for the frame size."""
+        height, width = frame_shape
+        if self.pyramid_level is None:
+            self.level = 0
+            while width >> self.level > self.max_width:
+                self.level += 1
+        else:
+            self.level = self.pyramid_level
+        self.scale = 2 ** self.level
+        self.working_size = (max(width // self.scale, 1), max(height // self.scale, 1))
+
+        if self.input_mask is not None:
+            mask_features = cv2.resize(self.input_mask.astype(np.uint8), self.working_size, interpolation=cv2.INTER_NEAREST)
+        else:
+            mask_features = np.zeros((self.working_size[1], self.working_size[0]), dtype=np.uint8) # Mask to limit the features to static areas
+            for start, end in self.mask_columns:
+                mask_features[:, int(start * self.working_size[0]):int(np.ceil(end * self.working_size[0]))] = 1
 
         self.features = dict(
             maxCorners = 100,
             qualityLevel = 0.3,
-            minDistance =3,
+            minDistance = max(3 // self.scale, 1),
             blockSize = 7,
             mask = mask_features
-        ) # Parameters for the goodFeaturesToTrack function to detect features in the first frame of the video 
+        ) # Parameters for the goodFeaturesToTrack function to detect features
+        self.frame_shape = frame_shape
+
+    def _gray(self, frame: np.ndarray) -> np.ndarray:
+        """Downscales a frame to the working size and converts it to grayscale."""
+        if self.scale > 1:
+            frame = cv2.resize(frame, self.working_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    def update(self, frame: np.ndarray) -> List[float]:
+        """
+        Estimate the camera movement of a frame relative to the previous one
+
+        Args:
+            frame (np.ndarray): The next frame of the video
+
+        Returns:
+            List[float]: The camera movement [x, y] in input pixels, [0, 0] for the first frame or when
+                the camera did not move more than `minimum_distance`
+        """
+        if self.features is None or frame.shape[:2] != self.frame_shape:
+            self._setup(frame.shape[:2])
+            self.reset()
+
+        frame_gray = self._gray(frame)
+        if self.old_gray is None or self.old_features is None or len(self.old_features) == 0:
+            self.old_gray = frame_gray
+            self.old_features = cv2.goodFeaturesToTrack(frame_gray, **self.features)
+            return [0, 0]
+
+        new_features, status, _ = cv2.calcOpticalFlowPyrLK(self.old_gray, frame_gray, self.old_features, None, **self.lk_params)
+
+        # Median displacement of the tracked features, in input pixels
+        camera_movement = [0, 0]
+        tracked = status.ravel() == 1
+        if tracked.any():
+            displacement = (self.old_features[tracked] - new_features[tracked]).reshape(-1, 2)
+            movement = np.median(displacement, axis=0) * self.scale
+
+            if np.hypot(*movement) > self.minimum_distance:
+                camera_movement = movement.tolist()
+                self.old_features = cv2.goodFeaturesToTrack(frame_gray, **self.features)
+        else:
+            self.old_features = cv2.goodFeaturesToTrack(frame_gray, **self.features)
+
+        self.old_gray = frame_gray
+        return camera_movement
 
-    def get_camera_movement(self, frames: List[np.ndarray]) -> List[List[int]]:
+    def get_camera_movement(self, frames: Iterable[np.ndarray]) -> List[List[float]]:
         """
         Estimate the camera movement in each frame of the video using the Lucas-Kanade optical flow algorithm
 
         Args:
-            frames (List[np.ndarray]): A list of frames of the video
+            frames (Iterable[np.ndarray]): A list of frames of the video or a FrameSource
 
         Returns:
-            List[List[int]]: A list of the camera movement in each frame of the video
+            List[List[float]]: A list of the camera movement in each frame of the video
         """
-        camera_movement = [[0,0]]*len(frames)
-
-        old_gray = cv2.cvtColor(frames[0],cv2.COLOR_BGR2GRAY)
-        old_features = cv2.goodFeaturesToTrack(old_gray,**self.features)
-
-        for frame_num in range(1,len(frames)):
-            frame_gray = cv2.cvtColor(frames[frame_num],cv2.COLOR_BGR2GRAY)
-            new_features, _,_ = cv2.calcOpticalFlowPyrLK(old_gray,frame_gray,old_features,None,**self.lk_params)
-            
-            max_distance = 0
-            camera_movement_x, camera_movement_y = 0,0
-
-            for i, (new,old) in enumerate(zip(new_features,old_features)):
-                
-                new_features_point = new.ravel()
-                old_features_point = old.ravel()
-
-                distance = point_distance(new_features_point,old_features_point)
-                
-                if distance>max_distance:
-                    max_distance = distance
-                    camera_movement_x,camera_movement_y = xy_distance(old_features_point, new_features_point ) 
-            
-            if max_distance > self.minimum_distance:
-                camera_movement[frame_num] = [camera_movement_x,camera_movement_y]
-                old_features = cv2.goodFeaturesToTrack(frame_gray,**self.features)
-
-            old_gray = frame_gray.copy()
+        self.reset()
+        return [self.update(frame) for frame in iter_frames(frames)]
+
+    def get_camera_movement_parallel(self, frames: Union[FrameSource, List[np.ndarray]], num_workers: Optional[int] = None,
+                                     segment_length: Optional[int] = None, overlap: int = 10) -> List[List[float]]:
+        """
+        Estimate the camera movement of each frame with segments of the video processed in parallel
+
+        The video is split in segments that start `overlap` frames before their first frame, so the
+        features of each segment are set up when its first frame is reached. At each seam, the frames
+        of the overlap come from the previous segment and the next segment takes over from its first
+        frame. The difference of the cumulative movement of both segments over the overlap is kept in
+        `seam_errors`.
+
+        Args:
+            frames (Union[FrameSource, List[np.ndarray]]): The frames of the video. Each worker of a FrameSource
+                decodes its own segment, a list is sent to the workers in slices.
+            num_workers (Optional[int]): Number of processes. None uses all cores.
+            segment_length (Optional[int]): Number of frames of each segment. None splits the video in one segment per worker.
+            overlap (int): Number of frames each segment starts before its first frame, at least 1 so
+                the first frame of a segment has a previous frame to be compared with.
+
+        Returns:
+            List[List[float]]: A list of the camera movement in each frame of the video
+
+        Raises:
+            ValueError: If `overlap` is smaller than 1.
+        """
+        if overlap < 1:
+            raise ValueError("overlap must be at least 1.")
+        num_workers = num_workers or os.cpu_count() or 1
+        num_frames = len(frames)
+        segment_length = segment_length or int(np.ceil(num_frames / num_workers))
+        starts = list(range(0, num_frames, max(segment_length, 1)))
+        self.seam_errors = []
+        if num_workers == 1 or len(starts) <= 1:
+            return self.get_camera_movement(frames)
+
+        # Each task holds the segment frames [start - overlap, end), or where to decode them
+        frame_offset = frames.start_frame if isinstance(frames, FrameSource) else 0
+        tasks = []
+        for start in starts:
+            first, end = max(start - overlap, 0), min(start + segment_length, num_frames)
+            if isinstance(frames, FrameSource):
+                source = frames.video_path
+            else:
+                source = list(frames[first:end])
+            tasks.append((self.params, self.minimum_distance, source, frame_offset + first, frame_offset + end))
+
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            segments = list(pool.map(_segment_camera_movement, *zip(*tasks)))
+
+        camera_movement = list(segments[0])
+        for start, segment in zip(starts[1:], segments[1:]):
+            warm_up = start - max(start - overlap, 0)
+            if warm_up > 1:
+                # The first frame of a segment has no movement, so the overlap is compared from the second one
+                previous = np.sum(camera_movement[start - warm_up + 1:start], axis=0)
+                current = np.sum(segment[1:warm_up], axis=0)
+                self.seam_errors.append(float(np.linalg.norm(previous - current)))
+            camera_movement = camera_movement[:start] + list(segment[warm_up:])
 
         return camera_movement
-    
 
-    
\ No newline at end of file
+
+def _segment_camera_movement(params: Dict[str, Any], minimum_distance: float, source: Union[str, List[np.ndarray]],
+                             start_frame: int, end_frame: int) -> List[List[float]]:
+    """Estimates the camera movement of one segment, in a worker process."""
+    estimator = CameraMovementEstimator(**params)
+    estimator.minimum_distance = minimum_distance
+    if isinstance(source, str):
+        source = FrameSource(source, start_frame=start_frame, end_frame=end_frame)
+    return estimator.get_camera_movement(source)
@@ -1,21 +1,44 @@
 
 import cv2
 import numpy as np
-from typing import Tuple, List
+from typing import Dict, Tuple, List, Optional
 from supervision import KeyPoints
 
 class Homography:
 
-    def __init__(self, alpha: float = 0.9):
+    def __init__(self, alpha: float = 0.9, reuse_threshold: float = 1.0, max_reuse_frames: int = 25):
         """
         Initializes the homography.
 
         Args:
             alpha (float): Smoothing factor, between 0 and 1. Higher values give more weight to the current homography.
+            reuse_threshold (float): Mean keypoint displacement, in pixels, under which the last homography is
+                reused instead of estimated again, if the same keypoints are visible. 0 disables the cache.
+            max_reuse_frames (int): Frames after which the homography is estimated again even if the keypoints
+                did not move.
         """
         self.alpha = alpha  # Smoothing factor
         self.smoothed_H = None  # Store the smoothed homography matrix
 
+        # Cache of the last estimated homography and the keypoints it was estimated from
+        self.reuse_threshold = reuse_threshold
+        self.max_reuse_frames = max_reuse_frames
+        self.cached_H = None
+        self.cached_keypoints = None
+        self.cached_top_down_keypoints = None
+        self.reused_frames = 0
+        self.lookups = 0
+        self.hits = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Returns the share of frames whose homography was reused instead of estimated."""
+        return self.hits / max(self.lookups, 1)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the reuse cache counters."""
+        return {'lookups': self.lookups, 'hits': self.hits, 'hit_rate': self.hit_rate}
+
     def smooth(self, current_H: np.ndarray) -> np.ndarray:
         """
         Smooths the homography matrix using exponential smoothing.
@@ -52,6 +75,23 @@ class Homography:
 
         return h.astype(np.float32)
 
+    def estimate(self, keypoints: np.ndarray, top_down_keypoints: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Compute the homography of one frame on its own, without the reuse cache or the smoothing,
+        e.g. for keyframes that are many frames apart.
+
+        Args:
+            keypoints (np.ndarray): Detected keypoints of shape (n, 2).
+            top_down_keypoints (np.ndarray): The matching top-down keypoints of shape (n, 2).
+
+        Returns:
+            Optional[np.ndarray]: The homography matrix of shape (3, 3), None if it cannot be estimated.
+        """
+        if len(keypoints) < 4:  # A homography needs at least 4 points
+            return None
+        h, _ = cv2.findHomography(np.array(keypoints, dtype=np.float32), np.array(top_down_keypoints, dtype=np.float32))
+        return None if h is None else h.astype(np.float32)
+
     def find_homography(self,keypoints: np.ndarray, top_down_keypoints: np.ndarray) -> np.ndarray:
         """
         Compute the homography matrix between detected keypoints and top-down keypoints.
@@ -72,11 +112,37 @@ class Homography:
             kps.append(keypoints[key])             
             proj_kps.append(top_down_keypoints[key])
 
-        H = self._compute_homography(np.array(kps), np.array(proj_kps))
+        kps, proj_kps = np.array(kps, dtype=np.float32), np.array(proj_kps, dtype=np.float32)
+
+        # With the camera still, the same keypoints barely move: reuse the last homography
+        self.lookups += 1
+        if self._can_reuse(kps, proj_kps):
+            self.hits += 1
+            self.reused_frames += 1
+            return self.smooth(self.cached_H)
+
+        H = self._compute_homography(kps, proj_kps)
+        self.cached_H, self.cached_keypoints, self.cached_top_down_keypoints = H, kps, proj_kps
+        self.reused_frames = 0
         smoothed_H = self.smooth(H)
 
         return smoothed_H
 
+    def _can_reuse(self, keypoints: np.ndarray, top_down_keypoints: np.ndarray) -> bool:
+        """
+        Checks whether the cached homography can be used for the given keypoints.
+
+        The visible keypoint set must be the same, i.e. the same top-down keypoints in the same order,
+        the mean displacement of the keypoints must be under `reuse_threshold`, and the homography must
+        have been estimated less than `max_reuse_frames` frames ago.
+        """
+        if self.cached_H is None or self.reuse_threshold <= 0 or self.reused_frames + 1 >= self.max_reuse_frames:
+            return False
+        if keypoints.shape != self.cached_keypoints.shape or not np.array_equal(top_down_keypoints, self.cached_top_down_keypoints):
+            return False
+        displacement = np.linalg.norm(keypoints - self.cached_keypoints, axis=1).mean()
+        return displacement < self.reuse_threshold
+
 
     def perspective_transform(self, posistion: Tuple[float, float], H_mat: np.ndarray) -> Tuple[float, float]:
         """
@@ -95,3 +161,31 @@ class Homography:
         projected_pos /= projected_pos[2]  # Normalize homogeneous coordinates
 
         return projected_pos[0], projected_pos[1]
+
+    def perspective_transform_batch(self, positions: np.ndarray, H_mats: np.ndarray,
+                                    homography_index: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Apply homography transformations to many 2D points in one vectorized pass.
+
+        Args:
+            positions (np.ndarray): The (x, y) coordinates of the points, shape (n, 2).
+            H_mats (np.ndarray): A homography matrix of shape (3, 3), or stacked matrices of shape (m, 3, 3),
+                e.g. one per frame.
+            homography_index (Optional[np.ndarray]): Index in `H_mats` of the matrix of each point, shape (n,),
+                e.g. the frame of each point. Required when `H_mats` is stacked.
+
+        Returns:
+            np.ndarray: The projected (x, y) coordinates of shape (n, 2), in the order of `positions`.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        H_mats = np.asarray(H_mats, dtype=np.float64)
+        homogeneous = np.concatenate([positions, np.ones((len(positions), 1))], axis=1)
+
+        if H_mats.ndim == 2:
+            projected = homogeneous @ H_mats.T
+        else:
+            if homography_index is None:
+                raise ValueError("homography_index is required with stacked homography matrices.")
+            projected = np.einsum('nij,nj->ni', H_mats[np.asarray(homography_index, dtype=np.int64)], homogeneous)
+
+        return projected[:, :2] / projected[:, 2:3]  # Normalize homogeneous coordinates
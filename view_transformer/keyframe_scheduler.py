@@ -0,0 +1,146 @@
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+
+class KeyframeScheduler:
+    """
+    Chooses the frames where pitch keypoints are detected, and propagates the homography
+    of the last keyframe to the frames in between with the camera movement.
+
+    The pitch only moves in the image when the camera moves, so keypoint inference runs on a
+    keyframe every `interval` frames, or earlier once the camera has moved more than
+    `max_displacement` pixels since the last keyframe. In between, the camera movement
+    measured by `CameraMovementEstimator` (old position minus new position of the tracked
+    features, per frame) is accumulated, and the homography of a frame is the keyframe
+    homography composed with that translation: `H_t = H_k @ T(movement since k)`.
+    """
+
+    def __init__(self, interval: int = 25, max_displacement: float = 30.0) -> None:
+        """
+        Initializes the scheduler.
+
+        Args:
+            interval (int): Maximum number of frames between two keyframes.
+            max_displacement (float): Camera displacement since the last keyframe, in pixels, that forces a new keyframe.
+        """
+        if interval < 1:
+            raise ValueError("interval must be at least 1.")
+        self.interval = interval
+        self.max_displacement = max_displacement
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets the last keyframe, so the next frame is a keyframe."""
+        self.keyframe_H: Optional[np.ndarray] = None
+        self.movement = np.zeros(2)  # Camera movement accumulated since the last keyframe
+        self.frames_since_keyframe = 0
+        self.num_frames = 0
+        self.num_keyframes = 0
+
+    @property
+    def keyframe_rate(self) -> float:
+        """Returns the share of frames that were keyframes."""
+        return self.num_keyframes / max(self.num_frames, 1)
+
+    def update(self, camera_movement: Sequence[float]) -> bool:
+        """
+        Advances to the next frame.
+
+        Args:
+            camera_movement (Sequence[float]): Camera movement (x, y) of the frame relative to the previous one.
+
+        Returns:
+            bool: Whether keypoints should be detected in this frame. If so, pass the homography
+                to `set_keyframe_homography`.
+        """
+        self.num_frames += 1
+        self.movement += np.asarray(camera_movement, dtype=np.float64)
+        self.frames_since_keyframe += 1
+
+        is_keyframe = (self.keyframe_H is None or self.frames_since_keyframe >= self.interval
+                       or np.linalg.norm(self.movement) > self.max_displacement)
+        if is_keyframe:
+            self.num_keyframes += 1
+        return is_keyframe
+
+    def set_keyframe_homography(self, H: Optional[np.ndarray]) -> None:
+        """
+        Sets the homography estimated on the current keyframe.
+
+        Args:
+            H (Optional[np.ndarray]): The homography of shape (3, 3). None if it could not be estimated,
+                the previous keyframe homography is then kept and the next frame is a keyframe again.
+        """
+        if H is None:
+            self.frames_since_keyframe = self.interval
+            return
+        self.keyframe_H = np.asarray(H, dtype=np.float64)
+        self.movement = np.zeros(2)
+        self.frames_since_keyframe = 0
+
+    def homography(self) -> Optional[np.ndarray]:
+        """Returns the homography of the current frame, None before the first keyframe homography."""
+        if self.keyframe_H is None:
+            return None
+        return self.keyframe_H @ translation(self.movement)
+
+    def plan(self, camera_movement: Sequence[Sequence[float]]) -> np.ndarray:
+        """
+        Chooses the keyframes of a whole video from its camera movement.
+
+        Args:
+            camera_movement (Sequence[Sequence[float]]): Camera movement (x, y) of each frame.
+
+        Returns:
+            np.ndarray: Boolean mask of the keyframes, shape (num_frames,). A planned keyframe whose detection
+                has fewer than 4 keypoints is followed by more keyframes until one is usable, which
+                `KeypointTracker.get_detections` does while it detects them.
+        """
+        self.reset()
+        keyframes = np.zeros(len(camera_movement), dtype=bool)
+        for frame_num, movement in enumerate(camera_movement):
+            keyframes[frame_num] = self.update(movement)
+            if keyframes[frame_num]:
+                self.set_keyframe_homography(np.eye(3))  # Only the schedule matters here
+        return keyframes
+
+    def propagate(self, keyframe_homographies: Dict[int, np.ndarray],
+                  camera_movement: Sequence[Sequence[float]]) -> np.ndarray:
+        """
+        Computes the homography of every frame of a video from the keyframe homographies.
+
+        Args:
+            keyframe_homographies (Dict[int, np.ndarray]): Homography of shape (3, 3) of each keyframe.
+            camera_movement (Sequence[Sequence[float]]): Camera movement (x, y) of each frame.
+
+        Returns:
+            np.ndarray: Homographies of shape (num_frames, 3, 3). Frames before the first keyframe are NaN.
+        """
+        movement = np.asarray(camera_movement, dtype=np.float64).reshape(-1, 2)
+        num_frames = len(movement)
+        cumulative = np.cumsum(movement, axis=0)
+
+        stacked = np.full((num_frames, 3, 3), np.nan)
+        is_keyframe = np.zeros(num_frames, dtype=bool)
+        for frame_num, H in keyframe_homographies.items():
+            if 0 <= frame_num < num_frames:
+                stacked[frame_num] = H
+                is_keyframe[frame_num] = True
+
+        # Last keyframe of every frame, and the movement accumulated since then
+        last_keyframe = np.maximum.accumulate(np.where(is_keyframe, np.arange(num_frames), -1))
+        has_keyframe = last_keyframe >= 0
+        last_keyframe = np.maximum(last_keyframe, 0)
+        since_keyframe = cumulative - cumulative[last_keyframe]
+
+        T = np.broadcast_to(np.eye(3), (num_frames, 3, 3)).copy()
+        T[:, :2, 2] = since_keyframe
+        homographies = np.einsum('nij,njk->nik', stacked[last_keyframe], T)
+        homographies[~has_keyframe] = np.nan
+        return homographies
+
+
+def translation(offset: Tuple[float, float]) -> np.ndarray:
+    """Returns the 3x3 matrix translating points by `offset`."""
+    T = np.eye(3)
+    T[:2, 2] = offset
+    return T
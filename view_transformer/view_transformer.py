@@ -4,7 +4,9 @@ import cv2
 import pandas as pd
 from .base import BaseTransformer
 from .homography import Homography
+from .keyframe_scheduler import KeyframeScheduler
 from utils import get_anchors_coordinates
+from trackers import TrackTable
 from Enums import Position
 from supervision import KeyPoints
 
@@ -19,17 +21,20 @@ class ViewTransformer(BaseTransformer):
     detected keypoints.
     """
 
-    def __init__(self, top_down_keypoints: np.ndarray, alpha: float = 0.9) -> None:
+    def __init__(self, top_down_keypoints: np.ndarray, alpha: float = 0.9, reuse_threshold: float = 1.0,
+                 max_reuse_frames: int = 25) -> None:
         """
         Initializes the ObjectPositionMapper.
 
         Args:
             top_down_keypoints (np.ndarray): An array of shape (n, 2) containing the top-down keypoints.
             alpha (float): Smoothing factor for homography smoothing.
+            reuse_threshold (float): Mean keypoint displacement, in pixels, under which the last homography is reused.
+            max_reuse_frames (int): Frames after which the homography is always estimated again.
         """
         super().__init__()
         self.top_down_keypoints = top_down_keypoints
-        self.homography: Homography = Homography(alpha)
+        self.homography: Homography = Homography(alpha, reuse_threshold, max_reuse_frames)
     
     def transform(self, object_tracks: List[List[Dict[str, Any]]], keypoints_tracks: Optional[KeyPoints], filter: np.ndarray) -> List[List[Dict[str, Any]]]:
         """Maps the detection data to their positions in the top-down view.
@@ -59,23 +64,96 @@ class ViewTransformer(BaseTransformer):
         else:
             homography_matrix = self.homography.find_homography(keypoints, self.top_down_keypoints[filter])
 
+        # Feet of every object of the frame, projected in a single call
+        valid_tracks = []
         transformed_tracks = []
         for player_track in object_tracks:
             transformed_player_track = []
             for track_info in player_track:
                 if isinstance(track_info, dict) and 'bbox' in track_info:
-                    bbox = track_info['bbox']
-                    feet_pos = get_anchors_coordinates(bbox, anchor=Position.BOTTOM_CENTER)
-                    projected_pos = self.homography.perspective_transform(posistion=feet_pos, H_mat=homography_matrix)
-                    track_info['projection'] = projected_pos
-                    track_info['position'] = feet_pos
+                    valid_tracks.append(track_info)
                     transformed_player_track.append(track_info)
                 else:
                     print("Track não é um dicionário ou não tem 'bbox':", track_info)
             transformed_tracks.append(transformed_player_track)
 
+        if valid_tracks:
+            bboxes = np.array([track_info['bbox'] for track_info in valid_tracks], dtype=np.float64)
+            feet_positions = get_anchors_coordinates(bboxes.T, anchor=Position.BOTTOM_CENTER)  # (n, 2)
+            projected_positions = self.homography.perspective_transform_batch(feet_positions, homography_matrix)
+            for track_info, feet_pos, projected_pos in zip(valid_tracks, feet_positions, projected_positions):
+                track_info['projection'] = tuple(projected_pos)
+                track_info['position'] = feet_pos
+
         return transformed_tracks
-    
+
+    def project(self, positions: np.ndarray, homographies: np.ndarray,
+                homography_index: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Projects positions of any number of frames to the top-down view in one vectorized pass.
+
+        Args:
+            positions (np.ndarray): Positions in the image, shape (n, 2), e.g. the feet of every track row.
+            homographies (np.ndarray): One homography of shape (3, 3), or one per frame of shape (m, 3, 3).
+                Frames without a homography can hold NaN matrices, their positions project to NaN.
+            homography_index (Optional[np.ndarray]): Index in `homographies` of each position, shape (n,).
+
+        Returns:
+            np.ndarray: The projected positions of shape (n, 2), aligned with `positions`.
+        """
+        return self.homography.perspective_transform_batch(positions, homographies, homography_index)
+
+    def transform_table(self, table: TrackTable, homographies: np.ndarray, start_frame: int = 0) -> np.ndarray:
+        """
+        Projects the feet of every row of a track table and stores them in its columns.
+
+        Args:
+            table (TrackTable): The tracks of all frames.
+            homographies (np.ndarray): One homography per frame, shape (num_frames, 3, 3).
+            start_frame (int): Frame of the first homography.
+
+        Returns:
+            np.ndarray: The projections of shape (n, 2), also stored in `table.projection`, aligned with its rows.
+        """
+        feet_positions = table.feet()
+        homography_index = table.frame - start_frame
+        if len(homography_index) and (homography_index.min() < 0 or homography_index.max() >= len(homographies)):
+            raise ValueError("The track table has frames without a homography.")
+
+        projection = self.project(feet_positions, homographies, homography_index)
+        table.position = feet_positions.astype(np.float32)
+        table.projection = projection.astype(np.float32)
+        return table.projection
+
+    def keyframe_homographies(self, keypoints_tracks: List[KeyPoints], filters: List[np.ndarray],
+                              keyframes: Optional[np.ndarray], camera_movement: List[List[float]],
+                              scheduler: KeyframeScheduler) -> np.ndarray:
+        """
+        Computes the homography of every frame from keypoints detected on keyframes only.
+
+        Each keyframe homography is estimated on its own, without the reuse cache and the smoothing
+        of `find_homography`, which assume consecutive frames.
+
+        Args:
+            keypoints_tracks (List[KeyPoints]): Keypoints of each frame, as returned by `KeypointTracker.get_tracks`
+                on detections of the keyframes.
+            filters (List[np.ndarray]): Keypoint filter of each frame, from the same call.
+            keyframes (Optional[np.ndarray]): Boolean mask of the keyframes, from `scheduler.plan`. None uses every
+                frame with keypoints, including the frames detected after an unusable keyframe.
+            camera_movement (List[List[float]]): Camera movement of each frame.
+            scheduler (KeyframeScheduler): The scheduler that planned the keyframes.
+
+        Returns:
+            np.ndarray: Homographies of shape (num_frames, 3, 3), NaN before the first usable keyframe.
+        """
+        frame_nums = np.flatnonzero(keyframes) if keyframes is not None else range(len(keypoints_tracks))
+        keyframe_homographies = {}
+        for frame_num in frame_nums:
+            H = self.homography.estimate(keypoints_tracks[frame_num].xy[0], self.top_down_keypoints[filters[frame_num]])
+            if H is not None:
+                keyframe_homographies[int(frame_num)] = H
+        return scheduler.propagate(keyframe_homographies, camera_movement)
+
     def adjust_transforms(self, object_tracks: List[List[Dict[str, Any]]], camera_movement: Tuple[float, float]) -> List[List[Dict[str, Any]]]:
         """
         Adjust the projected positions of the objects based on the camera movement in each frame.